@@ -0,0 +1,181 @@
+# app/cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+QUERY_CACHE_SIZE = 1024  # cached list pages
+QUERY_CACHE_TTL = 30.0  # seconds a cached page may be served
+FILE_STAT_CACHE_SIZE = 4096  # resume blobs whose stat results are kept
+IDEMPOTENCY_CACHE_SIZE = 10_000  # Idempotency-Key responses remembered
+IDEMPOTENCY_TTL = 24 * 3600.0  # seconds a completed response is replayed
+IDEMPOTENCY_PENDING_TTL = 300.0  # seconds a key stays claimed by a request that never finished
+
+
+class QueryCache:
+    """LRU cache of rendered list pages, keyed on normalized query parameters.
+
+    Each entry remembers the store generation it was rendered at and is
+    only served while the store is still at that generation, so any
+    add/update/delete invalidates exactly the pages it could have changed
+    without scanning the cache. The TTL bounds how long an idle entry
+    holds memory.
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag(key: Hashable, generation: int) -> str:
+        """Strong validator for the page ``key`` renders to at ``generation``"""
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return f'"{generation:x}-{digest}"'
+
+    def get(self, key: Hashable, generation: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires, body = entry
+                if entry_generation == generation and expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generation: int, body: bytes):
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class FileStatCache:
+    """Small LRU of ``os.stat`` results for hot resume blobs.
+
+    Blobs are content-addressed and never rewritten, so an entry stays
+    valid until the blob is unlinked, at which point the deletion queue
+    discards it.
+    """
+
+    def __init__(self, maxsize: int = FILE_STAT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, os.stat_result]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[os.stat_result]:
+        with self._lock:
+            result = self._entries.get(path)
+            if result is not None:
+                self._entries.move_to_end(path)
+            return result
+
+    def put(self, path: str, result: os.stat_result):
+        with self._lock:
+            self._entries[path] = result
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, path: str):
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+class IdempotencyCache:
+    """Bounded TTL cache of responses to requests sent with an ``Idempotency-Key``.
+
+    A request claims its key before doing any work and completes it with
+    the response, so a retry never repeats the work: it gets the stored
+    response, or a conflict while the first attempt is still running.
+    Each key is bound to a fingerprint of its request, and reusing it for
+    a different request is refused. Claims that are never completed or
+    released expire after ``pending_ttl``.
+    """
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL,
+                 pending_ttl: float = IDEMPOTENCY_PENDING_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        # key -> (expires, fingerprint, (status, body) once completed)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[str, Optional[Tuple[int, bytes]]]:
+        """Returns ("claimed", None), ("pending", None), ("mismatch", None) or ("done", (status, body))"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                _, claimed_fingerprint, response = entry
+                if claimed_fingerprint != fingerprint:
+                    return "mismatch", None
+                return ("pending", None) if response is None else ("done", response)
+            self._entries[key] = (now + self.pending_ttl, fingerprint, None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return "claimed", None
+
+    def complete(self, key: str, status: int, body: bytes):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (time.monotonic() + self.ttl, entry[1], (status, body))
+                self._entries.move_to_end(key)
+
+    def release(self, key: str):
+        """Drop an unfinished claim so the request can be retried"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is None:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers ``etag``"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+query_cache = QueryCache()
+file_stat_cache = FileStatCache()
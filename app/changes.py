@@ -0,0 +1,72 @@
+# app/changes.py
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+CHANGELOG_SIZE = 100_000  # most recent mutations kept for incremental sync
+
+
+class ChangeLog:
+    """Bounded, in-memory log of candidate mutations with increasing sequence numbers.
+
+    Sequence numbers are seeded from the clock, so they keep increasing
+    across restarts; a consumer whose position is older than the oldest
+    retained entry (or from before a restart) is told to resynchronize
+    instead of silently missing changes.
+
+    Entries live in a list that is trimmed in chunks once it outgrows
+    ``maxlen`` by a quarter, so appends stay O(1) amortized and a lookup
+    from any sequence number is a subtraction.
+    """
+
+    def __init__(self, maxlen: int = CHANGELOG_SIZE):
+        self.maxlen = maxlen
+        self._entries: List[Tuple[int, str, Optional[int], datetime]] = []
+        self._first_seq = time.time_ns() // 1000
+        self._lock = threading.Lock()
+        self._waiters: Dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+
+    def latest(self) -> int:
+        """Sequence number of the newest entry (one before the first if empty)"""
+        with self._lock:
+            return self._first_seq + len(self._entries) - 1
+
+    def append(self, op: str, candidate_id: Optional[int]) -> int:
+        with self._lock:
+            seq = self._first_seq + len(self._entries)
+            self._entries.append((seq, op, candidate_id, datetime.now()))
+            excess = len(self._entries) - self.maxlen
+            if excess > self.maxlen // 4:
+                del self._entries[:excess]
+                self._first_seq += excess
+            waiters = list(self._waiters.items())
+        for event, loop in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(event)
+        return seq
+
+    def since(self, seq: int, limit: int = 1000) -> Tuple[List[dict], int, bool]:
+        """Entries after ``seq``; returns (changes, latest sequence, truncated)"""
+        with self._lock:
+            latest = self._first_seq + len(self._entries) - 1
+            if seq < self._first_seq - 1 or seq > latest:
+                return [], latest, True
+            start = seq - self._first_seq + 1
+            entries = self._entries[start:start + limit]
+        changes = [{"seq": s, "op": op, "id": candidate_id, "at": at} for s, op, candidate_id, at in entries]
+        return changes, latest, False
+
+    def subscribe(self) -> asyncio.Event:
+        """Event set on the caller's loop at the next append; pair with unsubscribe()"""
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters[event] = asyncio.get_running_loop()
+        return event
+
+    def unsubscribe(self, event: asyncio.Event):
+        with self._lock:
+            self._waiters.pop(event, None)
@@ -0,0 +1,280 @@
+# app/columns.py
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.indexes import normalize_skill
+from app.models import CandidateRecord
+
+_EPOCH = datetime(1970, 1, 1)
+_SECONDS_PER_DAY = 86400
+
+_COLUMN_NAMES = ("alive", "experience", "graduation_year", "created_at")
+
+# Holders a skill needs before its match mask is kept as a bitmap
+SKILL_BITMAP_MIN = 1024
+
+
+def _epoch_seconds(moment: datetime) -> int:
+    # Naive timestamps are stored as-is, so day buckets match their local dates
+    return int((moment.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+class CandidateColumns:
+    """Column arrays of the numeric candidate fields, indexed by candidate id.
+
+    Ids are allocated densely from 1, so slot ``i`` belongs to candidate
+    ``i`` and deleted candidates simply clear their ``alive`` flag. Arrays
+    grow by doubling into fresh copies, so a reader holding the previous
+    arrays keeps a consistent (if stale) view.
+
+    Skills are dictionary-encoded: each normalized skill gets a code and
+    ``skill_counts[code]`` holds how many live candidates have it.
+    Skills that matches ask for and that many candidates hold also get a
+    bitmap of their holders in ``skill_bitmaps``, so their masks are
+    unpacked in one step rather than scattered from a posting set.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._allocate(capacity)
+        self.size = 0  # one past the highest id stored
+        self.skill_codes: Dict[str, int] = {}
+        self.skill_names: List[str] = []
+        self.skill_counts = np.zeros(64, dtype=np.int64)
+        self.skill_bitmaps: Dict[int, np.ndarray] = {}
+
+    def _allocate(self, capacity: int):
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.experience = np.zeros(capacity, dtype=np.int32)
+        self.graduation_year = np.zeros(capacity, dtype=np.int32)
+        self.created_at = np.zeros(capacity, dtype=np.int64)
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return tuple(getattr(self, name) for name in _COLUMN_NAMES)
+
+    def _reserve(self, candidate_id: int):
+        capacity = len(self.alive)
+        if candidate_id < capacity:
+            return
+        while capacity <= candidate_id:
+            capacity *= 2
+        old = self._columns()
+        self._allocate(capacity)
+        for new, previous in zip(self._columns(), old):
+            new[:len(previous)] = previous
+        for code, bits in self.skill_bitmaps.items():
+            grown = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+            grown[:len(bits)] = bits
+            self.skill_bitmaps[code] = grown
+
+    def _skill_code(self, skill: str) -> int:
+        code = self.skill_codes.get(skill)
+        if code is None:
+            code = self.skill_codes[skill] = len(self.skill_names)
+            self.skill_names.append(skill)
+            if code >= len(self.skill_counts):
+                counts = np.zeros(2 * len(self.skill_counts), dtype=np.int64)
+                counts[:len(self.skill_counts)] = self.skill_counts
+                self.skill_counts = counts
+        return code
+
+    def _encode_skills(self, candidate: CandidateRecord) -> List[int]:
+        return [self._skill_code(s) for s in {normalize_skill(s) for s in candidate.skill_set}]
+
+    def set(self, candidate: CandidateRecord):
+        # Convert before writing, so a value the columns cannot hold raises with nothing changed
+        experience = np.int32(candidate.years_of_experience)
+        graduation_year = np.int32(candidate.graduation_year)
+        created_at = _epoch_seconds(candidate.created_at)
+        self._reserve(candidate.id)
+        self.experience[candidate.id] = experience
+        self.graduation_year[candidate.id] = graduation_year
+        self.created_at[candidate.id] = created_at
+        self.alive[candidate.id] = True
+        # Encode first: a new skill may swap skill_counts for a larger array
+        codes = self._encode_skills(candidate)
+        self.skill_counts[codes] += 1
+        self._mark_skills(candidate.id, codes, True)
+        self.size = max(self.size, candidate.id + 1)
+
+    def remove(self, candidate: CandidateRecord):
+        if candidate.id < len(self.alive) and self.alive[candidate.id]:
+            self.alive[candidate.id] = False
+            codes = self._encode_skills(candidate)
+            self.skill_counts[codes] -= 1
+            self._mark_skills(candidate.id, codes, False)
+
+    def _mark_skills(self, candidate_id: int, codes: List[int], held: bool):
+        byte, bit = candidate_id >> 3, 1 << (candidate_id & 7)
+        for code in codes:
+            bits = self.skill_bitmaps.get(code)
+            if bits is not None:
+                bits[byte] = bits[byte] | bit if held else bits[byte] & (0xFF ^ bit)
+
+    def clear(self):
+        self._allocate(1024)
+        self.size = 0
+        self.skill_codes = {}
+        self.skill_names = []
+        self.skill_counts = np.zeros(64, dtype=np.int64)
+        self.skill_bitmaps = {}
+
+    def bulk_load(self, candidates: Sequence[CandidateRecord]):
+        """Rebuild every column with one vectorized assignment per field"""
+        size = max((c.id for c in candidates), default=0) + 1
+        self._allocate(max(1024, 1 << (size - 1).bit_length()))
+        ids = np.fromiter((c.id for c in candidates), dtype=np.int64, count=len(candidates))
+        self.experience[ids] = np.fromiter((c.years_of_experience for c in candidates), dtype=np.int32, count=len(candidates))
+        self.graduation_year[ids] = np.fromiter((c.graduation_year for c in candidates), dtype=np.int32, count=len(candidates))
+        self.created_at[ids] = np.fromiter((_epoch_seconds(c.created_at) for c in candidates), dtype=np.int64, count=len(candidates))
+        self.alive[ids] = True
+        self.size = size if candidates else 0
+        self.skill_codes, self.skill_names = {}, []
+        self.skill_counts = np.zeros(64, dtype=np.int64)
+        self.skill_bitmaps = {}
+        codes = [code for c in candidates for code in self._encode_skills(c)]
+        self.skill_counts[:len(self.skill_names)] = np.bincount(
+            np.asarray(codes, dtype=np.int64), minlength=len(self.skill_names)
+        )
+
+    def within(self, ids: np.ndarray, column: str, low: Optional[int] = None,
+               high: Optional[int] = None) -> np.ndarray:
+        """The ``ids`` whose ``column`` value lies in the inclusive ``[low, high]`` range"""
+        values = getattr(self, column)[ids]
+        keep = np.ones(len(ids), dtype=bool)
+        if low is not None:
+            keep &= values >= low
+        if high is not None:
+            keep &= values <= high
+        return ids[keep]
+
+    def export(self) -> dict:
+        """Copies of the used part of every column plus the skill dictionary, for a snapshot"""
+        n = self.size
+        data = {name: getattr(self, name)[:n].copy() for name in _COLUMN_NAMES}
+        data.update(size=n, skill_names=list(self.skill_names),
+                    skill_counts=self.skill_counts[:len(self.skill_names)].copy())
+        return data
+
+    def restore(self, data: dict):
+        """Load columns saved by ``export``"""
+        n = data["size"]
+        self._allocate(max(1024, 1 << max(n - 1, 0).bit_length()))
+        for name in _COLUMN_NAMES:
+            getattr(self, name)[:n] = data[name]
+        self.size = n
+        self.skill_names = list(data["skill_names"])
+        self.skill_codes = {skill: code for code, skill in enumerate(self.skill_names)}
+        self.skill_counts = np.zeros(max(64, len(self.skill_names)), dtype=np.int64)
+        self.skill_counts[:len(self.skill_names)] = data["skill_counts"]
+        self.skill_bitmaps = {}
+
+    def wants_skill_bitmap(self, skill: str, holders: int) -> bool:
+        """Whether ``skill`` has no bitmap yet and enough ``holders`` to deserve one.
+
+        The bar rises with capacity, so a bitmap never outweighs the
+        posting set it replaces.
+        """
+        code = self.skill_codes.get(skill)
+        return (code is not None and code not in self.skill_bitmaps
+                and holders >= max(SKILL_BITMAP_MIN, len(self.alive) >> 8))
+
+    def add_skill_bitmap(self, skill: str, ids: Set[int]):
+        """Keep a bitmap of the holders of ``skill`` from now on; ``ids`` are the current ones"""
+        code = self.skill_codes.get(skill)
+        if code is None or code in self.skill_bitmaps:
+            return
+        holders = np.zeros(len(self.alive), dtype=bool)
+        holders[np.fromiter(ids, dtype=np.int64, count=len(ids))] = True
+        self.skill_bitmaps[code] = np.packbits(holders, bitorder="little")
+
+    def mask(self, postings: Dict[str, Set[int]]) -> np.ndarray:
+        """Boolean column that is True for the holders of any skill in ``postings``"""
+        n = self.size
+        result = np.zeros(n, dtype=bool)
+        scattered = []
+        for skill, ids in postings.items():
+            bits = self.skill_bitmaps.get(self.skill_codes.get(skill))
+            if bits is None:
+                scattered.append(ids)
+            else:
+                result |= np.unpackbits(bits, count=n, bitorder="little").view(bool)
+        size = sum(len(ids) for ids in scattered)
+        if size:
+            result[np.fromiter(chain.from_iterable(scattered), dtype=np.int64, count=size)] = True
+        return result
+
+    def match(self, required: List[Tuple[np.ndarray, float]], optional: List[Tuple[np.ndarray, float]],
+              experience_min: Optional[int] = None, experience_max: Optional[int] = None,
+              graduation_year_from: Optional[int] = None, graduation_year_to: Optional[int] = None,
+              limit: int = 10) -> Tuple[int, List[Tuple[int, float]]]:
+        """Score every live candidate at once and return (eligible count, top ``limit`` (id, score)).
+
+        Candidates must have every required skill and fall inside the
+        experience and graduation bounds; the score is the summed weight of
+        the required and optional skills they have. Results are ordered by
+        score, then experience, then id.
+        """
+        n = self.size
+        experience = self.experience[:n]
+        graduation_year = self.graduation_year[:n]
+        eligible = self.alive[:n].copy()
+        if experience_min is not None:
+            eligible &= experience >= experience_min
+        if experience_max is not None:
+            eligible &= experience <= experience_max
+        if graduation_year_from is not None:
+            eligible &= graduation_year >= graduation_year_from
+        if graduation_year_to is not None:
+            eligible &= graduation_year <= graduation_year_to
+
+        scores = np.zeros(n, dtype=np.float64)
+        for mask, weight in required:
+            eligible &= mask
+            scores += weight * mask
+        for mask, weight in optional:
+            scores += weight * mask
+
+        ids = np.flatnonzero(eligible)
+        if not len(ids):
+            return 0, []
+        candidate_scores = scores[ids]
+        k = min(limit, len(ids))
+        # Everything above the k-th best score makes the cut. The ties with it
+        # are narrowed by a second partition on one (experience desc, id) key,
+        # so only k rows are ever sorted, however many share the cutoff score.
+        cutoff = -np.partition(-candidate_scores, k - 1)[k - 1]
+        above = np.flatnonzero(candidate_scores > cutoff)
+        tied = np.flatnonzero(candidate_scores == cutoff)
+        needed = k - len(above)
+        if needed < len(tied):
+            tie_keys = -experience[ids[tied]].astype(np.int64) * n + ids[tied]
+            tied = tied[np.argpartition(tie_keys, needed - 1)[:needed]]
+        top = np.concatenate((above, tied))
+        top_ids, top_scores = ids[top], candidate_scores[top]
+        order = np.lexsort((top_ids, -experience[top_ids], -top_scores))
+        return len(ids), [(int(i), float(s)) for i, s in zip(top_ids[order], top_scores[order])]
+
+    def aggregate(self, top_skills: int = 20) -> dict:
+        """Group-by counts over the live candidates in one vectorized pass per column"""
+        n = self.size
+        alive = self.alive[:n]
+        levels, experienced = np.unique(self.experience[:n][alive], return_counts=True)
+        years, graduates = np.unique(self.graduation_year[:n][alive], return_counts=True)
+        days, uploads = np.unique(self.created_at[:n][alive] // _SECONDS_PER_DAY, return_counts=True)
+
+        counts = self.skill_counts[:len(self.skill_names)]
+        k = min(top_skills, int(np.count_nonzero(counts)))
+        top = np.argpartition(-counts, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+        top = top[np.lexsort((top, -counts[top]))]
+        return {
+            "total": int(alive.sum()),
+            "skills": [(self.skill_names[code], int(counts[code])) for code in top],
+            "experience_histogram": {int(level): int(count) for level, count in zip(levels, experienced)},
+            "graduates_per_year": {int(year): int(count) for year, count in zip(years, graduates)},
+            "uploads_per_day": {
+                date(1970, 1, 1) + timedelta(days=int(day)): int(count) for day, count in zip(days, uploads)
+            },
+        }
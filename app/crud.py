@@ -1,108 +1,266 @@
 # app/crud.py
-from typing import Optional, List, Tuple
+from typing import Callable, Optional, List, Set, Tuple, TypeVar
+from datetime import date, datetime
+import asyncio
+import base64
+import hashlib
 import json
-from datetime import datetime
+import logging
+
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
 
 from app import schemas
-from app.state import app_state  # Import the global state
-
-def create_candidate(candidate: schemas.CandidateCreate, resume_path: str) -> dict:
-    """Create a new candidate in memory"""
-    candidate_data = {
-        'full_name': candidate.full_name,
-        'dob': candidate.dob.isoformat(),  # Store as string
-        'contact_number': candidate.contact_number,
-        'contact_address': candidate.contact_address,
-        'education_qualification': candidate.education_qualification,
-        'graduation_year': candidate.graduation_year,
-        'years_of_experience': candidate.years_of_experience,
-        'skill_set': json.dumps(candidate.skill_set)
-    }
-    return app_state.add_candidate(candidate_data, resume_path)
-
-def get_candidate(candidate_id: int) -> Optional[dict]:
+from app.processing import PENDING
+from app.models import CandidateRecord
+from app.state import IDENTITY_DEDUPE, SHARED_STORE_ADDRESS, app_state  # Import the global state
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CHANGE_POLL_INTERVAL = 0.5  # seconds between change checks against a shared store
+
+# Attributes a fields= projection may select, in response order
+CANDIDATE_FIELDS = ("id", *schemas.CandidateCreate.model_fields, "resume_path", "created_at", "updated_at", "processing")
+# Projected attributes rendered through their response schema, so they match the full response
+_FIELD_SCHEMAS = {"processing": TypeAdapter(Optional[schemas.ProcessingStatus])}
+
+async def store_call(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Call a store-backed function from async code.
+
+    A shared store answers over a blocking socket, so the call goes to the
+    threadpool, like the sync routes. The in-process store never blocks
+    and is called directly.
+    """
+    if SHARED_STORE_ADDRESS:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+def create_candidate(candidate: schemas.CandidateCreate, resume_path: str) -> Tuple[CandidateRecord, bool]:
+    """Create a new candidate in memory; returns (record, created).
+
+    With identity dedupe on, an already stored person gets the existing
+    record back (merged with the new details in "merge" mode) and
+    ``created`` is False.
+    """
+    return create_candidates([(candidate, resume_path)])[0]
+
+def create_candidates(rows: List[Tuple[schemas.CandidateCreate, str]]) -> List[Tuple[CandidateRecord, bool]]:
+    """Create many candidates, each paired with its stored resume path, in one batch"""
+    data = [({**candidate.model_dump(), "processing": PENDING}, resume_path) for candidate, resume_path in rows]
+    if IDENTITY_DEDUPE == "off":
+        return [(record, True) for record in app_state.add_candidates(data)]
+    return app_state.add_candidates_unique(data, merge=IDENTITY_DEDUPE == "merge")
+
+def find_duplicates(candidates: List[schemas.CandidateCreate]) -> List[Optional[CandidateRecord]]:
+    """Stored record of each candidate's person, or None; all None while identity dedupe is off"""
+    if IDENTITY_DEDUPE == "off":
+        return [None] * len(candidates)
+    return app_state.find_duplicates([(c.full_name, c.dob, c.contact_number) for c in candidates])
+
+def request_fingerprint(candidate: schemas.CandidateCreate, filename: str, size: int) -> str:
+    """Digest identifying a create request, so an Idempotency-Key cannot be reused for another one"""
+    digest = hashlib.sha256(candidate.model_dump_json().encode())
+    digest.update(f"\0{filename}\0{size}".encode())
+    return digest.hexdigest()
+
+def claim_idempotency_key(key: str, fingerprint: str) -> Tuple[str, Optional[Tuple[int, bytes]]]:
+    """Reserve ``key`` for this request; see IdempotencyCache.claim"""
+    return app_state.claim_idempotency_key(key, fingerprint)
+
+def complete_idempotency_key(key: str, status: int, body: bytes):
+    """Store the response replayed to retries sent with ``key``"""
+    app_state.complete_idempotency_key(key, status, body)
+
+def release_idempotency_key(key: str):
+    """Free ``key`` after a failed request so the client can retry it"""
+    app_state.release_idempotency_key(key)
+
+def get_candidate(candidate_id: int) -> Optional[CandidateRecord]:
     """Get a candidate by ID"""
-    candidate = app_state.get_candidate(candidate_id)
-    if candidate:
-        # Convert skill_set back to list
-        if isinstance(candidate['skill_set'], str):
-            candidate['skill_set'] = json.loads(candidate['skill_set'])
-        
-        # Convert date string back to date object ONLY if it's a string
-        if isinstance(candidate['dob'], str):
-            candidate['dob'] = datetime.strptime(candidate['dob'], '%Y-%m-%d').date()
-        # If it's already a date object, leave it as is
-    
-    return candidate
+    return app_state.get_candidate(candidate_id)
+
+def get_candidates_by_ids(candidate_ids: List[int]) -> Tuple[List[CandidateRecord], List[int]]:
+    """Resolve many ids in one store call; returns (found in request order, missing ids)"""
+    found = app_state.get_candidates_many(candidate_ids)
+    present = {c.id for c in found}
+    return found, [i for i in dict.fromkeys(candidate_ids) if i not in present]
+
+def encode_cursor(candidate_id: int) -> str:
+    """Encode the last id of a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(str(candidate_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by encode_cursor; raises ValueError if invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def candidate_json(candidate: CandidateRecord) -> bytes:
+    """Return the candidate's response JSON, rendering it once per mutation"""
+    if candidate.json_bytes is None:
+        candidate.json_bytes = schemas.CandidateResponse.model_validate(candidate).model_dump_json().encode()
+    return candidate.json_bytes
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated ``fields=`` projection; None means every field.
+
+    ``id`` is always included so projected rows can be matched up.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CANDIDATE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(CANDIDATE_FIELDS)}")
+    return tuple(dict.fromkeys(["id", *requested]))
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _projected_value(candidate: CandidateRecord, name: str):
+    value = getattr(candidate, name)
+    adapter = _FIELD_SCHEMAS.get(name)
+    if adapter is None:
+        return value
+    return adapter.dump_python(adapter.validate_python(value), mode="json")
+
+def projected_json(candidate: CandidateRecord, fields: Optional[Tuple[str, ...]]) -> bytes:
+    """JSON of only the requested attributes, read straight off the record"""
+    if fields is None:
+        return candidate_json(candidate)
+    return json.dumps(
+        {name: _projected_value(candidate, name) for name in fields},
+        default=_json_default, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+def render_candidate_page(total: int, candidates: List[CandidateRecord], next_cursor: Optional[str],
+                          fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    """Join per-candidate JSON into a body matching CandidateListResponse"""
+    return b"".join((
+        b'{"total":', str(total).encode(),
+        b',"candidates":[', b",".join(projected_json(c, fields) for c in candidates),
+        b'],"next_cursor":', json.dumps(next_cursor).encode(), b"}"
+    ))
+
+def render_candidate_batch(candidates: List[CandidateRecord], missing: List[int],
+                           fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    """Body matching CandidateBatchResponse"""
+    return b"".join((
+        b'{"candidates":[', b",".join(projected_json(c, fields) for c in candidates),
+        b'],"missing":', json.dumps(missing).encode(), b"}"
+    ))
+
+def store_generation() -> int:
+    """Counter that changes whenever any candidate is added, updated or deleted"""
+    return app_state.generation()
 
 def get_candidates(
     skip: int = 0,
     limit: int = 100,
     skill: Optional[str] = None,
     experience: Optional[int] = None,
-    graduation_year: Optional[int] = None
-) -> Tuple[int, List[dict]]:
-    """Get all candidates with optional filters"""
+    graduation_year: Optional[int] = None,
+    experience_max: Optional[int] = None,
+    graduation_year_from: Optional[int] = None,
+    graduation_year_to: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> Tuple[int, List[CandidateRecord], Optional[str]]:
+    """Get a page of candidates with optional filters and the cursor for the next page"""
     try:
-        # Get all candidates first
-        all_candidates = app_state.get_all_candidates()
-        print(f"DEBUG CRUD - Total candidates in storage: {len(all_candidates)}")
-        
-        # Apply filters
-        filtered = app_state.filter_candidates(skill, experience, graduation_year)
-        print(f"DEBUG CRUD - After filters: {len(filtered)}")
+        # Apply filters and pagination, stopping once the page is full
+        total, page, has_more = app_state.query_page(
+            skip=skip,
+            limit=limit,
+            after_id=after_id,
+            skill=skill,
+            experience=experience,
+            graduation_year=graduation_year,
+            experience_max=experience_max,
+            graduation_year_from=graduation_year_from,
+            graduation_year_to=graduation_year_to
+        )
+        logger.debug("Candidates after filters: %s", total)
         
-        # Apply pagination
-        total = len(filtered)
-        paginated = filtered[skip:skip + limit]
+        next_cursor = encode_cursor(page[-1].id) if has_more else None
+        return total, page, next_cursor
         
-        # Format each candidate for response
-        formatted_candidates = []
-        for candidate in paginated:
-            candidate_copy = candidate.copy()
-            
-            # Parse skill_set if it's a string
-            if isinstance(candidate_copy['skill_set'], str):
-                candidate_copy['skill_set'] = json.loads(candidate_copy['skill_set'])
-            
-            # Parse date ONLY if it's a string
-            if isinstance(candidate_copy['dob'], str):
-                candidate_copy['dob'] = datetime.strptime(candidate_copy['dob'], '%Y-%m-%d').date()
-            # If it's already a date object, leave it as is
-            
-            formatted_candidates.append(candidate_copy)
-        
-        return total, formatted_candidates
-        
-    except Exception as e:
-        print(f"Error in get_candidates: {e}")
-        return 0, []
+    except Exception:
+        logger.exception("Error in get_candidates")
+        return 0, [], None
+
+def search_candidates(query: str, limit: int = 20) -> Tuple[int, List[Tuple[int, float, str]]]:
+    """Full-text search over resumes; returns (total matches, [(id, score, snippet)])"""
+    return app_state.search_resumes(query, limit)
 
-def update_candidate(candidate_id: int, candidate_update: schemas.CandidateUpdate) -> Optional[dict]:
+def match_candidates(request: schemas.MatchRequest) -> Tuple[int, List[Tuple[CandidateRecord, float]]]:
+    """Rank the pool against a match request; returns (eligible count, [(record, score)])"""
+    return app_state.match_candidates(
+        [(s.skill, s.weight) for s in request.required_skills],
+        [(s.skill, s.weight) for s in request.optional_skills],
+        experience_min=request.experience_min,
+        experience_max=request.experience_max,
+        graduation_year_from=request.graduation_year_from,
+        graduation_year_to=request.graduation_year_to,
+        limit=request.limit
+    )
+
+def get_stats(top_skills: int = 20) -> dict:
+    """Skill, experience, graduation and upload aggregates over all candidates"""
+    return app_state.candidate_stats(top_skills)
+
+def update_candidate(candidate_id: int, candidate_update: schemas.CandidateUpdate) -> Optional[CandidateRecord]:
     """Update a candidate"""
     existing = app_state.get_candidate(candidate_id)
     if not existing:
         return None
     
-    update_data = candidate_update.model_dump(exclude_unset=True)
-    
-    if "skill_set" in update_data and update_data["skill_set"] is not None:
-        update_data["skill_set"] = json.dumps(update_data["skill_set"])
-    
-    if "dob" in update_data and update_data["dob"] is not None:
-        update_data["dob"] = update_data["dob"].isoformat()
-    
-    updated = app_state.update_candidate(candidate_id, update_data)
-    
-    if updated:
-        if isinstance(updated['skill_set'], str):
-            updated['skill_set'] = json.loads(updated['skill_set'])
-        
-        if isinstance(updated['dob'], str):
-            updated['dob'] = datetime.strptime(updated['dob'], '%Y-%m-%d').date()
-    
-    return updated
+    update_data = candidate_update.model_dump(exclude_unset=True, exclude_none=True)
+    return app_state.update_candidate(candidate_id, update_data)
 
 def delete_candidate(candidate_id: int) -> bool:
     """Delete a candidate"""
-    return app_state.delete_candidate(candidate_id)
\ No newline at end of file
+    return app_state.delete_candidate(candidate_id)
+
+def get_changes(since: Optional[int], limit: int = 1000) -> Tuple[List[dict], int, bool]:
+    """Mutations after sequence ``since``; returns (changes, latest sequence, truncated)"""
+    return app_state.changes_since(since, limit)
+
+async def wait_for_changes(since: int, timeout: float) -> bool:
+    """Wait until a mutation newer than ``since`` exists; False on timeout.
+
+    In-process stores wake the caller on the next append. A shared store
+    lives in another process, so its sequence number is polled instead.
+    """
+    if SHARED_STORE_ADDRESS:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while await run_in_threadpool(app_state.change_sequence) <= since:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(CHANGE_POLL_INTERVAL, remaining))
+        return True
+    
+    event = app_state.changelog.subscribe()
+    try:
+        if app_state.change_sequence() > since:
+            return True
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        app_state.changelog.unsubscribe(event)
+
+def resumes_in_use(resume_paths: List[str]) -> Set[str]:
+    """The subset of ``resume_paths`` still referenced, in one store call"""
+    return app_state.resumes_in_use(resume_paths)
+
+def resume_paths() -> List[str]:
+    """Every resume blob path the store references"""
+    return app_state.resume_paths()
@@ -0,0 +1,376 @@
+# app/indexes.py
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w\w+")
+
+
+def normalize_skill(skill: str) -> str:
+    """Normalize a skill for case-insensitive matching"""
+    return skill.lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens of two or more characters"""
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class SkillIndex:
+    """Inverted index from normalized skill tokens to candidate ids.
+
+    A trigram index over the distinct tokens answers substring queries
+    without touching every candidate: the query's trigrams narrow the
+    vocabulary, and only the surviving tokens are checked with ``in``.
+    Queries shorter than a trigram fall back to scanning the vocabulary,
+    which is bounded by the number of distinct skills, not candidates.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def add(self, candidate_id: int, skills: Iterable[str]):
+        for token in {normalize_skill(s) for s in skills}:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                for gram in _trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            ids.add(candidate_id)
+
+    def remove(self, candidate_id: int, skills: Iterable[str]):
+        for token in {normalize_skill(s) for s in skills}:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(candidate_id)
+            if not ids:
+                del self._postings[token]
+                for gram in _trigrams(token):
+                    tokens = self._trigrams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[gram]
+
+    def clear(self):
+        self._postings.clear()
+        self._trigrams.clear()
+
+    def bulk_load(self, items: Iterable[Tuple[int, Iterable[str]]]):
+        """Rebuild from ``(candidate_id, skills)`` pairs in one pass"""
+        self.clear()
+        for candidate_id, skills in items:
+            for token in {normalize_skill(s) for s in skills}:
+                self._postings.setdefault(token, set()).add(candidate_id)
+        self._index_trigrams()
+
+    def restore(self, postings: Dict[str, np.ndarray]):
+        """Rebuild from each token's array of candidate ids, as saved in a snapshot"""
+        self.clear()
+        for token, ids in postings.items():
+            self._postings[token] = set(ids.tolist())
+        self._index_trigrams()
+
+    def _index_trigrams(self):
+        for token in self._postings:
+            for gram in _trigrams(token):
+                self._trigrams.setdefault(gram, set()).add(token)
+
+    def matching_tokens(self, query: str) -> Set[str]:
+        """Return the indexed tokens that contain ``query`` as a substring"""
+        query = normalize_skill(query)
+        if len(query) < 3:
+            return {token for token in self._postings if query in token}
+
+        candidates = None
+        for gram in sorted(_trigrams(query), key=lambda g: len(self._trigrams.get(g, ()))):
+            tokens = self._trigrams.get(gram)
+            if not tokens:
+                return set()
+            candidates = set(tokens) if candidates is None else candidates & tokens
+            if not candidates:
+                return set()
+        return {token for token in candidates if query in token}
+
+    def postings(self, query: str) -> Dict[str, Set[int]]:
+        """Live posting set of each token containing ``query``; their union is the match.
+
+        The sets are not copied: read them under the store's seqlock only.
+        """
+        return {token: self._postings[token] for token in self.matching_tokens(query)}
+
+    def holders(self, token: str) -> Set[int]:
+        """Live posting set of exactly the normalized skill ``token``"""
+        return self._postings.get(token, set())
+
+
+class RangeIndex:
+    """Bucketed secondary index over an orderable field.
+
+    Each distinct value owns a bucket of candidate ids, and the distinct
+    values are kept in a sorted list so ``>=``/``<=`` bounds resolve with a
+    bisect and equality is a single bucket lookup.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Hashable, Set[int]] = {}
+        self._keys: List = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, candidate_id: int, value):
+        if value is None:
+            return
+        ids = self._buckets.get(value)
+        if ids is None:
+            ids = self._buckets[value] = set()
+            insort(self._keys, value)
+        ids.add(candidate_id)
+
+    def remove(self, candidate_id: int, value):
+        ids = self._buckets.get(value)
+        if ids is None:
+            return
+        ids.discard(candidate_id)
+        if not ids:
+            del self._buckets[value]
+            del self._keys[bisect_left(self._keys, value)]
+
+    def clear(self):
+        self._buckets.clear()
+        self._keys.clear()
+
+    def bulk_load(self, items: Iterable[Tuple[int, Hashable]]):
+        """Rebuild from ``(candidate_id, value)`` pairs, sorting the keys once"""
+        self.clear()
+        for candidate_id, value in items:
+            if value is not None:
+                self._buckets.setdefault(value, set()).add(candidate_id)
+        self._keys.extend(sorted(self._buckets))
+
+    def bulk_load_arrays(self, ids: np.ndarray, values: np.ndarray):
+        """Rebuild from parallel id and value arrays, grouping the ids with one sort"""
+        self.clear()
+        order = np.argsort(values, kind="stable")
+        keys, starts = np.unique(values[order], return_index=True)
+        for key, group in zip(keys.tolist(), np.split(ids[order], starts[1:])):
+            self._buckets[key] = set(group.tolist())
+        self._keys.extend(keys.tolist())
+
+    def buckets(self, low=None, high=None) -> List[Set[int]]:
+        """Live buckets of the values in the inclusive ``[low, high]`` range, uncopied"""
+        start = 0 if low is None else bisect_left(self._keys, low)
+        stop = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return [self._buckets[key] for key in self._keys[start:stop]]
+
+
+class TextIndex:
+    """Inverted index over free text, ranked with Okapi BM25.
+
+    Each term's postings are one append-only ``array`` of ``(doc_id, tf,
+    generation)`` triples. Removing a document bumps its generation, which
+    retires its entries under every term at once; a term's array is
+    compacted when it doubles in size. Search copies the query terms'
+    arrays into numpy and scores every posting in a few vectorized passes.
+
+    ``capture`` freezes a view for snapshots: the generations and lengths
+    are copied, and compaction pauses so the captured entries stay put.
+    """
+
+    # Postings per term below which compaction is not worth a scan
+    COMPACT_MIN = 64
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _reserve(self, doc_id: int):
+        capacity = len(self._lengths)
+        if doc_id < capacity:
+            return
+        while capacity <= doc_id:
+            capacity *= 2
+        generations = np.zeros(capacity, dtype=np.intc)
+        generations[:len(self._generations)] = self._generations
+        lengths = np.full(capacity, -1, dtype=np.intc)
+        lengths[:len(self._lengths)] = self._lengths
+        self._generations, self._lengths = generations, lengths
+
+    def add(self, doc_id: int, text: str):
+        """Index ``text`` as ``doc_id``, replacing any earlier version"""
+        self.remove(doc_id)
+        self._reserve(doc_id)
+        generation = int(self._generations[doc_id])
+        frequencies = Counter(tokenize(text))
+        postings = self._postings
+        for term, tf in frequencies.items():
+            entries = postings.get(term)
+            if entries is None:
+                entries = postings[term] = array("i")
+            entries.extend((doc_id, tf, generation))
+            size = len(entries) // 3
+            if not size & (size - 1) and size >= self.COMPACT_MIN:
+                self._compact(term, entries)
+        length = sum(frequencies.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+        self._count += 1
+
+    def remove(self, doc_id: int):
+        if doc_id >= len(self._lengths) or self._lengths[doc_id] < 0:
+            return
+        self._total_length -= int(self._lengths[doc_id])
+        self._lengths[doc_id] = -1
+        self._generations[doc_id] += 1
+        self._count -= 1
+
+    def clear(self):
+        # New containers rather than clearing in place, so a reader that
+        # already holds the old ones sees a consistent index
+        self._postings: Dict[str, array] = {}
+        self._generations = np.zeros(1024, dtype=np.intc)
+        self._lengths = np.full(1024, -1, dtype=np.intc)
+        self._count = 0
+        self._total_length = 0
+        self._frozen = False
+
+    def capture(self) -> Callable[[], dict]:
+        """Freeze the index as it is now; call with writers excluded.
+
+        Returns a function that exports the frozen view as arrays (it may
+        run on another thread while writers carry on) and then lets
+        compaction resume.
+        """
+        postings, terms = self._postings, list(self._postings)
+        generations, lengths = self._generations.copy(), self._lengths.copy()
+        self._frozen = True
+
+        def export() -> dict:
+            try:
+                kept, parts, offsets = [], [], [0]
+                for term in terms:
+                    rows = np.frombuffer(postings[term][:], dtype=np.intc).reshape(-1, 3)
+                    # Entries added since, including new versions of captured documents, are dropped
+                    rows = rows[rows[:, 0] < len(lengths)]
+                    ids = rows[:, 0]
+                    rows = rows[(lengths[ids] >= 0) & (generations[ids] == rows[:, 2])]
+                    if len(rows):
+                        kept.append(term)
+                        parts.append(rows[:, :2])
+                        offsets.append(offsets[-1] + len(rows))
+                pairs = np.concatenate(parts) if parts else np.empty((0, 2), dtype=np.intc)
+                return {"terms": kept, "offsets": np.array(offsets, dtype=np.int64), "postings": pairs,
+                        "lengths": lengths}
+            finally:
+                self._frozen = False
+
+        return export
+
+    def restore(self, data: dict):
+        """Rebuild from an export made by ``capture``, as saved in a snapshot"""
+        self.clear()
+        lengths = data["lengths"]
+        self._reserve(len(lengths) - 1)
+        self._lengths[:len(lengths)] = lengths
+        live = lengths[lengths >= 0]
+        self._count = len(live)
+        self._total_length = int(live.sum())
+        triples = np.zeros((len(data["postings"]), 3), dtype=np.intc)
+        triples[:, :2] = data["postings"]
+        offsets = data["offsets"].tolist()
+        for term, start, end in zip(data["terms"], offsets, offsets[1:]):
+            self._postings[term] = array("i", triples[start:end].tobytes())
+
+    def _live(self, entries: array) -> np.ndarray:
+        """The current ``(doc_id, tf, generation)`` rows of a term's postings"""
+        # Slicing copies, so a writer appending meanwhile cannot resize the buffer under numpy
+        rows = np.frombuffer(entries[:], dtype=np.intc).reshape(-1, 3)
+        return rows[self._generations[rows[:, 0]] == rows[:, 2]]
+
+    def _compact(self, term: str, entries: array):
+        if self._frozen:
+            return
+        live = self._live(entries)
+        if not len(live):
+            del self._postings[term]
+        elif len(live) * 2 <= len(entries) // 3:
+            self._postings[term] = array("i", live.tobytes())
+
+    def search(self, query: str, limit: int = 20) -> Tuple[int, List[Tuple[int, float]]]:
+        """Return the number of matching documents and the top ``limit`` ``(doc_id, score)``"""
+        n = self._count
+        if not n:
+            return 0, []
+        average_length = self._total_length / n
+        matched, scores = [], []
+        for term in set(tokenize(query)):
+            entries = self._postings.get(term)
+            if entries is None:
+                continue
+            live = self._live(entries)
+            if not len(live):
+                continue
+            ids, tf = live[:, 0], live[:, 1].astype(np.float64)
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[ids] / average_length)
+            matched.append(ids)
+            scores.append(idf * tf * (self.k1 + 1) / (tf + norm))
+        if not matched:
+            return 0, []
+        if len(matched) == 1:
+            ids, totals = matched[0], scores[0]
+        else:
+            totals = np.bincount(np.concatenate(matched), weights=np.concatenate(scores))
+            ids = np.flatnonzero(totals)
+            totals = totals[ids]
+        k = min(limit, len(ids))
+        if not k:
+            return len(ids), []
+        # Highest score first, ties by id: everything above the k-th best score
+        # makes the cut, and the lowest ids fill the rest from the ties with it
+        cutoff = -np.partition(-totals, k - 1)[k - 1]
+        above = np.flatnonzero(totals > cutoff)
+        tied = np.flatnonzero(totals == cutoff)
+        needed = k - len(above)
+        if needed < len(tied):
+            tied = tied[np.argpartition(ids[tied], needed - 1)[:needed]]
+        top = np.concatenate((above, tied))
+        top = top[np.lexsort((ids[top], -totals[top]))]
+        return len(ids), [(int(ids[i]), float(totals[i])) for i in top]
+
+
+def make_snippet(text: str, query: str, width: int = 160) -> str:
+    """Return a window of ``text`` around the first query term it contains"""
+    terms = set(tokenize(query))
+    start = 0
+    for match in _WORD.finditer(text):
+        if match.group(0).lower() in terms:
+            start = max(0, match.start() - width // 3)
+            break
+    snippet = " ".join(text[start:start + width].split())
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + width < len(text) else ""
+    return f"{prefix}{snippet}{suffix}"
+
+
+def union_size(sets: Iterable[Set[int]]) -> int:
+    """Upper bound on the size of the union of ``sets``, without building it"""
+    return sum(len(ids) for ids in sets)
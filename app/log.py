@@ -0,0 +1,154 @@
+# app/log.py
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# LOG_LEVEL: DEBUG/INFO/WARNING/ERROR, or OFF to disable the package's logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# LOG_SAMPLE_RATES: "GET /api/candidates/=0.01,POST /api/candidates/=1"; unlisted endpoints log everything
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request id and extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the current request id on records before they leave the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records tagged with a sampled ``endpoint``; warnings always pass"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "endpoint", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        endpoint, _, rate = item.rpartition("=")
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(level: str = LOG_LEVEL, sample_rates: str = LOG_SAMPLE_RATES):
+    """Route the ``app`` loggers through a queue to a background JSON writer.
+
+    Callers only enqueue the record, so a slow stdout never blocks a
+    request. With ``level="OFF"`` the loggers are disabled and each call
+    returns after a single level check.
+    """
+    global _listener
+    logger = logging.getLogger("app")
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    if level == "OFF":
+        logger.setLevel(logging.CRITICAL + 1)
+        return
+    logger.setLevel(level)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+    queue_handler.addFilter(RequestContextFilter())
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    logger.addHandler(queue_handler)
+
+
+def shutdown_logging():
+    """Drain queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestLoggingMiddleware:
+    """ASGI middleware: assigns a request id and logs method, route, status and timing"""
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                route = scope.get("route")
+                path = getattr(route, "path", scope["path"])
+                self.logger.info("request", extra={
+                    "endpoint": f"{scope['method']} {path}",
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                })
+            request_id_var.reset(token)
@@ -1,17 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 import os
 
+from app import processing
+from app.cache import query_cache
+from app.log import RequestLoggingMiddleware, setup_logging, shutdown_logging
+from app.metrics import MetricsMiddleware, registry
 from app.routers import candidates
+from app.state import SHARED_STORE_ADDRESS, app_state
+from app.utils import file_cleanup
+from app.utils.file_handler import UploadLimitMiddleware
+
+# Directory for the candidate journal; unset keeps storage purely in memory
+DATA_DIR = os.getenv("RESUME_DATA_DIR")
+
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # With a shared store, its own process owns persistence
+    if DATA_DIR and not SHARED_STORE_ADDRESS:
+        app_state.enable_persistence(DATA_DIR)
+    # Loaded resumes without a processing result are queued by one worker only
+    if app_state.claim_reprocess():
+        processing.start_reprocess()
+    file_cleanup.orphan_sweeper.start()
+    yield
+    file_cleanup.orphan_sweeper.stop()
+    file_cleanup.deletion_queue.stop()
+    processing.shutdown()
+    if not SHARED_STORE_ADDRESS:
+        app_state.close()
+    shutdown_logging()
 
 # The FastAPI instance MUST be named 'app' (this is required)
 app = FastAPI(
     title="Resume Management API",
     description="API for managing candidate resumes (In-Memory Storage)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Innermost, so an oversized upload's 413 still gets CORS headers and metrics
+app.add_middleware(UploadLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -20,14 +54,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+# Outermost, so the request id is set for everything below and timings include CORS
+app.add_middleware(RequestLoggingMiddleware)
 
 # Include routers
 app.include_router(candidates.router)
 
-# Mount uploads directory
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
 @app.get("/")
 def root():
     return {
@@ -36,14 +69,47 @@ def root():
         "storage": "In-Memory (No Database)",
         "endpoints": {
             "POST /api/candidates": "Upload new candidate with resume",
+            "POST /api/candidates/bulk": "Bulk import candidates from NDJSON/CSV plus a resume archive",
             "GET /api/candidates": "List candidates with filters",
+            "GET /api/candidates/batch?ids=": "Fetch many candidates at once (also POST)",
+            "GET /api/candidates/changes?since=": "Long-poll for changes after a sequence number",
+            "GET /api/candidates/changes/stream": "Server-Sent Events change feed",
+            "POST /api/candidates/match": "Rank candidates against weighted skills",
+            "GET /api/candidates/stats": "Aggregate statistics over all candidates",
+            "GET /api/candidates/search?q=": "Full-text search over resumes",
             "GET /api/candidates/{id}": "Get candidate by ID",
+            "GET /api/candidates/{id}/resume": "Download a candidate's resume (Range and ETag aware)",
             "PUT /api/candidates/{id}": "Update candidate",
             "DELETE /api/candidates/{id}": "Delete candidate",
-            "GET /health": "Health check"
+            "GET /health": "Health check",
+            "GET /metrics": "Prometheus metrics"
         }
     }
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy", "query_cache": query_cache.stats()}
+
+@registry.collector
+def store_metrics():
+    """Store and cache gauges, read once per scrape"""
+    store = app_state.store_metrics()
+    yield "resume_store_candidates", "gauge", "Candidates in the store", (), store["candidates"]
+    yield "resume_store_blobs", "gauge", "Distinct resume blobs referenced", (), store["resume_blobs"]
+    yield "resume_store_indexed_texts", "gauge", "Resumes with extracted text", (), store["indexed_resume_texts"]
+    for index, size in store["index_entries"].items():
+        yield "resume_index_entries", "gauge", "Distinct keys per secondary index", (("index", index),), size
+    for plan, count in store["query_plans"].items():
+        yield "resume_queries_total", "counter", "List queries by plan (index lookup or full scan)", (("plan", plan),), count
+    yield "idempotency_keys", "gauge", "Idempotency-Key responses and claims remembered", (), store["idempotency_keys"]
+    yield "resume_blob_deletions_pending", "gauge", "Blob deletions queued or awaiting retry", (), file_cleanup.deletion_queue.pending()
+    yield "resume_processing_queue_depth", "gauge", "Resumes waiting for post-processing", (), processing.pipeline.depth()
+    yield "resume_processing_in_flight", "gauge", "Resumes being post-processed", (), processing.pipeline.in_flight
+    cache = query_cache.stats()
+    yield "query_cache_entries", "gauge", "Cached list pages", (), cache["entries"]
+    for result in ("hits", "misses", "not_modified"):
+        yield "query_cache_lookups_total", "counter", "List cache lookups by result", (("result", result),), cache[result]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,216 @@
+# app/metrics.py
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, shared by every histogram
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Requests slower than this many milliseconds are logged with per-phase timings; unset disables profiling
+PROFILE_SLOW_MS = os.getenv("PROFILE_SLOW_MS")
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> (per-bucket counts with a trailing +Inf slot, sum, count)
+        self._values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][slot] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        out = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append((f"{self.name}_bucket", key + (("le", le),), cumulative))
+            out.append((f"{self.name}_sum", key, total))
+            out.append((f"{self.name}_count", key, count))
+        return out
+
+
+class Registry:
+    """Collects metrics plus gauge callbacks and renders the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Labels, float]]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, Labels, float]]]):
+        """Register ``fn`` returning (name, type, help, labels, value) rows read at scrape time"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for collect in self._collectors:
+            seen = set()
+            for name, kind, help, labels, value in collect():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by method, route and status")
+http_request_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency by method and route")
+upload_bytes = registry.counter("resume_upload_bytes_total", "Resume bytes written to blob storage")
+file_operation_duration = registry.histogram("file_operation_duration_seconds", "File handler latency by operation")
+file_deletions = registry.counter("resume_blob_deletions_total", "Queued blob deletions by outcome")
+orphan_files_swept = registry.counter("resume_orphan_files_total", "Unreferenced upload files found by the sweeper")
+compression_bytes = registry.counter("resume_compression_bytes_total", "Bytes of compressed blobs before (original) and after (stored) compression")
+compression_cpu = registry.counter("resume_compression_cpu_seconds_total", "Thread CPU time spent compressing and decompressing blobs")
+compression_skipped = registry.counter("resume_compression_skipped_total", "Uploads stored uncompressed while compression is on, by reason")
+processing_queue_wait = registry.histogram("resume_processing_queue_wait_seconds", "Time resumes wait for a post-processing worker")
+processing_stage_duration = registry.histogram("resume_processing_stage_duration_seconds", "Post-processing stage latency per attempt")
+processing_stage_results = registry.counter("resume_processing_stage_attempts_total", "Post-processing stage attempts by outcome")
+idempotency_requests = registry.counter("idempotency_key_requests_total", "Create requests carrying an Idempotency-Key, by outcome")
+duplicate_submissions = registry.counter("resume_duplicate_submissions_total", "Creates answered with an already stored candidate, by identity dedupe mode")
+
+
+# ---------- slow-request profiling ----------
+
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("profile_phases", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Time a request phase (parse, store, filter, serialize) when profiling is on"""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template.
+
+    With ``PROFILE_SLOW_MS`` set it also collects :func:`phase` timings for
+    every request and logs those slower than the threshold.
+    """
+
+    def __init__(self, app, slow_ms: Optional[str] = PROFILE_SLOW_MS):
+        self.app = app
+        self.slow_ms = float(slow_ms) if slow_ms else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        token = _phases.set({}) if self.slow_ms is not None else None
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", None)
+            # Unmatched paths share one label so scanners cannot grow the label set
+            route = route or "unmatched"
+            http_requests.inc(method=scope["method"], route=route, status=str(status))
+            http_request_duration.observe(elapsed, method=scope["method"], route=route)
+            if token is not None:
+                phases = _phases.get()
+                _phases.reset(token)
+                if elapsed * 1000 >= self.slow_ms:
+                    logger.warning("slow request", extra={
+                        "endpoint": f"{scope['method']} {route}",
+                        "status": status,
+                        "duration_ms": round(elapsed * 1000, 3),
+                        "phases_ms": {name: round(ms, 3) for name, ms in phases.items()},
+                    })
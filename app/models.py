@@ -0,0 +1,46 @@
+# app/models.py
+import sys
+import unicodedata
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime
+from typing import Iterable, Optional, Tuple
+
+
+def intern_skills(skills: Iterable[str]) -> Tuple[str, ...]:
+    """Freeze a skill list into a tuple of interned strings"""
+    return tuple(sys.intern(s) for s in skills)
+
+
+def identity_key(full_name: str, dob: date, contact_number: str) -> str:
+    """Normalized identity of a person: case- and spacing-insensitive name, birth date, phone digits"""
+    name = " ".join(unicodedata.normalize("NFKC", full_name).casefold().split())
+    digits = "".join(ch for ch in contact_number if ch.isdigit())
+    return f"{name}|{dob.isoformat()}|{digits}"
+
+
+@dataclass(slots=True)
+class CandidateRecord:
+    """Stored candidate, kept in native types so reads never re-parse"""
+    id: int
+    full_name: str
+    dob: date
+    contact_number: str
+    contact_address: str
+    education_qualification: str
+    graduation_year: int
+    years_of_experience: int
+    skill_set: Tuple[str, ...]
+    resume_path: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    # Rendered response JSON, filled lazily and dropped on every change
+    json_bytes: Optional[bytes] = field(default=None, repr=False, compare=False)
+    # Post-processing outcome (see app.processing); journaled as its own entry, not in the row
+    processing: Optional[dict] = field(default=None, compare=False)
+
+    def __post_init__(self):
+        self.skill_set = intern_skills(self.skill_set)
+
+    def updated(self, update_data: dict) -> "CandidateRecord":
+        """Return a copy with the given fields replaced, leaving this record untouched"""
+        return replace(self, **update_data, json_bytes=None)
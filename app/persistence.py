@@ -0,0 +1,248 @@
+# app/persistence.py
+import logging
+import os
+import pickle
+import re
+import struct
+import threading
+from dataclasses import fields
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.models import CandidateRecord
+
+FSYNC_INTERVAL = 0.05  # seconds between group commits
+SNAPSHOT_EVERY = 100_000  # log entries between automatic snapshots
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = tuple(f.name for f in fields(CandidateRecord) if f.name not in ('json_bytes', 'processing'))
+_LENGTH = struct.Struct("<I")
+_SEGMENT_RE = re.compile(r"^(wal|snapshot)-(\d{8})\.(log|bin)$")
+
+
+def record_to_row(candidate: CandidateRecord) -> tuple:
+    return tuple(getattr(candidate, name) for name in _FIELDS)
+
+
+def row_to_record(row: tuple) -> CandidateRecord:
+    return CandidateRecord(*row)
+
+
+class Loaded(NamedTuple):
+    """What ``Journal.load`` recovered"""
+    id_counter: int
+    records: Dict[int, CandidateRecord]
+    # Compressed resume text per candidate id
+    texts: Dict[int, bytes]
+    # Index data saved with the snapshot; None without one, or once the log tail cleared the store
+    indexes: Optional[dict]
+    # Snapshot version (None if absent) of each record the log tail changed, which the indexes predate
+    before: Dict[int, Optional[CandidateRecord]]
+
+
+class Journal:
+    """Write-ahead log of candidate mutations plus periodic snapshots.
+
+    ``snapshot-<n>.bin`` holds the whole store as of the start of
+    ``wal-<n>.log``, with its index data so a restart need not rebuild
+    the indexes; that segment and any later ones hold the mutations since.
+    Post-processing results (status plus compressed resume text) are
+    journaled too, so a restart only reprocesses resumes without one.
+    Appends go to a buffered file and a background thread flushes and
+    fsyncs every FSYNC_INTERVAL, so concurrent writers share one fsync
+    and at most that window of writes is lost on a crash.
+    """
+
+    def __init__(self, directory: str, fsync_interval: float = FSYNC_INTERVAL,
+                 snapshot_every: int = SNAPSHOT_EVERY):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment = 0
+        self._entries = 0
+        self._dirty = False
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._snapshotter: Optional[threading.Thread] = None
+
+    def _path(self, kind: str, segment: int) -> str:
+        ext = "log" if kind == "wal" else "bin"
+        return os.path.join(self.directory, f"{kind}-{segment:08d}.{ext}")
+
+    def _segments(self, kind: str) -> List[int]:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match and match.group(1) == kind:
+                found.append(int(match.group(2)))
+        return sorted(found)
+
+    def load(self) -> Loaded:
+        """Load the latest snapshot, replay the log tail and open the log for appends"""
+        id_counter, records, texts, indexes, before = 0, {}, {}, None, {}
+        snapshots = self._segments("snapshot")
+        base = snapshots[-1] if snapshots else 0
+        if snapshots:
+            with open(self._path("snapshot", base), "rb") as f:
+                snapshot = pickle.load(f)
+            if isinstance(snapshot, dict):
+                id_counter, rows, processed = snapshot["id_counter"], snapshot["rows"], snapshot["processed"]
+                indexes = snapshot.get("indexes")
+            else:
+                # Older snapshots are tuples without index data, and the oldest lack processing results
+                id_counter, rows = snapshot[:2]
+                processed = snapshot[2] if len(snapshot) > 2 else {}
+            records = {row[0]: row_to_record(row) for row in rows}
+            for candidate_id, (processing, text) in processed.items():
+                candidate = records.get(candidate_id)
+                if candidate is not None:
+                    candidate.processing = processing
+                    if text is not None:
+                        texts[candidate_id] = text
+
+        segments = [s for s in self._segments("wal") if s >= base] or [base]
+        for segment in segments:
+            path = self._path("wal", segment)
+            valid_length = 0
+            for (op, payload), valid_length in self._read_segment(path):
+                self._entries += 1
+                if op == "add":
+                    candidate = row_to_record(payload)
+                    before.setdefault(candidate.id, records.get(candidate.id))
+                    records[candidate.id] = candidate
+                    id_counter = max(id_counter, candidate.id)
+                elif op == "update":
+                    candidate = records.get(payload[0])
+                    if candidate is not None:
+                        before.setdefault(candidate.id, candidate)
+                        records[candidate.id] = candidate.updated(payload[1])
+                elif op == "processing":
+                    candidate_id, resume_path, processing, text = payload
+                    before.setdefault(candidate_id, records.get(candidate_id))
+                    candidate = records.get(candidate_id)
+                    if candidate is not None and candidate.resume_path == resume_path:
+                        candidate.processing = processing
+                        if text is not None:
+                            texts[candidate_id] = text
+                elif op == "delete":
+                    before.setdefault(payload, records.get(payload))
+                    records.pop(payload, None)
+                    texts.pop(payload, None)
+                elif op == "clear":
+                    records.clear()
+                    texts.clear()
+                    id_counter = 0
+                    # Everything is rebuilt from the records that follow
+                    indexes = None
+                    before.clear()
+
+        # Drop a torn final entry before appending after it
+        self._segment = segments[-1]
+        path = self._path("wal", self._segment)
+        if os.path.exists(path) and os.path.getsize(path) != valid_length:
+            os.truncate(path, valid_length)
+        self._file = open(path, "ab")
+        return Loaded(id_counter, records, texts, indexes, before)
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterator[Tuple[tuple, int]]:
+        """Yield each complete entry with the file offset just past it"""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            end = offset + _LENGTH.size + length
+            if end > len(data):
+                break
+            try:
+                entry = pickle.loads(data[offset + _LENGTH.size:end])
+            except Exception:
+                break
+            offset = end
+            yield entry, offset
+
+    def start(self):
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flush", daemon=True)
+        self._flusher.start()
+
+    def append(self, op: str, payload):
+        entry = pickle.dumps((op, payload), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._file.write(_LENGTH.pack(len(entry)))
+            self._file.write(entry)
+            self._dirty = True
+            self._entries += 1
+
+    def needs_snapshot(self) -> bool:
+        return self._entries >= self.snapshot_every and self._snapshotter is None
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        with self._lock:
+            if self._dirty:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def snapshot(self, build: Callable[[], dict]):
+        """Start a new log segment and write ``build()`` as its snapshot in the background.
+
+        ``build`` runs on the snapshot thread and returns the store as of
+        every entry appended so far: ``id_counter``, ``rows``, ``processed``
+        (candidate id -> (processing status, compressed text)) and
+        optionally ``indexes``. Older segments and snapshots are deleted
+        once the new snapshot is durable.
+        """
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self._file.close()
+            self._segment += 1
+            segment = self._segment
+            self._file = open(self._path("wal", segment), "ab")
+            self._entries = 0
+        self._snapshotter = threading.Thread(
+            target=self._write_snapshot, args=(segment, build), name="journal-snapshot", daemon=True
+        )
+        self._snapshotter.start()
+
+    def _write_snapshot(self, segment: int, build: Callable[[], dict]):
+        path = self._path("snapshot", segment)
+        temp_path = f"{path}.tmp"
+        try:
+            payload = build()
+            with open(temp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+            for kind in ("snapshot", "wal"):
+                for older in self._segments(kind):
+                    if older < segment:
+                        os.remove(self._path(kind, older))
+        except Exception:
+            # The log segments are kept, so nothing is lost but the compaction
+            logger.exception("Error writing snapshot")
+        finally:
+            self._snapshotter = None
+
+    def close(self):
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        snapshotter = self._snapshotter
+        if snapshotter is not None:
+            snapshotter.join()
+        self.sync()
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,236 @@
+# app/processing.py
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Set, Tuple
+
+from app.log import request_id_var
+from app.metrics import processing_queue_wait, processing_stage_duration, processing_stage_results
+from app.state import app_state
+from app.utils.postprocess import ResumeRejected, extract_text_stage, page_count_stage, virus_scan_stage
+
+PROCESSING_WORKERS = int(os.getenv("RESUME_PROCESSING_WORKERS", "2"))  # processes running stages
+PROCESSING_CONCURRENCY = int(os.getenv("RESUME_PROCESSING_CONCURRENCY", "4"))  # resumes in flight
+STAGE_TIMEOUT = float(os.getenv("RESUME_STAGE_TIMEOUT", "30"))  # seconds per stage attempt
+STAGE_RETRIES = int(os.getenv("RESUME_STAGE_RETRIES", "2"))  # extra attempts after a failure or timeout
+STAGE_RETRY_DELAY = 0.5  # seconds before the first retry, doubled per attempt
+REPROCESS_BATCH = 1000  # candidates checked for a missing result at a time after a load
+
+logger = logging.getLogger(__name__)
+
+# Status of every freshly created candidate; shared, so never mutate it
+PENDING = {"status": "pending"}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One post-processing step.
+
+    ``run`` takes the resume path and returns a dict of status fields. It
+    runs in the process pool, so it must be a module-level function and
+    its result must pickle. A ``required`` stage that fails stops the
+    pipeline for that resume.
+    """
+    name: str
+    run: Callable[[str], dict]
+    timeout: float = STAGE_TIMEOUT
+    retries: int = STAGE_RETRIES
+    required: bool = False
+
+
+class Pipeline:
+    """Asyncio job queue feeding a process pool with each resume's stages.
+
+    Uploads only enqueue ``(candidate_id, resume_path)``. ``concurrency``
+    worker tasks take jobs off the queue and run the stages in order, each
+    under its own timeout with retries, then write the outcome (and the
+    extracted text) to the record in one store call. A timed-out attempt
+    keeps its worker process busy until it returns; the timeout bounds how
+    long a candidate waits, not the CPU spent.
+    """
+
+    def __init__(self, stages: List[Stage], workers: int = PROCESSING_WORKERS,
+                 concurrency: int = PROCESSING_CONCURRENCY):
+        self.stages = list(stages)
+        self.workers = workers
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def register(self, stage: Stage):
+        """Append a stage; it runs for resumes submitted from now on"""
+        self.stages = [*self.stages, stage]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or the app was restarted on a new loop: start fresh workers there
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            for _ in range(self.concurrency):
+                self._spawn(self._work(self._queue))
+        return self._queue
+
+    def _spawn(self, coro):
+        # A fresh context, so workers do not inherit the request that happened to start them
+        task = asyncio.create_task(coro, context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def submit(self, candidate_id: int, resume_path: str):
+        """Queue a resume for processing without delaying the caller"""
+        job = (candidate_id, resume_path, request_id_var.get(), time.monotonic())
+        self._ensure_started().put_nowait(job)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _work(self, queue: asyncio.Queue):
+        while True:
+            candidate_id, resume_path, request_id, queued_at = await queue.get()
+            processing_queue_wait.observe(time.monotonic() - queued_at)
+            self.in_flight += 1
+            # Log lines carry the id of the upload request that queued the job
+            token = request_id_var.set(request_id)
+            try:
+                await self.process(candidate_id, resume_path)
+            except Exception:
+                logger.exception("Error processing resume for candidate %s", candidate_id)
+            finally:
+                request_id_var.reset(token)
+                self.in_flight -= 1
+                queue.task_done()
+
+    async def process(self, candidate_id: int, resume_path: str):
+        """Run every stage for one resume and store the outcome on the candidate"""
+        status = {"status": "done", "stages": {}}
+        text = None
+        for stage in self.stages:
+            try:
+                outcome, fields = await self._run_stage(stage, resume_path)
+            except ResumeRejected as e:
+                status["stages"][stage.name] = {"status": "rejected", "attempts": 1}
+                status.update(status="rejected", reason=str(e))
+                logger.warning("Resume for candidate %s rejected by %s: %s", candidate_id, stage.name, e)
+                break
+            status["stages"][stage.name] = outcome
+            if fields is None:
+                status["status"] = "failed"
+                if stage.required:
+                    break
+                continue
+            text = fields.pop("text", text)
+            status.update(fields)
+        status["finished_at"] = datetime.now()
+        # A shared store answers over a socket, so keep the call off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, app_state.set_processing, candidate_id, resume_path, status, text
+        )
+
+    async def _run_stage(self, stage: Stage, resume_path: str) -> Tuple[dict, Optional[dict]]:
+        """Run one stage with retries; returns (outcome, status fields or None if it failed)"""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            error = None
+            try:
+                fields = await asyncio.wait_for(
+                    loop.run_in_executor(self._get_pool(), stage.run, resume_path), stage.timeout
+                )
+                result = "ok"
+            except ResumeRejected:
+                processing_stage_duration.observe(time.perf_counter() - started, stage=stage.name)
+                processing_stage_results.inc(stage=stage.name, result="rejected")
+                raise
+            except asyncio.TimeoutError:
+                result, error = "timeout", f"timed out after {stage.timeout:g}s"
+            except BrokenProcessPool:
+                # A worker process died (e.g. the OOM killer); later attempts get a fresh pool
+                self._reset_pool()
+                result, error = "failed", "worker process died"
+            except Exception as e:
+                result, error = "failed", str(e) or type(e).__name__
+            elapsed = time.perf_counter() - started
+            processing_stage_duration.observe(elapsed, stage=stage.name)
+            processing_stage_results.inc(stage=stage.name, result=result)
+            if result == "ok":
+                return {"status": "ok", "attempts": attempt, "duration_ms": round(elapsed * 1000, 3)}, fields
+            if attempt > stage.retries:
+                logger.warning("Stage %s failed for %s after %s attempts: %s", stage.name, resume_path, attempt, error)
+                return {"status": result, "attempts": attempt, "error": error}, None
+            await asyncio.sleep(STAGE_RETRY_DELAY * 2 ** (attempt - 1))
+
+    async def reprocess_all(self):
+        """Run the pipeline for stored resumes without a result, e.g. after loading the store from disk.
+
+        Results are journaled, so this only picks up resumes that were
+        still queued or in flight when the store was last written.
+        """
+        queue = self._ensure_started()
+        loop = asyncio.get_running_loop()
+        after_id = 0
+        queued = 0
+        while after_id is not None:
+            # A shared store answers over a socket, so keep the call off the event loop
+            rows, after_id = await loop.run_in_executor(None, app_state.unprocessed_resumes, after_id, REPROCESS_BATCH)
+            for candidate_id, resume_path in rows:
+                self.submit(candidate_id, resume_path)
+            queued += len(rows)
+            # One batch at a time, so a large backlog never sits in the queue at once
+            await queue.join()
+        logger.info("Reprocessed %s resumes without a stored result", queued)
+
+    def start_reprocess(self):
+        self._spawn(self.reprocess_all())
+
+    def shutdown(self):
+        """Cancel queued work and stop the worker processes"""
+        for task in list(self._tasks):
+            task.cancel()
+        self._loop = None
+        self._queue = None
+        self._reset_pool()
+
+
+pipeline = Pipeline([
+    Stage("virus_scan", virus_scan_stage, required=True),
+    Stage("extract_text", extract_text_stage),
+    Stage("page_count", page_count_stage),
+])
+
+
+def submit(candidate_id: int, resume_path: str):
+    pipeline.submit(candidate_id, resume_path)
+
+
+def register_stage(stage: Stage):
+    pipeline.register(stage)
+
+
+def start_reprocess():
+    pipeline.start_reprocess()
+
+
+def shutdown():
+    pipeline.shutdown()
@@ -1,16 +1,34 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Header, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import List, Optional
+import asyncio
 import json
+import logging
+import mimetypes
+import tarfile
+import zipfile
 from datetime import datetime
 
 # IMPORTANT: These imports must be correct
-from app import crud, schemas
-from app.utils import file_handler
+from app import crud, processing, schemas
+from app.metrics import duplicate_submissions, idempotency_requests, phase
+from app.cache import etag_matches, query_cache
+from app.state import IDENTITY_DEDUPE
+from app.utils import blob_codec, bulk_import, file_cleanup, file_handler
 
 router = APIRouter(prefix="/api/candidates", tags=["candidates"])
 
+logger = logging.getLogger(__name__)
+
+# Resumes are personal data: only the client may cache them, revalidating by ETag after this
+RESUME_CACHE_CONTROL = "private, max-age=300"
+CHANGE_STREAM_BATCH = 500  # changes per SSE chunk
+CHANGE_STREAM_HEARTBEAT = 15.0  # seconds of silence before a keep-alive comment
+IDEMPOTENCY_KEY_MAX_LENGTH = 255  # characters accepted in an Idempotency-Key header
+
 # ========== POST ENDPOINT ==========
-@router.post("/", response_model=schemas.CandidateResponse, status_code=201)
+@router.post("/", response_model=schemas.CandidateResponse, status_code=201,
+             responses={200: {"model": schemas.CandidateResponse, "description": "Person already stored"}})
 async def create_candidate(
     full_name: str = Form(...),
     dob: str = Form(...),
@@ -20,65 +38,180 @@ async def create_candidate(
     graduation_year: int = Form(...),
     years_of_experience: int = Form(...),
     skill_set: str = Form(...),
-    resume: UploadFile = File(...)
+    resume: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)
 ):
-    """Upload a new candidate with resume"""
+    """Upload a new candidate with resume.
+
+    Retries sent with the same ``Idempotency-Key`` get the first response
+    back instead of creating the candidate again. With identity dedupe on,
+    a person already stored is answered with 200 and the existing record.
+    """
+    claimed = False
     try:
-        # Parse skill_set from JSON string
-        skills = json.loads(skill_set)
-        if not isinstance(skills, list):
-            raise ValueError("skill_set must be a JSON array")
+        with phase("parse"):
+            # Parse skill_set from JSON string
+            skills = json.loads(skill_set)
+            if not isinstance(skills, list):
+                raise ValueError("skill_set must be a JSON array")
+            
+            # Parse date
+            try:
+                dob_date = datetime.strptime(dob, "%Y-%m-%d").date()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+            
+            candidate_data = schemas.CandidateCreate(
+                full_name=full_name,
+                dob=dob_date,
+                contact_number=contact_number,
+                contact_address=contact_address,
+                education_qualification=education_qualification,
+                graduation_year=graduation_year,
+                years_of_experience=years_of_experience,
+                skill_set=skills
+            )
         
-        # Parse date
-        try:
-            dob_date = datetime.strptime(dob, "%Y-%m-%d").date()
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # Save resume file
-        resume_path = await file_handler.save_resume_file(resume, full_name)
-        
-        # Create candidate in memory
-        candidate_data = schemas.CandidateCreate(
-            full_name=full_name,
-            dob=dob_date,
-            contact_number=contact_number,
-            contact_address=contact_address,
-            education_qualification=education_qualification,
-            graduation_year=graduation_year,
-            years_of_experience=years_of_experience,
-            skill_set=skills
-        )
+        if idempotency_key is not None:
+            fingerprint = crud.request_fingerprint(candidate_data, resume.filename or "", resume.size or 0)
+            outcome, stored = await crud.store_call(crud.claim_idempotency_key, idempotency_key, fingerprint)
+            idempotency_requests.inc(outcome=outcome)
+            if outcome == "done":
+                status_code, body = stored
+                return Response(content=body, status_code=status_code, media_type="application/json",
+                                headers={"Idempotent-Replayed": "true"})
+            if outcome == "pending":
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            if outcome == "mismatch":
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            claimed = True
         
-        db_candidate = crud.create_candidate(candidate_data, resume_path)
-        print(f"DEBUG - Created candidate: {db_candidate['id']}")  # Debug line
+        with phase("store"):
+            # A person already on file keeps their stored resume, so the upload is not written
+            duplicate = (await crud.store_call(crud.find_duplicates, [candidate_data]))[0]
+            if duplicate is not None:
+                resume_path = duplicate.resume_path
+            else:
+                saved = await file_handler.save_resume_file(resume)
+                resume_path = saved.path
+            
+            # Create candidate in memory
+            db_candidate, created = await crud.store_call(crud.create_candidate, candidate_data, resume_path)
+        if created:
+            processing.submit(db_candidate.id, db_candidate.resume_path)
+            logger.debug("Created candidate %s", db_candidate.id)
+        else:
+            duplicate_submissions.inc(mode=IDENTITY_DEDUPE)
+            if duplicate is None and resume_path != db_candidate.resume_path:
+                # A concurrent request stored the same person first, so this upload is unused
+                file_cleanup.schedule_deletion(resume_path)
+            logger.debug("Candidate %s already stored", db_candidate.id)
         
         # Format response
-        return schemas.CandidateResponse(
-            id=db_candidate['id'],
-            full_name=db_candidate['full_name'],
-            dob=datetime.strptime(db_candidate['dob'], '%Y-%m-%d').date(),
-            contact_number=db_candidate['contact_number'],
-            contact_address=db_candidate['contact_address'],
-            education_qualification=db_candidate['education_qualification'],
-            graduation_year=db_candidate['graduation_year'],
-            years_of_experience=db_candidate['years_of_experience'],
-            skill_set=skills,
-            resume_path=db_candidate['resume_path'],
-            created_at=datetime.fromisoformat(db_candidate['created_at']),
-            updated_at=datetime.fromisoformat(db_candidate['updated_at']) if db_candidate.get('updated_at') else None
-        )
+        with phase("serialize"):
+            status_code = 201 if created else 200
+            body = crud.candidate_json(db_candidate)
+        if claimed:
+            await crud.store_call(crud.complete_idempotency_key, idempotency_key, status_code, body)
+            claimed = False
+        return Response(content=body, status_code=status_code, media_type="application/json")
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid skill_set format. Must be a JSON array.")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Clean up uploaded file if operation fails
-        if 'resume_path' in locals():
-            await file_handler.delete_resume_file_async(resume_path)
-        print(f"ERROR in create_candidate: {str(e)}")
+        if 'saved' in locals():
+            file_cleanup.schedule_deletion(saved.path)
+        logger.exception("Error creating candidate")
         raise HTTPException(status_code=500, detail=f"Error creating candidate: {str(e)}")
+    finally:
+        # A failed attempt frees its key so the client can retry
+        if claimed:
+            await crud.store_call(crud.release_idempotency_key, idempotency_key)
+
+
+# ========== BULK IMPORT ==========
+@router.post("/bulk", response_model=schemas.BulkImportResponse)
+async def bulk_create_candidates(
+    metadata: UploadFile = File(..., description="NDJSON or CSV rows, each naming its file in a 'resume' field"),
+    resumes: UploadFile = File(..., description="Zip or tar archive of resume files")
+):
+    """Import many candidates from a metadata file plus an archive of resumes"""
+    try:
+        rows = bulk_import.iter_metadata_rows(metadata.file, metadata.filename)
+        archive = await file_handler.run_file_io(bulk_import.ResumeArchive, resumes.file, resumes.filename)
+    except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    semaphore = asyncio.Semaphore(bulk_import.MAX_CONCURRENT_WRITES)
+    
+    async def store(member: str) -> file_handler.SavedFile:
+        async with semaphore:
+            return await file_handler.run_file_io(archive.save_member, member)
+    
+    results = []
+    row_number = 0
+    with archive:
+        while True:
+            try:
+                batch = await file_handler.run_file_io(bulk_import.read_batch, rows)
+            except ValueError as e:  # includes UnicodeDecodeError
+                raise HTTPException(status_code=400, detail=f"Unreadable metadata: {e}")
+            if not batch:
+                break
+            
+            # Validate the batch
+            parsed = []
+            for raw in batch:
+                row_number += 1
+                try:
+                    parsed.append((row_number, *bulk_import.parse_row(raw)))
+                except ValueError as e:
+                    results.append(schemas.BulkImportRowResult(row=row_number, status="error", error=str(e)))
+            
+            # People already on file keep their stored resume (identity dedupe only)
+            duplicates = await crud.store_call(crud.find_duplicates, [candidate for _, candidate, _ in parsed])
+            ready = [
+                (row, candidate, duplicate.resume_path)
+                for (row, candidate, _), duplicate in zip(parsed, duplicates) if duplicate is not None
+            ]
+            to_store = [entry for entry, duplicate in zip(parsed, duplicates) if duplicate is None]
+            
+            # Store the other resumes concurrently
+            saved = await asyncio.gather(*(store(member) for _, _, member in to_store), return_exceptions=True)
+            for (row, candidate, _), outcome in zip(to_store, saved):
+                if isinstance(outcome, Exception):
+                    error = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+                    results.append(schemas.BulkImportRowResult(row=row, status="error", error=error))
+                else:
+                    ready.append((row, candidate, outcome.path))
+            
+            # Insert the whole batch at once
+            created = await crud.store_call(crud.create_candidates, [(candidate, path) for _, candidate, path in ready])
+            for (row, _, path), (db_candidate, is_new) in zip(ready, created):
+                if is_new:
+                    processing.submit(db_candidate.id, db_candidate.resume_path)
+                else:
+                    duplicate_submissions.inc(mode=IDENTITY_DEDUPE)
+                    if path != db_candidate.resume_path:
+                        # Same person twice in this import: the later row's blob is unused
+                        file_cleanup.schedule_deletion(path)
+                results.append(schemas.BulkImportRowResult(
+                    row=row, status="created" if is_new else "existing",
+                    id=db_candidate.id, resume_path=db_candidate.resume_path
+                ))
+    
+    results.sort(key=lambda r: r.row)
+    created_count = sum(1 for r in results if r.status == "created")
+    existing_count = sum(1 for r in results if r.status == "existing")
+    return schemas.BulkImportResponse(
+        created=created_count, existing=existing_count,
+        failed=len(results) - created_count - existing_count, results=results
+    )
 
 
 # ========== GET ALL CANDIDATES ==========
@@ -87,79 +220,305 @@ def list_candidates(
     skill: Optional[str] = Query(None, description="Filter by skill"),
     experience: Optional[int] = Query(None, description="Minimum years of experience"),
     graduation_year: Optional[int] = Query(None, description="Filter by graduation year"),
+    experience_max: Optional[int] = Query(None, description="Maximum years of experience"),
+    graduation_year_from: Optional[int] = Query(None, description="Earliest graduation year"),
+    graduation_year_to: Optional[int] = Query(None, description="Latest graduation year"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(100, ge=1, le=1000, description="Number of records to return")
+    limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    after_id: Optional[int] = Query(None, ge=0, description="Return candidates with an ID greater than this"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per candidate (id is always included)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """List all candidates with optional filters"""
+    with phase("parse"):
+        try:
+            if cursor is not None:
+                after_id = crud.decode_cursor(cursor)
+            projection = crud.parse_fields(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Identical queries against an unchanged store share one rendered page
+    key = (
+        skill.lower() if skill else None, experience, graduation_year, experience_max,
+        graduation_year_from, graduation_year_to, skip, limit, after_id, projection
+    )
+    generation = crud.store_generation()
+    etag = query_cache.etag(key, generation)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        query_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    body = query_cache.get(key, generation)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers=headers)
+    
     try:
-        total, candidates = crud.get_candidates(
-            skip=skip,
-            limit=limit,
-            skill=skill,
-            experience=experience,
-            graduation_year=graduation_year
-        )
+        with phase("filter"):
+            total, candidates, next_cursor = crud.get_candidates(
+                skip=skip,
+                limit=limit,
+                skill=skill,
+                experience=experience,
+                graduation_year=graduation_year,
+                experience_max=experience_max,
+                graduation_year_from=graduation_year_from,
+                graduation_year_to=graduation_year_to,
+                after_id=after_id
+            )
         
-        print(f"DEBUG - Listing candidates: total={total}, count={len(candidates)}")  # Debug line
-        
-        # Format candidates for response
-        formatted_candidates = []
-        for c in candidates:
-            formatted_candidates.append(schemas.CandidateResponse(
-                id=c['id'],
-                full_name=c['full_name'],
-                dob=c['dob'],
-                contact_number=c['contact_number'],
-                contact_address=c['contact_address'],
-                education_qualification=c['education_qualification'],
-                graduation_year=c['graduation_year'],
-                years_of_experience=c['years_of_experience'],
-                skill_set=c['skill_set'],
-                resume_path=c['resume_path'],
-                created_at=datetime.fromisoformat(c['created_at']),
-                updated_at=datetime.fromisoformat(c['updated_at']) if c.get('updated_at') else None
-            ))
-        
-        return {"total": total, "candidates": formatted_candidates}
+        logger.debug("Listing candidates: total=%s, count=%s", total, len(candidates))
+        
+        with phase("serialize"):
+            body = crud.render_candidate_page(total, candidates, next_cursor, projection)
+        query_cache.put(key, generation, body)
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except Exception as e:
-        print(f"ERROR in list_candidates: {str(e)}")
+        logger.exception("Error listing candidates")
         raise HTTPException(status_code=500, detail=f"Error listing candidates: {str(e)}")
 
 
+# ========== BATCH GET ==========
+def _batch_response(ids: List[int], fields: Optional[str]) -> Response:
+    try:
+        projection = crud.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with phase("store"):
+        candidates, missing = crud.get_candidates_by_ids(ids)
+    with phase("serialize"):
+        body = crud.render_candidate_batch(candidates, missing, projection)
+    return Response(content=body, media_type="application/json")
+
+@router.get("/batch", response_model=schemas.CandidateBatchResponse)
+def batch_get_candidates(
+    ids: str = Query(..., description="Comma-separated candidate IDs"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per candidate (id is always included)")
+):
+    """Fetch many candidates in one call; unknown ids are listed under ``missing``"""
+    with phase("parse"):
+        try:
+            candidate_ids = [int(i) for i in ids.split(",") if i.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not candidate_ids or len(candidate_ids) > schemas.MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {schemas.MAX_BATCH_IDS} ids")
+    return _batch_response(candidate_ids, fields)
+
+@router.post("/batch", response_model=schemas.CandidateBatchResponse)
+def batch_get_candidates_post(batch_request: schemas.CandidateBatchRequest):
+    """Body variant of GET /batch for id lists too long for a URL"""
+    fields = ",".join(batch_request.fields) if batch_request.fields else None
+    return _batch_response(batch_request.ids, fields)
+
+
+# ========== CHANGE FEED ==========
+@router.get("/changes", response_model=schemas.ChangesResponse)
+async def candidate_changes(
+    since: Optional[int] = Query(None, description="Last sequence number seen; omit to get the current position"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum changes to return"),
+    timeout: float = Query(30.0, ge=0, le=60, description="Seconds to wait for a change before returning empty")
+):
+    """Long-poll the mutations after ``since``"""
+    changes, latest, truncated = await crud.store_call(crud.get_changes, since, limit)
+    if since is not None and not changes and not truncated and timeout > 0:
+        if await crud.wait_for_changes(since, timeout):
+            changes, latest, truncated = await crud.store_call(crud.get_changes, since, limit)
+    if changes:
+        next_since = changes[-1]["seq"]
+    else:
+        next_since = latest if since is None or truncated else since
+    return schemas.ChangesResponse(changes=changes, next_since=next_since, truncated=truncated)
+
+@router.get("/changes/stream")
+async def stream_candidate_changes(
+    request: Request,
+    since: Optional[int] = Query(None, description="Last sequence number seen; omit to start from now"),
+    last_event_id: Optional[int] = Header(None)
+):
+    """Server-Sent Events feed of mutations; reconnects resume from Last-Event-ID"""
+    position = last_event_id if last_event_id is not None else since
+    if position is None:
+        position = (await crud.store_call(crud.get_changes, None))[1]
+    
+    async def events():
+        nonlocal position
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            changes, latest, truncated = await crud.store_call(crud.get_changes, position, CHANGE_STREAM_BATCH)
+            if truncated:
+                yield f"event: truncated\ndata: {json.dumps({'next_since': latest})}\n\n"
+                return
+            if changes:
+                # One chunk per batch; the next batch is only read once this one
+                # has been sent, so a slow client never builds up a server-side buffer
+                yield "".join(
+                    f"id: {change['seq']}\nevent: change\ndata: {schemas.ChangeEvent(**change).model_dump_json()}\n\n"
+                    for change in changes
+                )
+                position = changes[-1]["seq"]
+            elif not await crud.wait_for_changes(position, CHANGE_STREAM_HEARTBEAT):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ========== RANKED MATCHING ==========
+@router.post("/match", response_model=schemas.MatchResponse)
+def match_candidates(match_request: schemas.MatchRequest):
+    """Return the best candidates for weighted skills, experience and graduation bounds"""
+    try:
+        total, results = crud.match_candidates(match_request)
+        return schemas.MatchResponse(
+            total=total,
+            results=[
+                schemas.MatchResult(score=score, candidate=schemas.CandidateResponse.model_validate(candidate))
+                for candidate, score in results
+            ]
+        )
+    except Exception as e:
+        logger.exception("Error matching candidates")
+        raise HTTPException(status_code=500, detail=f"Error matching candidates: {str(e)}")
+
+
+# ========== STATISTICS ==========
+@router.get("/stats", response_model=schemas.StatsResponse)
+def candidate_stats(
+    top_skills: int = Query(20, ge=1, le=500, description="Number of most common skills to return")
+):
+    """Skill frequency, experience histogram, graduates per year and uploads per day"""
+    try:
+        stats = crud.get_stats(top_skills)
+        return schemas.StatsResponse(
+            **{key: value for key, value in stats.items() if key != "skills"},
+            skills=[schemas.SkillCount(skill=skill, count=count) for skill, count in stats["skills"]]
+        )
+    except Exception as e:
+        logger.exception("Error computing stats")
+        raise HTTPException(status_code=500, detail=f"Error computing stats: {str(e)}")
+
+
+# ========== FULL-TEXT SEARCH ==========
+@router.get("/search", response_model=schemas.SearchResponse)
+def search_candidates(
+    q: str = Query(..., min_length=1, description="Words to look for in resumes, skills and education"),
+    limit: int = Query(20, ge=1, le=100, description="Number of results to return")
+):
+    """Rank candidates by how well their resume text matches the query"""
+    try:
+        total, hits = crud.search_candidates(q, limit)
+        return schemas.SearchResponse(
+            total=total,
+            results=[schemas.SearchHit(id=i, score=score, snippet=snippet) for i, score, snippet in hits]
+        )
+    except Exception as e:
+        logger.exception("Error searching candidates")
+        raise HTTPException(status_code=500, detail=f"Error searching candidates: {str(e)}")
+
+
 # ========== GET CANDIDATE BY ID ==========
 @router.get("/{candidate_id}", response_model=schemas.CandidateResponse)
 def get_candidate(candidate_id: int):
     """Get a specific candidate by ID"""
     try:
-        candidate = crud.get_candidate(candidate_id)
+        with phase("store"):
+            candidate = crud.get_candidate(candidate_id)
         if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
-        print(f"DEBUG - Got candidate {candidate_id}")  # Debug line
-        
-        return schemas.CandidateResponse(
-            id=candidate['id'],
-            full_name=candidate['full_name'],
-            dob=candidate['dob'],
-            contact_number=candidate['contact_number'],
-            contact_address=candidate['contact_address'],
-            education_qualification=candidate['education_qualification'],
-            graduation_year=candidate['graduation_year'],
-            years_of_experience=candidate['years_of_experience'],
-            skill_set=candidate['skill_set'],
-            resume_path=candidate['resume_path'],
-            created_at=datetime.fromisoformat(candidate['created_at']),
-            updated_at=datetime.fromisoformat(candidate['updated_at']) if candidate.get('updated_at') else None
-        )
+        logger.debug("Got candidate %s", candidate_id)
+        
+        with phase("serialize"):
+            return schemas.CandidateResponse.model_validate(candidate)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in get_candidate: {str(e)}")
+        logger.exception("Error retrieving candidate %s", candidate_id)
         raise HTTPException(status_code=500, detail=f"Error retrieving candidate: {str(e)}")
 
 
+# ========== DOWNLOAD RESUME ==========
+@router.api_route("/{candidate_id}/resume", methods=["GET", "HEAD"], response_class=FileResponse)
+async def download_resume(
+    candidate_id: int,
+    request: Request,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Serve a candidate's resume, with Range support and content-hash ETags"""
+    candidate = await crud.store_call(crud.get_candidate, candidate_id)
+    if not candidate or not candidate.resume_path:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    if candidate.processing and candidate.processing["status"] == "rejected":
+        raise HTTPException(status_code=403, detail=f"Resume withheld: {candidate.processing.get('reason')}")
+    
+    path = candidate.resume_path
+    compressed = blob_codec.is_compressed(path)
+    # A gzip blob goes out as stored when the client takes gzip and wants the whole file
+    send_gzip = compressed and file_handler.accepts_gzip(accept_encoding) and "range" not in request.headers
+    etag = file_handler.blob_etag(path, "gzip" if send_gzip else None)
+    headers = {"ETag": etag, "Cache-Control": RESUME_CACHE_CONTROL}
+    if compressed:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    filename = f"resume-{candidate_id}{blob_codec.resume_extension(path)}"
+    if compressed and not send_gzip:
+        return await _decompressed_resume(request, path, headers, media_type, filename)
+    if send_gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    try:
+        stat_result = await file_handler.stat_blob(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Resume file not found")
+    
+    # FileResponse answers Range/If-Range itself and reuses our stat result
+    return FileResponse(
+        path,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        stat_result=stat_result,
+        content_disposition_type="inline"
+    )
+
+async def _decompressed_resume(request: Request, path: str, headers: dict, media_type: str, filename: str) -> Response:
+    """Stream a compressed blob's original bytes, honoring a single Range"""
+    try:
+        size = await file_handler.run_file_io(blob_codec.blob_size, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Resume file not found")
+    
+    headers.update({"Accept-Ranges": "bytes", "Content-Disposition": f'inline; filename="{filename}"'})
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == headers["ETag"]):
+        try:
+            span = file_handler.parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if span is not None:
+            start, end = span
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        file_handler.iter_blob(path, start, end), status_code=status_code, headers=headers, media_type=media_type
+    )
+
+
 # ========== UPDATE CANDIDATE ==========
 @router.put("/{candidate_id}", response_model=schemas.CandidateResponse)
 def update_candidate(
@@ -168,31 +527,20 @@ def update_candidate(
 ):
     """Update a candidate's information"""
     try:
-        updated_candidate = crud.update_candidate(candidate_id, candidate_update)
+        with phase("store"):
+            updated_candidate = crud.update_candidate(candidate_id, candidate_update)
         if not updated_candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
-        print(f"DEBUG - Updated candidate {candidate_id}")  # Debug line
-        
-        return schemas.CandidateResponse(
-            id=updated_candidate['id'],
-            full_name=updated_candidate['full_name'],
-            dob=updated_candidate['dob'],
-            contact_number=updated_candidate['contact_number'],
-            contact_address=updated_candidate['contact_address'],
-            education_qualification=updated_candidate['education_qualification'],
-            graduation_year=updated_candidate['graduation_year'],
-            years_of_experience=updated_candidate['years_of_experience'],
-            skill_set=updated_candidate['skill_set'],
-            resume_path=updated_candidate['resume_path'],
-            created_at=datetime.fromisoformat(updated_candidate['created_at']),
-            updated_at=datetime.fromisoformat(updated_candidate['updated_at'])
-        )
+        logger.debug("Updated candidate %s", candidate_id)
+        
+        with phase("serialize"):
+            return schemas.CandidateResponse.model_validate(updated_candidate)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in update_candidate: {str(e)}")
+        logger.exception("Error updating candidate %s", candidate_id)
         raise HTTPException(status_code=500, detail=f"Error updating candidate: {str(e)}")
 
 
@@ -201,23 +549,24 @@ def update_candidate(
 def delete_candidate(candidate_id: int):
     """Delete a candidate by ID"""
     try:
-        # Get candidate to delete resume file
-        candidate = crud.get_candidate(candidate_id)
-        
-        # Delete from storage
-        deleted = crud.delete_candidate(candidate_id)
+        with phase("store"):
+            # Get candidate to delete resume file
+            candidate = crud.get_candidate(candidate_id)
+            
+            # Delete from storage
+            deleted = crud.delete_candidate(candidate_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
-        # Delete resume file if it exists
-        if candidate and candidate.get('resume_path'):
-            file_handler.delete_resume_file_sync(candidate['resume_path'])
+        # The blob is unlinked in the background once no candidate references it
+        if candidate:
+            file_cleanup.schedule_deletion(candidate.resume_path)
         
-        print(f"DEBUG - Deleted candidate {candidate_id}")  # Debug line
+        logger.debug("Deleted candidate %s", candidate_id)
         return None
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in delete_candidate: {str(e)}")
+        logger.exception("Error deleting candidate %s", candidate_id)
         raise HTTPException(status_code=500, detail=f"Error deleting candidate: {str(e)}")
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Any, Dict, Literal, Optional, List
 
 class CandidateBase(BaseModel):
     full_name: str
@@ -14,8 +14,14 @@ class CandidateBase(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+# Accepted ranges for new and updated candidates; the match columns store both as int32
+MIN_GRADUATION_YEAR = 1900
+MAX_GRADUATION_YEAR = 2100
+MAX_YEARS_OF_EXPERIENCE = 100
+
 class CandidateCreate(CandidateBase):
-    pass
+    graduation_year: int = Field(..., ge=MIN_GRADUATION_YEAR, le=MAX_GRADUATION_YEAR)
+    years_of_experience: int = Field(..., ge=0, le=MAX_YEARS_OF_EXPERIENCE)
 
 class CandidateUpdate(BaseModel):
     full_name: Optional[str] = None
@@ -23,25 +29,117 @@ class CandidateUpdate(BaseModel):
     contact_number: Optional[str] = None
     contact_address: Optional[str] = None
     education_qualification: Optional[str] = None
-    graduation_year: Optional[int] = None
-    years_of_experience: Optional[int] = None
+    graduation_year: Optional[int] = Field(None, ge=MIN_GRADUATION_YEAR, le=MAX_GRADUATION_YEAR)
+    years_of_experience: Optional[int] = Field(None, ge=0, le=MAX_YEARS_OF_EXPERIENCE)
     skill_set: Optional[List[str]] = None
     
     model_config = ConfigDict(from_attributes=True)
 
+class StageOutcome(BaseModel):
+    status: Literal["ok", "failed", "timeout", "rejected"]
+    attempts: int
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+class ProcessingStatus(BaseModel):
+    status: Literal["pending", "done", "failed", "rejected"]
+    reason: Optional[str] = None
+    virus_scan: Optional[str] = None
+    page_count: Optional[int] = None
+    preview: Optional[str] = None
+    stages: Dict[str, StageOutcome] = {}
+    finished_at: Optional[datetime] = None
+    
+    # Stages registered by deployments add their own fields
+    model_config = ConfigDict(extra="allow")
+
 class CandidateResponse(CandidateBase):
     id: int
     resume_path: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    # None for candidates loaded from disk until their resume is reprocessed
+    processing: Optional[ProcessingStatus] = None
 
 class CandidateListResponse(BaseModel):
     total: int
     candidates: List[CandidateResponse]
+    next_cursor: Optional[str] = None
+
+MAX_BATCH_IDS = 1000
+
+class CandidateBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+    fields: Optional[List[str]] = None
+
+class CandidateBatchResponse(BaseModel):
+    # Full candidates, or only ``id`` plus the requested fields
+    candidates: List[Dict[str, Any]]
+    missing: List[int]
+
+class ChangeEvent(BaseModel):
+    seq: int
+    op: Literal["create", "update", "delete", "clear"]
+    id: Optional[int] = None
+    at: datetime
+
+class ChangesResponse(BaseModel):
+    changes: List[ChangeEvent]
+    # Pass as ``since`` on the next call
+    next_since: int
+    # The requested position is no longer in the changelog: resync, then tail from next_since
+    truncated: bool = False
+
+class BulkImportRowResult(BaseModel):
+    row: int
+    status: Literal["created", "existing", "error"]
+    id: Optional[int] = None
+    resume_path: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkImportResponse(BaseModel):
+    created: int
+    failed: int
+    existing: int = 0
+    results: List[BulkImportRowResult]
 
-class CandidateFilterParams(BaseModel):
-    skill: Optional[str] = None
-    experience: Optional[int] = None
-    graduation_year: Optional[int] = None
-    skip: int = 0
-    limit: int = 100
\ No newline at end of file
+class SearchHit(BaseModel):
+    id: int
+    score: float
+    snippet: str
+
+class SearchResponse(BaseModel):
+    total: int
+    results: List[SearchHit]
+
+class WeightedSkill(BaseModel):
+    skill: str = Field(..., min_length=1)
+    weight: float = Field(1.0, ge=0)
+
+class MatchRequest(BaseModel):
+    required_skills: List[WeightedSkill] = []
+    optional_skills: List[WeightedSkill] = []
+    experience_min: Optional[int] = None
+    experience_max: Optional[int] = None
+    graduation_year_from: Optional[int] = None
+    graduation_year_to: Optional[int] = None
+    limit: int = Field(10, ge=1, le=1000)
+
+class MatchResult(BaseModel):
+    score: float
+    candidate: CandidateResponse
+
+class MatchResponse(BaseModel):
+    total: int
+    results: List[MatchResult]
+
+class SkillCount(BaseModel):
+    skill: str
+    count: int
+
+class StatsResponse(BaseModel):
+    total: int
+    skills: List[SkillCount]
+    experience_histogram: Dict[int, int]
+    graduates_per_year: Dict[int, int]
+    uploads_per_day: Dict[date, int]
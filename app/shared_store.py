@@ -0,0 +1,94 @@
+# app/shared_store.py
+import os
+import signal
+import sys
+import time
+from multiprocessing.managers import BaseManager
+from typing import Optional, Tuple
+
+# Methods of AppState that worker processes may call on the shared store
+EXPOSED = (
+    "add_candidate",
+    "add_candidates",
+    "add_candidates_unique",
+    "find_duplicates",
+    "get_candidate",
+    "get_candidates_many",
+    "update_candidate",
+    "delete_candidate",
+    "resumes_in_use",
+    "resume_paths",
+    "query_page",
+    "filter_candidates",
+    "count",
+    "store_metrics",
+    "generation",
+    "changes_since",
+    "change_sequence",
+    "claim_idempotency_key",
+    "complete_idempotency_key",
+    "release_idempotency_key",
+    "set_processing",
+    "unprocessed_resumes",
+    "claim_reprocess",
+    "search_resumes",
+    "match_candidates",
+    "candidate_stats",
+)
+
+CONNECT_TIMEOUT = 10.0  # seconds to wait for the store process to come up
+
+
+class StoreManager(BaseManager):
+    """Serves one AppState to every uvicorn worker over a local socket.
+
+    Each worker thread gets its own connection from the proxy, so the
+    threadpool talks to the store concurrently, and the store process
+    serves each connection on its own thread against the lock-safe AppState.
+    """
+
+
+StoreManager.register("store", exposed=EXPOSED)
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _authkey() -> bytes:
+    return os.environ.get("RESUME_STORE_AUTHKEY", "").encode() or b"resume-store"
+
+
+def serve(address: str, data_dir: Optional[str] = None):
+    """Run the store process: own the AppState (and its journal) and serve it until killed"""
+    from app.log import setup_logging, shutdown_logging
+    from app.state import AppState
+
+    setup_logging()
+    state = AppState()
+    if data_dir:
+        state.enable_persistence(data_dir)
+    StoreManager.register("store", callable=lambda: state, exposed=EXPOSED)
+    server = StoreManager(address=parse_address(address), authkey=_authkey()).get_server()
+    # Exit through the finally below so the journal is flushed on terminate()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        state.close()
+        shutdown_logging()
+
+
+def connect(address: str, timeout: float = CONNECT_TIMEOUT):
+    """Return a proxy to the shared AppState, waiting for the store process if needed"""
+    manager = StoreManager(address=parse_address(address), authkey=_authkey())
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            manager.connect()
+            return manager.store()
+        except ConnectionRefusedError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
@@ -1,10 +1,50 @@
 # app/state.py
-from typing import Dict, List, Optional
-from datetime import datetime
-import json
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar
+from bisect import bisect_right
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import islice
+import logging
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from app.cache import IdempotencyCache
+from app.changes import ChangeLog
+from app.columns import CandidateColumns
+from app.indexes import RangeIndex, SkillIndex, TextIndex, make_snippet, normalize_skill, union_size
+from app.models import CandidateRecord, identity_key
+from app.persistence import Journal, record_to_row
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Optimistic index reads attempted before falling back to the write lock
+OPTIMISTIC_READ_ATTEMPTS = 3
+# Duplicate people on create: "off", "return" (answer with the stored record) or "merge" (also update it)
+IDENTITY_DEDUPE = os.getenv("RESUME_IDENTITY_DEDUPE", "off").lower()
+# Fields a merged re-submission updates; the identity fields keep their stored spelling
+MERGE_FIELDS = ("contact_address", "education_qualification", "graduation_year", "years_of_experience", "skill_set")
+
+if IDENTITY_DEDUPE not in ("off", "return", "merge"):
+    logger.warning("Unknown RESUME_IDENTITY_DEDUPE %r; identity dedupe is off", IDENTITY_DEDUPE)
+    IDENTITY_DEDUPE = "off"
 
 class AppState:
-    """Singleton class to hold application state"""
+    """Singleton class to hold application state.
+
+    Writers serialize on ``_write_lock`` and bump ``version`` to an odd
+    value while they mutate the indexes and back to even when done.
+    Readers take no lock: they read the indexes optimistically and retry
+    if a write overlapped (seqlock style). Records are replaced rather
+    than mutated, and ``ordered_ids`` is append-only with deleted ids left
+    as tombstones and compacted into a fresh list, so a reader's iteration
+    always walks a consistent view.
+    """
     _instance = None
     
     def __new__(cls):
@@ -12,77 +52,640 @@ class AppState:
             cls._instance = super().__new__(cls)
             cls._instance.candidates_db = {}
             cls._instance.id_counter = 0
+            cls._instance.ordered_ids = []
+            cls._instance.resume_refs = {}
+            cls._instance.journal = None
+            # The snapshot being written in the background, if any
+            cls._instance._capture = None
+            cls._instance.reprocess_claimed = False
+            cls._instance.skill_index = SkillIndex()
+            cls._instance.experience_index = RangeIndex()
+            cls._instance.graduation_year_index = RangeIndex()
+            cls._instance.text_index = TextIndex()
+            cls._instance.columns = CandidateColumns()
+            cls._instance._stats_cache = None
+            cls._instance.resume_texts = {}
+            # Queries answered from the secondary indexes vs. by walking every id
+            cls._instance.query_plans = {"index": 0, "scan": 0}
+            cls._instance.changelog = ChangeLog()
+            cls._instance.idempotency = IdempotencyCache()
+            # hash(identity_key) -> candidate id; only kept while identity dedupe is on
+            cls._instance.identity_index = None if IDENTITY_DEDUPE == "off" else {}
+            # Seeded from the clock so generations (and ETags) don't repeat across restarts
+            cls._instance.version = time.time_ns() // 1000 * 2
+            cls._instance._write_lock = threading.RLock()
         return cls._instance
     
+    @contextmanager
+    def _writing(self):
+        with self._write_lock:
+            self.version += 1
+            try:
+                yield
+            finally:
+                self.version += 1
+    
+    def _read(self, read: Callable[[], T]) -> T:
+        """Run ``read`` against the indexes without the lock, retrying if a write overlapped"""
+        for _ in range(OPTIMISTIC_READ_ATTEMPTS):
+            version = self.version
+            if version % 2 == 0:
+                try:
+                    result = read()
+                except (RuntimeError, KeyError, IndexError, ValueError):  # structure changed under us
+                    continue
+                if self.version == version:
+                    return result
+        with self._write_lock:
+            return read()
+    
     def get_next_id(self) -> int:
-        self.id_counter += 1
-        return self.id_counter
+        with self._write_lock:
+            self.id_counter += 1
+            return self.id_counter
     
-    def add_candidate(self, candidate_data: dict, resume_path: str) -> dict:
+    def add_candidate(self, candidate_data: dict, resume_path: str) -> CandidateRecord:
+        with self._writing():
+            candidate = self._insert(candidate_data, resume_path, datetime.now())
+        logger.debug("Added candidate %s", candidate.id)
+        return candidate
+    
+    def add_candidates(self, rows: List[Tuple[dict, str]]) -> List[CandidateRecord]:
+        """Insert many ``(candidate_data, resume_path)`` rows under one lock acquisition"""
+        now = datetime.now()
+        with self._writing():
+            return [self._insert(candidate_data, resume_path, now) for candidate_data, resume_path in rows]
+    
+    def _insert(self, candidate_data: dict, resume_path: str, now: datetime) -> CandidateRecord:
         candidate_id = self.get_next_id()
-        candidate = {
-            'id': candidate_id,
+        candidate = CandidateRecord(
+            id=candidate_id,
             **candidate_data,
-            'resume_path': resume_path,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
+            resume_path=resume_path,
+            created_at=now,
+            updated_at=now
+        )
+        # Indexed before it is published, so a record the indexes reject is never stored
+        self._index(candidate)
         self.candidates_db[candidate_id] = candidate
-        print(f"DEBUG - Added candidate {candidate_id}. Total: {len(self.candidates_db)}")
+        self.ordered_ids.append(candidate_id)
+        self.resume_refs[resume_path] = self.resume_refs.get(resume_path, 0) + 1
+        self._log("add", record_to_row(candidate))
+        self.changelog.append("create", candidate_id)
         return candidate
     
-    def get_candidate(self, candidate_id: int) -> Optional[dict]:
+    def add_candidates_unique(self, rows: List[Tuple[dict, str]],
+                              merge: bool = False) -> List[Tuple[CandidateRecord, bool]]:
+        """Insert the rows whose person is not stored yet; returns (record, created) per row.
+
+        A row matching a stored candidate (or an earlier row of the batch)
+        gets that record instead, updated with the row's details if
+        ``merge``. Without the identity index every row is inserted.
+        """
+        now = datetime.now()
+        results = []
+        with self._writing():
+            for candidate_data, resume_path in rows:
+                existing = self._find_identity(
+                    candidate_data["full_name"], candidate_data["dob"], candidate_data["contact_number"]
+                )
+                if existing is None:
+                    results.append((self._insert(candidate_data, resume_path, now), True))
+                    continue
+                if merge:
+                    changes = _merge_changes(existing, candidate_data)
+                    if changes:
+                        existing = self._update(existing, changes)
+                results.append((existing, False))
+        return results
+    
+    def find_duplicates(self, identities: List[Tuple[str, date, str]]) -> List[Optional[CandidateRecord]]:
+        """Stored record per ``(full_name, dob, contact_number)``, or None; all None without the index"""
+        return [self._find_identity(*identity) for identity in identities]
+    
+    def _find_identity(self, full_name: str, dob: date, contact_number: str) -> Optional[CandidateRecord]:
+        if self.identity_index is None:
+            return None
+        key = identity_key(full_name, dob, contact_number)
+        candidate = self.candidates_db.get(self.identity_index.get(hash(key)))
+        # The index holds hashes, so confirm the match
+        if candidate is None or identity_key(candidate.full_name, candidate.dob, candidate.contact_number) != key:
+            return None
+        return candidate
+    
+    def get_candidate(self, candidate_id: int) -> Optional[CandidateRecord]:
         return self.candidates_db.get(candidate_id)
     
-    def get_all_candidates(self) -> List[dict]:
+    def get_candidates_many(self, candidate_ids: List[int]) -> List[CandidateRecord]:
+        """Records for the ids that exist, in request order without duplicates"""
+        db = self.candidates_db
+        found = (db.get(i) for i in dict.fromkeys(candidate_ids))
+        return [candidate for candidate in found if candidate is not None]
+    
+    def get_all_candidates(self) -> List[CandidateRecord]:
         return list(self.candidates_db.values())
     
-    def update_candidate(self, candidate_id: int, update_data: dict) -> Optional[dict]:
-        if candidate_id in self.candidates_db:
-            self.candidates_db[candidate_id].update(update_data)
-            self.candidates_db[candidate_id]['updated_at'] = datetime.now().isoformat()
-            return self.candidates_db[candidate_id]
-        return None
+    def update_candidate(self, candidate_id: int, update_data: dict) -> Optional[CandidateRecord]:
+        with self._writing():
+            candidate = self.candidates_db.get(candidate_id)
+            if candidate is None:
+                return None
+            return self._update(candidate, update_data)
+    
+    def _update(self, candidate: CandidateRecord, update_data: dict) -> CandidateRecord:
+        update_data = {**update_data, 'updated_at': datetime.now()}
+        updated = candidate.updated(update_data)
+        self._unindex(candidate)
+        try:
+            self._index(updated)
+        except Exception:
+            # Restore the stored version, so a rejected update changes nothing
+            self._index(candidate)
+            raise
+        self._preserve(candidate.id)
+        self.candidates_db[candidate.id] = updated
+        self._log("update", (candidate.id, update_data))
+        self.changelog.append("update", candidate.id)
+        return updated
     
     def delete_candidate(self, candidate_id: int) -> bool:
-        if candidate_id in self.candidates_db:
-            del self.candidates_db[candidate_id]
-            print(f"DEBUG - Deleted candidate {candidate_id}. Total: {len(self.candidates_db)}")
-            return True
-        return False
+        with self._writing():
+            self._preserve(candidate_id)
+            candidate = self.candidates_db.pop(candidate_id, None)
+            if candidate is None:
+                return False
+            self._unindex(candidate)
+            self._release_resume(candidate.resume_path)
+            self.resume_texts.pop(candidate_id, None)
+            self._compact_ids()
+            self._log("delete", candidate_id)
+            self.changelog.append("delete", candidate_id)
+        logger.debug("Deleted candidate %s", candidate_id)
+        return True
     
-    def filter_candidates(self, skill: Optional[str] = None, experience: Optional[int] = None, 
-                         graduation_year: Optional[int] = None) -> List[dict]:
-        results = list(self.candidates_db.values())
-        print(f"DEBUG - Filtering {len(results)} candidates")
-        
-        if skill:
-            filtered = []
-            for c in results:
-                try:
-                    skills = c['skill_set']
-                    if isinstance(skills, str):
-                        skills = json.loads(skills)
-                    if any(skill.lower() in s.lower() for s in skills):
-                        filtered.append(c)
-                except Exception as e:
-                    print(f"DEBUG - Error parsing skills: {e}")
-                    continue
-            results = filtered
-        
-        if experience is not None:
-            results = [c for c in results if c['years_of_experience'] >= experience]
+    def _compact_ids(self):
+        # Rebuild rather than edit in place: readers may be iterating the old list
+        if len(self.ordered_ids) > 2 * len(self.candidates_db) + 1024:
+            self.ordered_ids = [i for i in self.ordered_ids if i in self.candidates_db]
+    
+    def resumes_in_use(self, resume_paths: List[str]) -> Set[str]:
+        refs = self.resume_refs
+        return {path for path in resume_paths if path in refs}
+    
+    def resume_paths(self) -> List[str]:
+        with self._write_lock:
+            return list(self.resume_refs)
+    
+    def _release_resume(self, resume_path: str):
+        refs = self.resume_refs.get(resume_path, 0) - 1
+        if refs > 0:
+            self.resume_refs[resume_path] = refs
+        else:
+            self.resume_refs.pop(resume_path, None)
+    
+    def query_candidates(self, skill: Optional[str] = None, experience: Optional[int] = None,
+                         graduation_year: Optional[int] = None, experience_max: Optional[int] = None,
+                         graduation_year_from: Optional[int] = None,
+                         graduation_year_to: Optional[int] = None,
+                         after_id: Optional[int] = None) -> Tuple[int, Iterator[CandidateRecord]]:
+        """Return the match count and a lazy, id-ordered iterator over matches.
+
+        Each predicate's size is estimated from its posting and bucket
+        sizes without building a set. Only the most selective one is
+        materialized; the others are checked per id, range bounds against
+        the numpy columns and the skill against its postings, so the cost
+        follows the most selective predicate rather than the widest.
+
+        ``after_id`` seeks past earlier ids with a bisect, so paging by
+        cursor costs the page size rather than the offset.
+        """
+        def lookup() -> Optional[List[int]]:
+            # (estimated matches, id sets whose union matches, column bounds or None for the skill)
+            predicates = []
+            if skill:
+                postings = list(self.skill_index.postings(skill).values())
+                predicates.append((union_size(postings), postings, None))
+            if experience is not None or experience_max is not None:
+                buckets = self.experience_index.buckets(experience, experience_max)
+                predicates.append((union_size(buckets), buckets, ("experience", experience, experience_max)))
+            if graduation_year is not None:
+                buckets = self.graduation_year_index.buckets(graduation_year, graduation_year)
+                predicates.append((union_size(buckets), buckets, ("graduation_year", graduation_year, graduation_year)))
+            if graduation_year_from is not None or graduation_year_to is not None:
+                buckets = self.graduation_year_index.buckets(graduation_year_from, graduation_year_to)
+                bounds = ("graduation_year", graduation_year_from, graduation_year_to)
+                predicates.append((union_size(buckets), buckets, bounds))
+            if not predicates:
+                return None
+            
+            predicates.sort(key=lambda predicate: predicate[0])
+            ids = set().union(*predicates[0][1])
+            if not ids or len(predicates) == 1:
+                return sorted(ids)
+            matches = np.fromiter(ids, dtype=np.int64, count=len(ids))
+            skill_postings = None
+            for _, sets, bounds in predicates[1:]:
+                if bounds is None:
+                    skill_postings = sets
+                else:
+                    matches = self.columns.within(matches, *bounds)
+            if skill_postings is None:
+                return np.sort(matches).tolist()
+            remaining = matches.tolist()
+            return sorted(set().union(*(ids.intersection(remaining) for ids in skill_postings)))
         
-        if graduation_year is not None:
-            results = [c for c in results if c['graduation_year'] == graduation_year]
+        ordered = self._read(lookup)
+        if ordered is None:
+            self.query_plans["scan"] += 1
+            ordered, total = self.ordered_ids, len(self.candidates_db)
+        else:
+            self.query_plans["index"] += 1
+            total = len(ordered)
+        start = 0 if after_id is None else bisect_right(ordered, after_id)
+        return total, self._iter_ids(ordered, start)
+    
+    def query_page(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+                   **filters) -> Tuple[int, List[CandidateRecord], bool]:
+        """Materialize one page of query_candidates; returns (total, page, has_more)"""
+        total, matches = self.query_candidates(after_id=after_id, **filters)
+        page = list(islice(matches, skip, skip + limit))
+        has_more = len(page) == limit and next(matches, None) is not None
+        return total, page, has_more
+    
+    def generation(self) -> int:
+        """Store generation: bumped by every add, update and delete"""
+        return self.version // 2
+    
+    def count(self) -> int:
+        return len(self.candidates_db)
+    
+    def changes_since(self, seq: Optional[int], limit: int = 1000) -> Tuple[List[dict], int, bool]:
+        """Mutations after ``seq`` (none if ``seq`` is None); returns (changes, latest, truncated)"""
+        if seq is None:
+            return [], self.changelog.latest(), False
+        return self.changelog.since(seq, limit)
+    
+    def change_sequence(self) -> int:
+        return self.changelog.latest()
+    
+    def claim_idempotency_key(self, key: str, fingerprint: str) -> Tuple[str, Optional[Tuple[int, bytes]]]:
+        return self.idempotency.claim(key, fingerprint)
+    
+    def complete_idempotency_key(self, key: str, status: int, body: bytes):
+        self.idempotency.complete(key, status, body)
+    
+    def release_idempotency_key(self, key: str):
+        self.idempotency.release(key)
+    
+    def store_metrics(self) -> dict:
+        """Sizes of the store and its indexes plus query plan counters, for /metrics"""
+        return {
+            "candidates": len(self.candidates_db),
+            "resume_blobs": len(self.resume_refs),
+            "indexed_resume_texts": len(self.resume_texts),
+            "index_entries": {
+                "skill": len(self.skill_index),
+                "experience": len(self.experience_index),
+                "graduation_year": len(self.graduation_year_index),
+                "text": len(self.text_index),
+                **({} if self.identity_index is None else {"identity": len(self.identity_index)}),
+            },
+            "query_plans": dict(self.query_plans),
+            "idempotency_keys": len(self.idempotency),
+        }
+    
+    def set_processing(self, candidate_id: int, resume_path: str, processing: dict,
+                       text: Optional[str] = None) -> bool:
+        """Store a resume's post-processing outcome and index its extracted text in one write.
+
+        Ignored if the candidate was deleted (or its id reused by a clear)
+        while the resume was being processed.
+        """
+        with self._writing():
+            candidate = self.candidates_db.get(candidate_id)
+            if candidate is None or candidate.resume_path != resume_path:
+                return False
+            updated = candidate.updated({"processing": processing})
+            self._preserve(candidate_id)
+            self.candidates_db[candidate_id] = updated
+            compressed = None
+            if text is not None:
+                compressed = self.resume_texts[candidate_id] = zlib.compress(text.encode())
+                self.text_index.add(candidate_id, self._document(updated))
+            self._log("processing", (candidate_id, resume_path, processing, compressed))
+            self.changelog.append("update", candidate_id)
+            return True
+    
+    def unprocessed_resumes(self, after_id: int, limit: int) -> Tuple[List[Tuple[int, str]], Optional[int]]:
+        """Check the next ``limit`` ids after ``after_id`` for resumes without a processing result.
+
+        Returns their ``(id, resume_path)`` and the id to continue after,
+        or None once every id has been checked.
+        """
+        ordered = self.ordered_ids
+        start = bisect_right(ordered, after_id)
+        checked = ordered[start:start + limit]
+        rows = []
+        for candidate_id in checked:
+            candidate = self.candidates_db.get(candidate_id)
+            if candidate is not None and candidate.processing is None:
+                rows.append((candidate_id, candidate.resume_path))
+        return rows, (checked[-1] if len(checked) == limit else None)
+    
+    def search_resumes(self, query: str, limit: int = 20) -> Tuple[int, List[Tuple[int, float, str]]]:
+        """Rank candidates by BM25 over resume text and profile; returns (total, [(id, score, snippet)])"""
+        total, top = self._read(lambda: self.text_index.search(query, limit))
+        hits = []
+        for candidate_id, score in top:
+            candidate = self.candidates_db.get(candidate_id)
+            if candidate is not None:
+                hits.append((candidate_id, score, make_snippet(self._document(candidate), query)))
+        return total, hits
+    
+    def match_candidates(self, required: List[Tuple[str, float]], optional: List[Tuple[str, float]],
+                         experience_min: Optional[int] = None, experience_max: Optional[int] = None,
+                         graduation_year_from: Optional[int] = None,
+                         graduation_year_to: Optional[int] = None,
+                         limit: int = 10) -> Tuple[int, List[Tuple[CandidateRecord, float]]]:
+        """Score the whole pool against weighted skills and bounds; returns (eligible, [(record, score)])"""
+        def score():
+            columns = self.columns
+            required_postings = [(self.skill_index.postings(skill), weight) for skill, weight in required]
+            optional_postings = [(self.skill_index.postings(skill), weight) for skill, weight in optional]
+            unmapped = [
+                token for postings, _ in required_postings + optional_postings
+                for token, ids in postings.items() if columns.wants_skill_bitmap(token, len(ids))
+            ]
+            return unmapped, columns.match(
+                [(columns.mask(postings), weight) for postings, weight in required_postings],
+                [(columns.mask(postings), weight) for postings, weight in optional_postings],
+                experience_min, experience_max, graduation_year_from, graduation_year_to, limit
+            )
         
-        return results
+        unmapped, (total, top) = self._read(score)
+        if unmapped:
+            self._add_skill_bitmaps(unmapped)
+        results = []
+        for candidate_id, candidate_score in top:
+            candidate = self.candidates_db.get(candidate_id)
+            if candidate is not None:
+                results.append((candidate, candidate_score))
+        return total, results
+    
+    def _add_skill_bitmaps(self, skills: List[str]):
+        """Give common skills a bitmap, so later matches stop scattering their posting sets"""
+        # Results do not change, so readers need not retry and the version stays put
+        with self._write_lock:
+            for skill in skills:
+                self.columns.add_skill_bitmap(skill, self.skill_index.holders(skill))
+    
+    def candidate_stats(self, top_skills: int = 20) -> dict:
+        """Aggregate counts over the store, cached until the next mutation"""
+        cached = self._stats_cache
+        if cached is not None and cached[0] == self.version and cached[1] == top_skills:
+            return cached[2]
+        version = self.version
+        stats = self._read(lambda: self.columns.aggregate(top_skills))
+        if self.version == version:
+            self._stats_cache = (version, top_skills, stats)
+        return stats
+    
+    def _document(self, candidate: CandidateRecord) -> str:
+        # Profile fields first so snippets for skill matches stay short
+        profile = " ".join((*candidate.skill_set, candidate.education_qualification))
+        text = self.resume_texts.get(candidate.id)
+        return profile if text is None else f"{profile}\n{zlib.decompress(text).decode()}"
+    
+    def _iter_ids(self, ordered: List[int], start: int) -> Iterator[CandidateRecord]:
+        for i in range(start, len(ordered)):
+            candidate = self.candidates_db.get(ordered[i])
+            if candidate is not None:
+                yield candidate
+    
+    def filter_candidates(self, skill: Optional[str] = None, experience: Optional[int] = None, 
+                         graduation_year: Optional[int] = None, experience_max: Optional[int] = None,
+                         graduation_year_from: Optional[int] = None,
+                         graduation_year_to: Optional[int] = None) -> List[CandidateRecord]:
+        total, candidates = self.query_candidates(
+            skill, experience, graduation_year, experience_max,
+            graduation_year_from, graduation_year_to
+        )
+        logger.debug("Filtering %s candidates", total)
+        return list(candidates)
+    
+    def _index(self, candidate: CandidateRecord):
+        # The columns go first: they are the only index that can reject a value, and do so unchanged
+        self.columns.set(candidate)
+        self.skill_index.add(candidate.id, candidate.skill_set)
+        self.experience_index.add(candidate.id, candidate.years_of_experience)
+        self.graduation_year_index.add(candidate.id, candidate.graduation_year)
+        self.text_index.add(candidate.id, self._document(candidate))
+        if self.identity_index is not None:
+            # First one wins; duplicates stored before dedupe was enabled stay unindexed
+            key = identity_key(candidate.full_name, candidate.dob, candidate.contact_number)
+            self.identity_index.setdefault(hash(key), candidate.id)
+    
+    def _unindex(self, candidate: CandidateRecord):
+        self.skill_index.remove(candidate.id, candidate.skill_set)
+        self.experience_index.remove(candidate.id, candidate.years_of_experience)
+        self.graduation_year_index.remove(candidate.id, candidate.graduation_year)
+        self.text_index.remove(candidate.id)
+        self.columns.remove(candidate)
+        if self.identity_index is not None:
+            key = hash(identity_key(candidate.full_name, candidate.dob, candidate.contact_number))
+            if self.identity_index.get(key) == candidate.id:
+                del self.identity_index[key]
+    
+    def enable_persistence(self, directory: str):
+        """Load the store from ``directory`` and journal every later mutation there"""
+        journal = Journal(directory)
+        loaded = journal.load()
+        with self._writing():
+            self.id_counter = loaded.id_counter
+            self._load_records(loaded.records, loaded.texts, loaded.indexes, loaded.before)
+            self.journal = journal
+        journal.start()
+        logger.info("Loaded %s candidates from %s", len(self.candidates_db), directory)
+    
+    def claim_reprocess(self) -> bool:
+        """True for the first caller after persistence is enabled, so one worker reprocesses the loaded store"""
+        with self._write_lock:
+            if self.journal is None or self.reprocess_claimed:
+                return False
+            self.reprocess_claimed = True
+            return True
+    
+    def snapshot(self):
+        """Compact the journal into a snapshot of the current store.
+
+        Only references and copies of the numeric columns are taken under
+        the lock. The journal's thread assembles the rows and index data
+        while writers carry on, saving the pre-snapshot version of each
+        record they change first.
+        """
+        with self._write_lock:
+            if self.journal is None or self._capture is not None:
+                return
+            capture = self._capture = _SnapshotCapture(self)
+            try:
+                self.journal.snapshot(lambda: self._build_snapshot(capture))
+            except BaseException:
+                self._capture = None
+                raise
+    
+    def _build_snapshot(self, capture: "_SnapshotCapture") -> dict:
+        try:
+            return capture.build()
+        finally:
+            self._capture = None
+    
+    def _preserve(self, candidate_id: int):
+        """Call before changing or removing a stored record"""
+        capture = self._capture
+        if capture is not None:
+            capture.preserve(candidate_id)
+    
+    def close(self):
+        """Flush and close the journal, if persistence is enabled"""
+        with self._write_lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+    
+    def _log(self, op: str, payload):
+        if self.journal is not None:
+            self.journal.append(op, payload)
+            if self.journal.needs_snapshot():
+                self.snapshot()
+    
+    def _load_records(self, records: Dict[int, CandidateRecord], texts: Optional[Dict[int, bytes]] = None,
+                      indexes: Optional[dict] = None, before: Optional[Dict[int, Optional[CandidateRecord]]] = None):
+        """Replace the store with ``records`` and their compressed resume ``texts``.
+
+        The indexes are restored from snapshot ``indexes`` if given, with
+        the records changed since (their snapshot versions in ``before``)
+        re-indexed; otherwise each index is built in one pass.
+        """
+        self.ordered_ids = sorted(records)
+        self.candidates_db = {i: records[i] for i in self.ordered_ids}
+        self.resume_refs = {}
+        for candidate in self.candidates_db.values():
+            self.resume_refs[candidate.resume_path] = self.resume_refs.get(candidate.resume_path, 0) + 1
+        self.resume_texts = dict(texts or {})
+        candidates = self.candidates_db.values()
+        if indexes is None:
+            self.skill_index.bulk_load((c.id, c.skill_set) for c in candidates)
+            self.experience_index.bulk_load((c.id, c.years_of_experience) for c in candidates)
+            self.graduation_year_index.bulk_load((c.id, c.graduation_year) for c in candidates)
+            self.columns.bulk_load(list(candidates))
+            self.text_index.clear()
+            for candidate in candidates:
+                self.text_index.add(candidate.id, self._document(candidate))
+        else:
+            self._restore_indexes(indexes, before or {})
+        if self.identity_index is not None:
+            self.identity_index = {}
+            for candidate in candidates:
+                key = identity_key(candidate.full_name, candidate.dob, candidate.contact_number)
+                self.identity_index.setdefault(hash(key), candidate.id)
+    
+    def _restore_indexes(self, indexes: dict, before: Dict[int, Optional[CandidateRecord]]):
+        columns = self.columns
+        columns.restore(indexes["columns"])
+        ids = np.flatnonzero(columns.alive[:columns.size])
+        self.experience_index.bulk_load_arrays(ids, columns.experience[ids])
+        self.graduation_year_index.bulk_load_arrays(ids, columns.graduation_year[ids])
+        self.skill_index.restore(indexes["skills"])
+        self.text_index.restore(indexes["text"])
+        # The indexes are as of the snapshot: bring the records the log changed since up to date
+        for candidate_id, previous in before.items():
+            if previous is not None:
+                self._unindex(previous)
+            candidate = self.candidates_db.get(candidate_id)
+            if candidate is not None:
+                self._index(candidate)
     
     def clear_all(self):
         """Clear all data (for testing)"""
-        self.candidates_db.clear()
-        self.id_counter = 0
-        print("DEBUG - Cleared all data")
+        with self._writing():
+            self._log("clear", None)
+            self.id_counter = 0
+            self._load_records({})
+            self.changelog.append("clear", None)
+            self.idempotency.clear()
+        logger.debug("Cleared all data")
+
+def _merge_changes(existing: CandidateRecord, candidate_data: dict) -> dict:
+    """Updates a re-submission makes to a stored record: newer details win, skills accumulate"""
+    changes = {}
+    for name in MERGE_FIELDS:
+        value = candidate_data[name]
+        if name == "skill_set":
+            value = tuple(dict.fromkeys((*existing.skill_set, *value)))
+        if value != getattr(existing, name):
+            changes[name] = value
+    return changes
+
+class _SnapshotCapture:
+    """The store as of a snapshot, while the journal's thread writes it out.
+
+    Holds the live containers rather than copies. Writers call
+    ``preserve`` before changing a record, so the first change after the
+    capture keeps the version the snapshot needs. Ids issued later are
+    past ``id_counter`` and ``length`` and never looked at.
+    """
+    
+    def __init__(self, state: AppState):
+        self.id_counter = state.id_counter
+        self.candidates_db = state.candidates_db
+        self.resume_texts = state.resume_texts
+        self.ordered_ids = state.ordered_ids
+        self.length = len(state.ordered_ids)
+        self.columns = state.columns.export()
+        self.export_text = state.text_index.capture()
+        self.preserved: Dict[int, Tuple[Optional[CandidateRecord], Optional[bytes]]] = {}
+    
+    def preserve(self, candidate_id: int):
+        if candidate_id <= self.id_counter and candidate_id not in self.preserved:
+            self.preserved[candidate_id] = (self.candidates_db.get(candidate_id), self.resume_texts.get(candidate_id))
+    
+    def build(self) -> dict:
+        """Snapshot payload for Journal.snapshot: the rows plus the index data"""
+        text = self.export_text()
+        rows, processed, skills = [], {}, {}
+        db, texts, preserved, ordered = self.candidates_db, self.resume_texts, self.preserved, self.ordered_ids
+        for i in range(self.length):
+            candidate_id = ordered[i]
+            # Read the live version first: if a writer replaced it since, its preserved copy is already there
+            candidate, resume_text = db.get(candidate_id), texts.get(candidate_id)
+            saved = preserved.get(candidate_id)
+            if saved is not None:
+                candidate, resume_text = saved
+            if candidate is None:
+                continue
+            rows.append(record_to_row(candidate))
+            # Resumes still pending are left out, so a restart processes them again
+            if candidate.processing is not None and candidate.processing.get("status") != "pending":
+                processed[candidate_id] = (candidate.processing, resume_text)
+            for token in {normalize_skill(s) for s in candidate.skill_set}:
+                skills.setdefault(token, []).append(candidate_id)
+        return {
+            "id_counter": self.id_counter,
+            "rows": rows,
+            "processed": processed,
+            "indexes": {
+                "columns": self.columns,
+                "skills": {token: np.array(ids, dtype=np.int64) for token, ids in skills.items()},
+                "text": text,
+            },
+        }
+
+# Address of a shared store process (see app.shared_store); unset keeps the store in this process
+SHARED_STORE_ADDRESS = os.getenv("RESUME_STORE_ADDRESS")
 
 # Create a global instance
-app_state = AppState()
\ No newline at end of file
+if SHARED_STORE_ADDRESS:
+    from app.shared_store import connect
+    app_state = connect(SHARED_STORE_ADDRESS)
+else:
+    app_state = AppState()
\ No newline at end of file
@@ -0,0 +1,34 @@
+# app/utils/blob_codec.py
+import gzip
+import os
+import struct
+from typing import BinaryIO
+
+GZIP_SUFFIX = ".gz"  # appended to the blob name when stored compressed
+
+
+def is_compressed(file_path: str) -> bool:
+    return file_path.endswith(GZIP_SUFFIX)
+
+
+def resume_extension(file_path: str) -> str:
+    """Extension of the resume itself (".pdf"), ignoring any compression suffix"""
+    if is_compressed(file_path):
+        file_path = file_path[:-len(GZIP_SUFFIX)]
+    return os.path.splitext(file_path)[1].lower()
+
+
+def open_blob(file_path: str) -> BinaryIO:
+    """Open a stored resume for reading its original bytes, decompressing if needed"""
+    if is_compressed(file_path):
+        return gzip.open(file_path, "rb")
+    return open(file_path, "rb")
+
+
+def blob_size(file_path: str) -> int:
+    """Original size of a stored resume; gzip keeps it in its last four bytes"""
+    if not is_compressed(file_path):
+        return os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", f.read(4))[0]
@@ -0,0 +1,127 @@
+# app/utils/bulk_import.py
+import csv
+import io
+import json
+import os
+import tarfile
+import threading
+import zipfile
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+
+from app import schemas
+from app.utils import file_handler
+
+BATCH_SIZE = 500  # rows validated, stored and inserted together
+MAX_CONCURRENT_WRITES = 8  # resume files written in parallel per request
+
+
+def iter_metadata_rows(stream: BinaryIO, filename: str) -> Iterator[dict]:
+    """Return an iterator of raw metadata rows from an NDJSON (.ndjson/.jsonl) or CSV upload.
+
+    Undecodable NDJSON lines are yielded as ``{"_error": ...}`` so a bad
+    line fails only its own row.
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in (".ndjson", ".jsonl", ".csv"):
+        raise ValueError("Metadata must be .ndjson, .jsonl or .csv")
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if ext == ".csv":
+        return iter(csv.DictReader(text))
+    return _iter_ndjson(text)
+
+
+def _iter_ndjson(text: io.TextIOBase) -> Iterator[dict]:
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = {"_error": f"Invalid JSON: {e.msg}"}
+        yield row if isinstance(row, dict) else {"_error": "Row must be a JSON object"}
+
+
+def read_batch(rows: Iterator[dict]) -> List[dict]:
+    """Pull the next BATCH_SIZE rows (blocking); raises ValueError on unreadable input"""
+    try:
+        return list(islice(rows, BATCH_SIZE))
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV: {e}")
+
+
+def parse_row(row: dict) -> Tuple[schemas.CandidateCreate, str]:
+    """Validate a metadata row; returns the candidate and its resume member name"""
+    if "_error" in row:
+        raise ValueError(row["_error"])
+    row = dict(row)
+    resume = row.pop("resume", None)
+    if not resume:
+        raise ValueError("Missing resume file name")
+    if isinstance(row.get("skill_set"), str):
+        try:
+            row["skill_set"] = json.loads(row["skill_set"])
+        except json.JSONDecodeError:
+            raise ValueError("Invalid skill_set format. Must be a JSON array.")
+    try:
+        return schemas.CandidateCreate.model_validate(row), resume
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+        ))
+
+
+class ResumeArchive:
+    """Read-only view of a zip or tar archive of resumes, keyed by member name"""
+
+    def __init__(self, stream: BinaryIO, filename: str):
+        name = (filename or "").lower()
+        if name.endswith(".zip"):
+            # ZipFile serializes reads on its shared file handle itself
+            self._zip = zipfile.ZipFile(stream)
+            self._tar = None
+        elif name.endswith((".tar", ".tar.gz", ".tgz")):
+            self._zip = None
+            self._tar = tarfile.open(fileobj=stream, mode="r:*")
+            # tar members share one file position, so reads must not interleave
+            self._lock = threading.Lock()
+        else:
+            raise ValueError("Resumes must be a .zip, .tar, .tar.gz or .tgz archive")
+
+    def save_member(self, member: str) -> file_handler.SavedFile:
+        """Copy one member into the blob store (blocking)"""
+        if self._zip is not None:
+            try:
+                source = self._zip.open(member)
+            except KeyError:
+                raise ValueError(f"Resume not found in archive: {member}")
+            with source:
+                return file_handler.save_resume_stream(source, member)
+
+        # Only the read holds the lock; hashing, fsync and the rename of
+        # concurrent members overlap. One byte past the limit is enough to
+        # refuse an oversized member.
+        with self._lock:
+            try:
+                source = self._tar.extractfile(member)
+            except KeyError:
+                source = None
+            if source is None:
+                raise ValueError(f"Resume not found in archive: {member}")
+            with source:
+                data = source.read(file_handler.MAX_FILE_SIZE + 1)
+        return file_handler.save_resume_stream(io.BytesIO(data), member)
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
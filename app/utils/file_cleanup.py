@@ -0,0 +1,211 @@
+# app/utils/file_cleanup.py
+import heapq
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from app import crud
+from app.cache import file_stat_cache
+from app.metrics import file_deletions, file_operation_duration, orphan_files_swept
+from app.utils.file_handler import UPLOAD_DIR
+
+DELETE_BATCH = 64  # blobs unlinked per store round trip
+DELETE_RETRIES = 5  # attempts before a failing unlink is given up
+DELETE_RETRY_DELAY = 1.0  # seconds before the first retry, doubled per attempt
+BLOB_GRACE_SECONDS = 60.0  # blobs touched this recently are left alone for now
+# Seconds between orphan sweeps of the upload directory; 0 disables the sweeper
+SWEEP_INTERVAL = float(os.getenv("RESUME_SWEEP_INTERVAL", "3600"))
+
+logger = logging.getLogger(__name__)
+
+# Blobs (<sha256><ext>, plus .gz if compressed) and leftover temp files of interrupted uploads; nothing else is swept
+_UPLOAD_FILE = re.compile(r"^(?:[0-9a-f]{64}\.\w+(?:\.gz)?|\.[0-9a-f]{32}\.part)$")
+
+
+class DeletionQueue:
+    """Background unlinking of resume blobs that lost their last reference.
+
+    Requests only enqueue a path. A worker thread drains the queue in
+    batches, asks the store once per batch which paths are referenced
+    again (a later upload may have deduplicated onto the same blob), and
+    unlinks the rest. Blobs modified within ``BLOB_GRACE_SECONDS`` are
+    deferred, since a deduplicated upload touches the blob before its
+    candidate is stored. Failed unlinks are retried with backoff.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Tuple[str, int]]]" = queue.Queue()
+        self._delayed: List[Tuple[float, str, int]] = []  # heap of (due, path, attempt)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def put(self, path: str, attempt: int = 0):
+        self._ensure_started()
+        self._queue.put((path, attempt))
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._delayed)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="blob-deleter", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Finish the queued deletions (not the delayed ones) and stop the worker"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _next_batch(self, block: bool) -> Tuple[List[Tuple[str, int]], bool]:
+        """Wait (if ``block``) until work is due; returns (batch, stop requested)"""
+        timeout = max(0.0, self._delayed[0][0] - time.monotonic()) if self._delayed else None
+        batch, stopping = [], False
+        try:
+            item = self._queue.get(timeout=timeout) if block else self._queue.get_nowait()
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= DELETE_BATCH:
+                    break
+                item = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now and len(batch) < DELETE_BATCH:
+            _, path, attempt = heapq.heappop(self._delayed)
+            batch.append((path, attempt))
+        return batch, stopping
+
+    def _run(self):
+        stopping = False
+        while True:
+            batch, stop = self._next_batch(block=not stopping)
+            stopping = stopping or stop
+            if batch:
+                try:
+                    self._process(batch)
+                except Exception:
+                    logger.exception("Error processing blob deletions")
+                    for path, attempt in batch:
+                        self._retry(path, attempt)
+            elif stopping:
+                return
+
+    def _retry(self, path: str, attempt: int):
+        if attempt + 1 >= DELETE_RETRIES:
+            file_deletions.inc(result="failed")
+            logger.error("Giving up deleting %s after %s attempts", path, attempt + 1)
+            return
+        delay = DELETE_RETRY_DELAY * 2 ** attempt
+        heapq.heappush(self._delayed, (time.monotonic() + delay, path, attempt + 1))
+
+    def _process(self, batch: List[Tuple[str, int]]):
+        paths = list(dict.fromkeys(path for path, _ in batch))
+        in_use = crud.resumes_in_use(paths)
+        attempts = dict(batch)
+        for path in paths:
+            if path in in_use:
+                file_deletions.inc(result="in_use")
+                continue
+            try:
+                with file_operation_duration.time(operation="delete"):
+                    age = time.time() - os.stat(path).st_mtime
+                    if age < BLOB_GRACE_SECONDS:
+                        # Grace deferrals do not use up retries
+                        heapq.heappush(self._delayed, (time.monotonic() + BLOB_GRACE_SECONDS - age, path, attempts[path]))
+                        file_deletions.inc(result="deferred")
+                        continue
+                    file_stat_cache.discard(path)
+                    os.remove(path)
+                file_deletions.inc(result="deleted")
+                logger.debug("Deleted file %s", path)
+            except FileNotFoundError:
+                file_deletions.inc(result="missing")
+            except OSError as e:
+                file_deletions.inc(result="retry")
+                logger.warning("Error deleting file %s: %s", path, e)
+                self._retry(path, attempts[path])
+
+
+deletion_queue = DeletionQueue()
+
+
+def schedule_deletion(path: Optional[str]):
+    """Queue a resume blob for removal once nothing references it; never blocks"""
+    if path:
+        deletion_queue.put(path)
+
+
+def _iter_upload_files(directory: str) -> Iterable[Tuple[str, float]]:
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not _UPLOAD_FILE.match(name):
+                continue
+            path = os.path.join(root, name)
+            try:
+                yield path, os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+
+
+def sweep_orphans(directory: str = UPLOAD_DIR) -> int:
+    """Queue every file under ``directory`` the store does not reference; returns how many.
+
+    Leftover ``.part`` files from interrupted uploads are included. Files
+    newer than the grace period are skipped so in-flight uploads survive,
+    and the deletion queue re-checks references before unlinking.
+    """
+    referenced = {os.path.normpath(path) for path in crud.resume_paths()}
+    cutoff = time.time() - BLOB_GRACE_SECONDS
+    orphans = 0
+    for path, mtime in _iter_upload_files(directory):
+        if mtime < cutoff and os.path.normpath(path) not in referenced:
+            deletion_queue.put(path)
+            orphans += 1
+    orphan_files_swept.inc(orphans)
+    if orphans:
+        logger.info("Queued %s orphaned upload files for deletion", orphans)
+    return orphans
+
+
+class OrphanSweeper:
+    """Runs sweep_orphans every ``interval`` seconds on a background thread"""
+
+    def __init__(self, interval: float = SWEEP_INTERVAL):
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="orphan-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # The first sweep waits a full interval, so startup stays cheap
+        while not self._stopped.wait(self.interval):
+            try:
+                sweep_orphans()
+            except Exception:
+                logger.exception("Error sweeping orphaned uploads")
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+orphan_sweeper = OrphanSweeper()
@@ -1,76 +1,430 @@
 # app/utils/file_handler.py
 import os
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+import zlib
 import aiofiles
+import aiofiles.os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from fastapi import UploadFile, HTTPException
-from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Callable, NamedTuple, Optional, Tuple, TypeVar
 import uuid
 
+from app.cache import file_stat_cache
+from app.metrics import compression_bytes, compression_cpu, compression_skipped, file_operation_duration, upload_bytes
+from app.utils.blob_codec import GZIP_SUFFIX, open_blob
+
 UPLOAD_DIR = "uploads"
 ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_FORM_OVERHEAD = 64 * 1024  # bytes of other form fields and multipart framing allowed per upload
+UPLOAD_PATHS = {"/api/candidates/", "/api/candidates"}  # POST routes carrying a single resume
+CHUNK_SIZE = 64 * 1024  # 64KB
+FSYNC_ON_SAVE = True  # fsync each resume before it is renamed into place
+FILE_IO_WORKERS = 8  # threads doing blocking file I/O for the event loop
+# Codec for newly stored resumes: "gzip", or "off" to store them as uploaded
+COMPRESSION = os.getenv("RESUME_COMPRESSION", "off").lower()
+COMPRESSION_LEVEL = int(os.getenv("RESUME_COMPRESSION_LEVEL", "6"))  # 1 (fastest) to 9 (smallest)
+COMPRESSION_MIN_BYTES = int(os.getenv("RESUME_COMPRESSION_MIN_BYTES", "4096"))  # smaller resumes are stored as is
+COMPRESSION_MAX_RATIO = 0.9  # keep the original unless compression saves at least 10%
+COMPRESSION_WORKERS = 2  # threads compressing uploads, apart from the file I/O pool
+PRECOMPRESSED_EXTENSIONS = {".docx"}  # zip containers, which gain nothing from another pass
+
+logger = logging.getLogger(__name__)
+
+if COMPRESSION not in ("off", "gzip"):
+    logger.warning("Unknown RESUME_COMPRESSION %r; storing resumes uncompressed", COMPRESSION)
+    COMPRESSION = "off"
+
+T = TypeVar("T")
+
+# Dedicated pool, so a slow disk queues file work here instead of
+# exhausting the threads that serve sync endpoints
+io_executor = ThreadPoolExecutor(max_workers=FILE_IO_WORKERS, thread_name_prefix="file-io")
+# CPU-bound compression gets its own threads, so it never holds up plain file I/O
+compress_executor = ThreadPoolExecutor(max_workers=COMPRESSION_WORKERS, thread_name_prefix="blob-compress")
+
+async def run_file_io(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking file-system call on the file I/O pool"""
+    return await asyncio.get_running_loop().run_in_executor(io_executor, partial(fn, *args, **kwargs))
+
+def touch_existing(file_path: str) -> bool:
+    """Refresh an existing blob's mtime; False if it does not exist.
+
+    A deduplicated upload touches the blob it shares, which tells the
+    deletion queue and orphan sweeper (app.utils.file_cleanup) that the
+    blob is about to gain a reference.
+    """
+    try:
+        os.utime(file_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+class SavedFile(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    deduplicated: bool
+
+def blob_path(sha256: str, file_ext: str) -> str:
+    """Return the content-addressed path for a blob, sharded by hash prefix"""
+    return os.path.join(UPLOAD_DIR, sha256[:2], sha256[2:4], f"{sha256}{file_ext}")
+
+def find_blob(sha256: str, file_ext: str) -> Optional[str]:
+    """Path of the stored blob with this content, raw or compressed, or None.
+
+    A blob that is found is touched (see touch_existing).
+    """
+    file_path = blob_path(sha256, file_ext)
+    for candidate in (file_path, file_path + GZIP_SUFFIX):
+        if touch_existing(candidate):
+            return candidate
+    return None
 
 # Create upload directory if it doesn't exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-async def save_resume_file(file: UploadFile, candidate_name: str) -> str:
-    """Save uploaded resume file and return the file path"""
-    
-    # Check file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
+def _temp_path() -> str:
+    return os.path.join(UPLOAD_DIR, f".{uuid.uuid4().hex}.part")
+
+def _check_extension(filename: str) -> str:
+    file_ext = os.path.splitext(filename or "")[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400, 
             detail=f"File type not allowed. Allowed types: {ALLOWED_EXTENSIONS}"
         )
+    return file_ext
+
+def _file_too_large() -> HTTPException:
+    # Same status as UploadLimitMiddleware, which catches most oversized bodies first
+    return HTTPException(
+        status_code=413, 
+        detail=f"File too large. Max size: {MAX_FILE_SIZE//(1024*1024)}MB"
+    )
+
+def _saved(saved: SavedFile, started: float) -> SavedFile:
+    file_operation_duration.observe(time.perf_counter() - started, operation="save")
+    if not saved.deduplicated:
+        upload_bytes.inc(saved.size)
+    return saved
+
+def should_compress(file_ext: str, size: int) -> bool:
+    """Whether a new blob is worth compressing under the current settings"""
+    if COMPRESSION == "off":
+        return False
+    if file_ext in PRECOMPRESSED_EXTENSIONS:
+        compression_skipped.inc(reason="precompressed")
+        return False
+    if size < COMPRESSION_MIN_BYTES:
+        compression_skipped.inc(reason="small")
+        return False
+    return True
+
+def _gzip_file(source_path: str) -> Optional[str]:
+    """Gzip a finished temp file into a new temp file, chunk by chunk.
+
+    Returns the new path, or None when the content does not compress
+    well enough to be worth decompressing on every read.
+    """
+    started = time.thread_time()
+    target_path = _temp_path()
+    try:
+        with open(source_path, "rb") as source:
+            # PDFs whose streams are already deflated give up after one cheap sample
+            sample = source.read(CHUNK_SIZE)
+            if len(zlib.compress(sample, 1)) > len(sample) * COMPRESSION_MAX_RATIO:
+                compression_skipped.inc(reason="incompressible")
+                return None
+            source.seek(0)
+            with open(target_path, "wb") as target:
+                # No name or timestamp in the header, so equal content compresses to equal bytes
+                with gzip.GzipFile("", "wb", COMPRESSION_LEVEL, target, mtime=0) as out:
+                    while chunk := source.read(CHUNK_SIZE):
+                        out.write(chunk)
+                original, stored = source.tell(), target.tell()
+        if stored > original * COMPRESSION_MAX_RATIO:
+            os.remove(target_path)
+            compression_skipped.inc(reason="incompressible")
+            return None
+    except BaseException:
+        try:
+            os.remove(target_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        compression_cpu.inc(time.thread_time() - started, operation="compress")
+    compression_bytes.inc(original, side="original")
+    compression_bytes.inc(stored, side="stored")
+    return target_path
+
+def fsync_directory(directory: str):
+    """fsync a directory, making renames and new entries in it durable"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def store_blob(temp_path: str, sha256: str, file_ext: str, compress: bool) -> str:
+    """Move a finished temp file into the blob store (blocking); returns the blob path.
+
+    With ``compress`` the blob is stored gzipped as ``<sha256><ext>.gz``
+    when that pays off. The hash, and so the path and ETag, is always of
+    the original bytes.
+    """
+    file_path = blob_path(sha256, file_ext)
+    if compress:
+        compressed_path = _gzip_file(temp_path)
+        if compressed_path is not None:
+            os.remove(temp_path)
+            temp_path, file_path = compressed_path, file_path + GZIP_SUFFIX
+    if FSYNC_ON_SAVE:
+        with open(temp_path, "r+b") as f:
+            os.fsync(f.fileno())
+    directory = os.path.dirname(file_path)
+    created = not os.path.isdir(directory)
+    os.makedirs(directory, exist_ok=True)
+    os.replace(temp_path, file_path)
+    if FSYNC_ON_SAVE:
+        # The rename, and any shard directories just created, must survive a crash too
+        fsync_directory(directory)
+        if created:
+            fsync_directory(os.path.dirname(directory))
+            fsync_directory(UPLOAD_DIR)
+    return file_path
+
+class UploadLimitMiddleware:
+    """ASGI middleware rejecting oversized resume uploads while they are still arriving.
+
+    The form parser spools the whole body before a handler runs, so the
+    limit is enforced here: a declared Content-Length over the limit is
+    refused before anything is read, and a chunked body is counted as it
+    streams and cut off once it passes the limit. Either way the client
+    gets 413 and at most the limit is ever buffered. save_resume_file
+    still checks the exact file size.
+    """
+
+    def __init__(self, app, paths=UPLOAD_PATHS, max_body: int = MAX_FILE_SIZE + MAX_FORM_OVERHEAD):
+        self.app = app
+        self.paths = paths
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > self.max_body:
+            await self._reject(send)
+            return
+
+        received = 0
+        too_large = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # Looks like a dropped client to the app, which stops reading
+                    too_large = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app answers to the cut-off body is replaced by the 413
+            if not too_large:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not too_large:
+                raise
+        if too_large:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Request too large. Max resume size: {MAX_FILE_SIZE//(1024*1024)}MB"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+async def save_resume_file(file: UploadFile) -> SavedFile:
+    """Stream an uploaded resume into the blob store and return its path, hash and size.
+
+    The body is copied in chunks to a temporary name while it is hashed,
+    then renamed to ``uploads/ab/cd/<sha256><ext>`` (compressed first if
+    enabled). If that blob already exists the copy is dropped and the
+    existing file is shared.
+    """
     
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    await file.seek(0)
+    started = time.perf_counter()
+    # Check file extension
+    file_ext = _check_extension(file.filename)
     
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Max size: {MAX_FILE_SIZE//(1024*1024)}MB"
-        )
+    temp_path = _temp_path()
     
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    safe_name = "".join(c for c in candidate_name if c.isalnum() or c.isspace()).replace(" ", "_")
-    filename = f"{safe_name}_{timestamp}_{unique_id}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
+    # Stream to the temp file, enforcing the size limit as chunks arrive
+    digest = hashlib.sha256()
+    file_size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb", executor=io_executor) as buffer:
+            while chunk := await file.read(CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                digest.update(chunk)
+                await buffer.write(chunk)
+        
+        sha256 = digest.hexdigest()
+        file_path = await run_file_io(find_blob, sha256, file_ext)
+        deduplicated = file_path is not None
+        if deduplicated:
+            await aiofiles.os.remove(temp_path, executor=io_executor)
+        else:
+            compress = should_compress(file_ext, file_size)
+            file_path = await asyncio.get_running_loop().run_in_executor(
+                compress_executor if compress else io_executor, store_blob, temp_path, sha256, file_ext, compress
+            )
+    except BaseException:
+        try:
+            await aiofiles.os.remove(temp_path, executor=io_executor)
+        except OSError:
+            pass
+        raise
     
-    # Save file
-    async with aiofiles.open(file_path, "wb") as buffer:
-        content = await file.read()
-        await buffer.write(content)
+    return _saved(SavedFile(file_path, sha256, file_size, deduplicated), started)
+
+def save_resume_stream(stream: BinaryIO, filename: str) -> SavedFile:
+    """Blocking counterpart of save_resume_file for an open binary stream"""
+    started = time.perf_counter()
+    file_ext = _check_extension(filename)
+    temp_path = _temp_path()
     
-    return file_path
+    digest = hashlib.sha256()
+    file_size = 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            while chunk := stream.read(CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                digest.update(chunk)
+                buffer.write(chunk)
+        
+        sha256 = digest.hexdigest()
+        file_path = find_blob(sha256, file_ext)
+        deduplicated = file_path is not None
+        if deduplicated:
+            os.remove(temp_path)
+        else:
+            file_path = store_blob(temp_path, sha256, file_ext, should_compress(file_ext, file_size))
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    return _saved(SavedFile(file_path, sha256, file_size, deduplicated), started)
+
+async def stat_blob(file_path: str) -> os.stat_result:
+    """Stat a resume blob, answering repeat lookups from file_stat_cache"""
+    result = file_stat_cache.get(file_path)
+    if result is None:
+        result = await run_file_io(os.stat, file_path)
+        file_stat_cache.put(file_path, result)
+    return result
+
+def blob_etag(file_path: str, encoding: Optional[str] = None) -> str:
+    """Strong ETag of a blob: the hash of its original content, which starts its file name.
+
+    A blob sent with a ``Content-Encoding`` is a different representation
+    and gets its own tag.
+    """
+    sha256 = os.path.basename(file_path).split(".", 1)[0]
+    return f'"{sha256}-{encoding}"' if encoding else f'"{sha256}"'
 
-async def delete_resume_file_async(file_path: str):
-    """Delete resume file from filesystem (async version)"""
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows a gzip-encoded response"""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "x-gzip"):
+            quality = params.replace(" ", "").lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Byte span (inclusive) requested by a single-range ``Range`` header.
+
+    None means the header is ignored and the whole file is sent (malformed,
+    another unit, or several ranges); ValueError means it cannot be
+    satisfied (416).
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"DEBUG - Deleted file: {file_path}")
-    except Exception as e:
-        print(f"Error deleting file: {e}")
-
-def delete_resume_file_sync(file_path: str):
-    """Delete resume file from filesystem (sync version)"""
+        if first:
+            start = int(first)
+            end = int(last) if last else max(start, size - 1)
+            if end < start:
+                return None
+        else:
+            suffix = int(last)
+            start, end = (max(size - suffix, 0) if suffix else size), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+def _read_blob(f: BinaryIO, size: int, offset: Optional[int] = None) -> bytes:
+    started = time.thread_time()
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"DEBUG - Deleted file: {file_path}")
-            return True
-    except Exception as e:
-        print(f"Error deleting file: {e}")
-    return False
+        if offset:
+            f.seek(offset)
+        return f.read(size)
+    finally:
+        compression_cpu.inc(time.thread_time() - started, operation="decompress")
+
+async def iter_blob(file_path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    """Yield bytes ``start`` to ``end`` (inclusive) of a compressed blob's original content.
 
-def get_file_url(file_path: str) -> str:
-    """Get file URL from file path"""
-    if file_path and os.path.exists(file_path):
-        filename = os.path.basename(file_path)
-        return f"/uploads/{filename}"
-    return None
\ No newline at end of file
+    Decompression runs on the file I/O pool one chunk at a time, and
+    the next chunk is only read once the previous one has been sent.
+    """
+    f = await run_file_io(open_blob, file_path)
+    try:
+        remaining = end - start + 1
+        offset = start
+        while remaining > 0:
+            chunk = await run_file_io(_read_blob, f, min(CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                break
+            offset = None
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await run_file_io(f.close)
@@ -0,0 +1,54 @@
+# app/utils/postprocess.py
+from typing import Dict, Optional
+
+from app.utils.blob_codec import open_blob
+from app.utils.text_extract import count_pages, extract_text
+
+PREVIEW_CHARS = 280  # length of the plain-text preview kept on the record
+SCAN_CHUNK = 1024 * 1024  # bytes read per scanner step
+
+# Known-bad byte patterns. The stub only knows the EICAR test string, which is
+# enough to exercise the rejection path end to end; a real engine replaces scan_file.
+SIGNATURES: Dict[str, bytes] = {
+    "EICAR-Test-File": rb"X5O!P%@AP[4\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*",
+}
+
+
+class ResumeRejected(Exception):
+    """Raised by a stage to stop processing a resume for good (never retried)"""
+
+
+def scan_file(file_path: str) -> Optional[str]:
+    """Name of the first signature found in the file, or None if it is clean"""
+    overlap = max(len(signature) for signature in SIGNATURES.values()) - 1
+    tail = b""
+    with open_blob(file_path) as f:
+        while chunk := f.read(SCAN_CHUNK):
+            window = tail + chunk
+            for name, signature in SIGNATURES.items():
+                if signature in window:
+                    return name
+            tail = window[-overlap:]
+    return None
+
+
+# Stage functions run in worker processes: they take the resume path and
+# return fields for the candidate's processing status. A "text" key is
+# moved into the search index instead.
+
+def virus_scan_stage(file_path: str) -> dict:
+    signature = scan_file(file_path)
+    if signature is not None:
+        raise ResumeRejected(f"infected: {signature}")
+    return {"virus_scan": "clean"}
+
+
+def extract_text_stage(file_path: str) -> dict:
+    text = extract_text(file_path)
+    # Text formats have no rendered thumbnail; a short plain-text preview stands in
+    preview = " ".join(text[:PREVIEW_CHARS * 2].split())[:PREVIEW_CHARS]
+    return {"text": text, "preview": preview or None}
+
+
+def page_count_stage(file_path: str) -> dict:
+    return {"page_count": count_pages(file_path)}
@@ -0,0 +1,134 @@
+# app/utils/text_extract.py
+import html
+import re
+import zipfile
+import zlib
+from typing import Optional
+
+from app.utils.blob_codec import open_blob, resume_extension
+
+MAX_TEXT_CHARS = 200_000  # longer resumes are truncated before indexing
+
+_XML_TAG = re.compile(r"<[^>]+>")
+_PDF_STREAM = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_PDF_TEXT_BLOCK = re.compile(rb"BT(.*?)ET", re.S)
+_PDF_STRING = re.compile(rb"\(((?:\\.|[^\\)])*)\)", re.S)
+_PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+_PRINTABLE_RUN = re.compile(rb"[\x20-\x7e\t\r\n]{4,}")
+_UTF16_RUN = re.compile(rb"(?:[\x20-\x7e]\x00){4,}")
+_PDF_PAGE = re.compile(rb"/Type\s*/Page\b")
+_PDF_PAGE_COUNT = re.compile(rb"/Count\s+(\d+)")
+_DOCX_PAGES = re.compile(r"<Pages>(\d+)</Pages>")
+
+
+def extract_text(file_path: str) -> str:
+    """Best-effort plain text of a PDF, DOCX or DOC resume, using only the stdlib.
+
+    Runs in a worker process; unreadable files yield an empty string
+    rather than an error so indexing never fails a candidate.
+    """
+    ext = resume_extension(file_path)
+    try:
+        if ext == ".docx":
+            text = _docx_text(file_path)
+        elif ext == ".pdf":
+            text = _pdf_text(file_path)
+        elif ext == ".doc":
+            text = _doc_text(file_path)
+        else:
+            text = ""
+    except (OSError, EOFError, zipfile.BadZipFile, KeyError, ValueError):
+        text = ""
+    return text[:MAX_TEXT_CHARS]
+
+
+def count_pages(file_path: str) -> Optional[int]:
+    """Page count of a PDF or DOCX resume, or None when the format does not say"""
+    ext = resume_extension(file_path)
+    try:
+        if ext == ".pdf":
+            return _pdf_pages(file_path)
+        if ext == ".docx":
+            with open_blob(file_path) as f, zipfile.ZipFile(f) as docx:
+                match = _DOCX_PAGES.search(docx.read("docProps/app.xml").decode("utf-8", "ignore"))
+            return int(match.group(1)) if match else None
+    except (OSError, EOFError, zipfile.BadZipFile, KeyError, ValueError):
+        pass
+    return None
+
+
+def _pdf_pages(file_path: str) -> Optional[int]:
+    with open_blob(file_path) as f:
+        data = f.read()
+    # Page objects may sit in plain text or inside compressed object streams
+    bodies = [data]
+    for match in _PDF_STREAM.finditer(data):
+        try:
+            bodies.append(zlib.decompress(match.group(1)))
+        except zlib.error:
+            pass
+    pages = sum(len(_PDF_PAGE.findall(body)) for body in bodies)
+    if pages:
+        return pages
+    counts = [int(n) for body in bodies for n in _PDF_PAGE_COUNT.findall(body)]
+    return max(counts) if counts else None
+
+
+def _docx_text(file_path: str) -> str:
+    with open_blob(file_path) as f, zipfile.ZipFile(f) as docx:
+        xml = docx.read("word/document.xml").decode("utf-8", "ignore")
+    xml = xml.replace("</w:p>", "\n").replace("<w:tab/>", "\t")
+    return html.unescape(_XML_TAG.sub("", xml))
+
+
+def _pdf_text(file_path: str) -> str:
+    with open_blob(file_path) as f:
+        data = f.read()
+    chunks = []
+    for match in _PDF_STREAM.finditer(data):
+        stream = match.group(1)
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for block in _PDF_TEXT_BLOCK.finditer(stream):
+            chunks.extend(_unescape_pdf(s) for s in _PDF_STRING.findall(block.group(1)))
+    if not chunks:
+        # Plain text files saved with a .pdf name (and some tiny PDFs) have no text operators
+        return _doc_text_from_bytes(data)
+    return " ".join(chunks)
+
+
+def _unescape_pdf(raw: bytes) -> str:
+    out = bytearray()
+    i = 0
+    while i < len(raw):
+        byte = raw[i:i + 1]
+        if byte == b"\\" and i + 1 < len(raw):
+            nxt = raw[i + 1:i + 2]
+            if nxt in _PDF_ESCAPES:
+                out += _PDF_ESCAPES[nxt]
+                i += 2
+                continue
+            octal = re.match(rb"[0-7]{1,3}", raw[i + 1:i + 4])
+            if octal:
+                out.append(int(octal.group(0), 8) & 0xFF)
+                i += 1 + len(octal.group(0))
+                continue
+            out += nxt
+            i += 2
+            continue
+        out += byte
+        i += 1
+    return out.decode("latin-1")
+
+
+def _doc_text(file_path: str) -> str:
+    with open_blob(file_path) as f:
+        return _doc_text_from_bytes(f.read())
+
+
+def _doc_text_from_bytes(data: bytes) -> str:
+    runs = [run.decode("ascii") for run in _PRINTABLE_RUN.findall(data)]
+    runs += [run.decode("utf-16-le") for run in _UTF16_RUN.findall(data)]
+    return "\n".join(runs)
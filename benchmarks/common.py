@@ -0,0 +1,104 @@
+# benchmarks/common.py
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Skill vocabulary for synthetic candidates: a few popular skills plus a long tail
+COMMON_SKILLS = ["Python", "Java", "Go", "Rust", "SQL", "Docker", "AWS", "React", "Kubernetes", "TypeScript"]
+SKILLS = COMMON_SKILLS + [f"Skill{i}" for i in range(490)]
+QUALIFICATIONS = ["BSc Computer Science", "MSc Data Science", "BEng Software", "MBA", "PhD Physics"]
+
+
+def quiet_app_logging():
+    """Keep per-request access logs out of benchmark output unless asked for"""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def synthetic_candidate(rng: random.Random) -> dict:
+    """Candidate fields as accepted by AppState.add_candidate"""
+    weights = [10] * len(COMMON_SKILLS) + [1] * (len(SKILLS) - len(COMMON_SKILLS))
+    return {
+        "full_name": f"Candidate {rng.randrange(10**9)}",
+        "dob": date(1970 + rng.randrange(35), 1 + rng.randrange(12), 1 + rng.randrange(28)),
+        "contact_number": f"+1{rng.randrange(10**9, 10**10)}",
+        "contact_address": f"{rng.randrange(1, 9999)} Main St",
+        "education_qualification": rng.choice(QUALIFICATIONS),
+        "graduation_year": 1995 + rng.randrange(30),
+        "years_of_experience": rng.randrange(25),
+        "skill_set": list(dict.fromkeys(rng.choices(SKILLS, weights, k=rng.randint(2, 6)))),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    values = sorted(d * 1000 for d in durations)
+    return {
+        "count": len(values),
+        "min_ms": round(values[0], 4) if values else 0.0,
+        "mean_ms": round(sum(values) / len(values), 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 4),
+        "p90_ms": round(percentile(values, 0.90), 4),
+        "p99_ms": round(percentile(values, 0.99), 4),
+        "max_ms": round(values[-1], 4) if values else 0.0,
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1, max_seconds: float = 10.0) -> Dict[str, float]:
+    """Time ``repeat`` calls of ``fn`` after ``warmup`` untimed calls, stopping early after ``max_seconds``"""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+        if started > deadline:
+            break
+    return summarize(durations)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(suite: str, params: dict, results: List[dict], output: Optional[str]):
+    """Write the results document to ``output``, or to stdout when no path is given"""
+    document = {"suite": suite, "environment": environment(), "params": params, "results": results}
+    text = json.dumps(document, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {len(results)} results to {output}", file=sys.stderr)
+    else:
+        print(text)
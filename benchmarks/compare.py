@@ -0,0 +1,64 @@
+# benchmarks/compare.py
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when any p50 latency grew (or throughput fell) by more
+than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def _metrics(document: dict) -> Dict[Tuple, Tuple[float, bool]]:
+    """Map each result to (value, higher_is_better) under a stable key"""
+    metrics = {}
+    for result in document["results"]:
+        if document["suite"] == "micro":
+            if "p50_ms" in result:
+                metrics[(result["size"], result["group"], result["name"], "p50_ms")] = (result["p50_ms"], False)
+        else:
+            workload = result["workload"]
+            metrics[(workload, "throughput_rps")] = (result["throughput_rps"], True)
+            for operation, stats in result["operations"].items():
+                metrics[(workload, operation, "p50_ms")] = (stats["p50_ms"], False)
+                metrics[(workload, operation, "p99_ms")] = (stats["p99_ms"], False)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["suite"] != candidate["suite"]:
+        sys.exit(f"Cannot compare a {baseline['suite']} run with a {candidate['suite']} run")
+
+    before, after = _metrics(baseline), _metrics(candidate)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys(), key=str):
+        (old, higher_is_better), (new, _) = before[key], after[key]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = ""
+        # p99 is too noisy to gate on; it is reported but never fails the run
+        if worse > args.threshold and key[-1] != "p99_ms":
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{' / '.join(map(str, key))}: {old:g} -> {new:g} ({change:+.1%}){flag}")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/load.py
+"""In-process load generator: drives app.main:app through httpx's ASGI transport.
+
+    python -m benchmarks.load --workload mixed --requests 5000 --concurrency 32 --output load.json
+
+No sockets are involved, so the numbers measure the application stack
+(routing, validation, the store, serialization, file handling) rather
+than the network.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.common import quiet_app_logging, summarize, synthetic_candidate, write_results
+
+# Operation mix per workload, as relative weights
+WORKLOADS: Dict[str, Dict[str, int]] = {
+    "mixed": {"create": 10, "list": 35, "list_filtered": 15, "get": 25, "update": 10, "delete": 5},
+    "read_heavy": {"list": 45, "list_filtered": 20, "get": 35},
+    "upload": {"create": 1},
+}
+# Resume sizes drawn for uploads, in bytes
+UPLOAD_SIZES = (2 * 1024, 64 * 1024, 512 * 1024, 2 * 1024 * 1024)
+
+
+class LoadRun:
+    """State shared by the workers of one run: known ids, latencies and errors"""
+
+    def __init__(self, client, rng: random.Random, unique_uploads: bool):
+        self.client = client
+        self.rng = rng
+        self.unique_uploads = unique_uploads
+        self.ids: List[int] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def resume(self) -> bytes:
+        size = self.rng.choice(UPLOAD_SIZES)
+        if not self.unique_uploads:
+            return b"%PDF-1.4 benchmark resume".ljust(size, b"\0")
+        return self.rng.randbytes(size)
+
+    async def create(self):
+        fields = synthetic_candidate(self.rng)
+        data = {key: str(value) for key, value in fields.items() if key != "skill_set"}
+        data["skill_set"] = json.dumps(fields["skill_set"])
+        response = await self.client.post(
+            "/api/candidates/", data=data, files={"resume": ("resume.pdf", self.resume(), "application/pdf")}
+        )
+        if response.status_code == 201:
+            self.ids.append(response.json()["id"])
+        return response, 201
+
+    async def list(self):
+        return await self.client.get("/api/candidates/", params={"limit": 50}), 200
+
+    async def list_filtered(self):
+        params = {"skill": self.rng.choice(["python", "go", "sql", "docker"]),
+                  "experience": self.rng.randrange(10), "limit": 20}
+        return await self.client.get("/api/candidates/", params=params), 200
+
+    async def get(self):
+        return await self.client.get(f"/api/candidates/{self.rng.choice(self.ids)}"), (200, 404)
+
+    async def update(self):
+        body = {"years_of_experience": self.rng.randrange(25), "skill_set": ["Python", "Go"]}
+        return await self.client.put(f"/api/candidates/{self.rng.choice(self.ids)}", json=body), (200, 404)
+
+    async def delete(self):
+        candidate_id = self.ids.pop(self.rng.randrange(len(self.ids)))
+        return await self.client.delete(f"/api/candidates/{candidate_id}"), (204, 404)
+
+    async def run_one(self, operation: str):
+        # Reads and writes of existing candidates need something to act on
+        if operation in ("get", "update", "delete") and not self.ids:
+            operation = "create"
+        started = time.perf_counter()
+        try:
+            response, expected = await getattr(self, operation)()
+            ok = response.status_code in (expected if isinstance(expected, tuple) else (expected,))
+        except Exception:
+            ok = False
+        self.latencies[operation].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[operation] += 1
+
+
+async def seed(run: LoadRun, count: int):
+    for _ in range(count):
+        await run.create()
+
+
+async def run_workload(app, workload: str, requests: int, concurrency: int, seed_count: int,
+                       rng_seed: int, unique_uploads: bool) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        rng = random.Random(rng_seed)
+        run = LoadRun(client, rng, unique_uploads)
+        await seed(run, seed_count)
+
+        mix = WORKLOADS[workload]
+        operations = rng.choices(list(mix), weights=list(mix.values()), k=requests)
+        queue: asyncio.Queue = asyncio.Queue()
+        for operation in operations:
+            queue.put_nowait(operation)
+
+        async def worker():
+            while not queue.empty():
+                await run.run_one(queue.get_nowait())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [d for durations in run.latencies.values() for d in durations]
+    return {
+        "workload": workload,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "errors": sum(run.errors.values()),
+        "latency": summarize(all_latencies),
+        "operations": {
+            operation: {**summarize(durations), "errors": run.errors.get(operation, 0)}
+            for operation, durations in sorted(run.latencies.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), nargs="+", default=["mixed", "upload"])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per workload")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--seed-candidates", type=int, default=500, help="Candidates created before timing starts")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the request mix and payloads")
+    parser.add_argument("--unique-uploads", action="store_true",
+                        help="Random resume bodies, so every upload writes a new blob instead of deduplicating")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    quiet_app_logging()
+    output = os.path.abspath(args.output) if args.output else None
+    # Uploads land in ./uploads, so run inside a scratch directory
+    with tempfile.TemporaryDirectory(prefix="resume-bench-") as workdir:
+        os.chdir(workdir)
+        from app import processing
+        from app.main import app
+        from app.state import app_state
+
+        results = []
+        for workload in args.workload:
+            app_state.clear_all()
+            result = asyncio.run(run_workload(
+                app, workload, args.requests, args.concurrency, args.seed_candidates, args.seed, args.unique_uploads
+            ))
+            latency = result["latency"]
+            print(f"{workload}: {result['throughput_rps']} req/s, p50 {latency['p50_ms']:.3f}ms, "
+                  f"p99 {latency['p99_ms']:.3f}ms, {result['errors']} errors", file=sys.stderr)
+            results.append(result)
+        processing.shutdown()
+
+    write_results("load", vars(args), results, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/micro.py
+"""Micro-benchmarks of the store, CRUD and response-building paths.
+
+    python -m benchmarks.micro --sizes 10000 100000 1000000 --output micro.json
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+
+from benchmarks.common import measure, quiet_app_logging, synthetic_candidate, write_results
+
+quiet_app_logging()
+
+from app import crud, schemas  # noqa: E402
+from app.state import AppState  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+POPULATE_BATCH = 10_000
+PAGE_SIZE = 100
+
+
+def populate(state: AppState, size: int, seed: int) -> float:
+    """Fill the store with ``size`` synthetic candidates; returns the seconds it took"""
+    rng = random.Random(seed)
+    state.clear_all()
+    gc.collect()
+    started = time.perf_counter()
+    for offset in range(0, size, POPULATE_BATCH):
+        batch = min(POPULATE_BATCH, size - offset)
+        state.add_candidates([(synthetic_candidate(rng), f"uploads/bench/{i % 1000}.pdf") for i in range(batch)])
+    return time.perf_counter() - started
+
+
+def cases(state: AppState, size: int):
+    """(group, name, callable, repeat) for every micro-benchmark at this store size"""
+    # Full materialization is linear in the store, so it gets fewer repeats
+    scan_repeat = max(3, 2_000_000 // size)
+    middle_id = size // 2
+
+    _, first_page, _ = crud.get_candidates(limit=PAGE_SIZE)
+
+    def render_cold():
+        for candidate in first_page:
+            candidate.json_bytes = None
+        return crud.render_candidate_page(size, first_page, None)
+
+    yield "filter_candidates", "unfiltered", lambda: state.filter_candidates(), scan_repeat
+    yield "filter_candidates", "skill=python", lambda: state.filter_candidates(skill="python"), scan_repeat
+    yield "filter_candidates", "skill=skill12 (substring)", lambda: state.filter_candidates(skill="skill12"), 50
+    yield "filter_candidates", "experience 5..10", lambda: state.filter_candidates(experience=5, experience_max=10), scan_repeat
+    yield "filter_candidates", "skill+experience+graduation_year", lambda: state.filter_candidates(
+        skill="python", experience=10, graduation_year_from=2010), scan_repeat
+
+    yield "get_candidates", "first page", lambda: crud.get_candidates(limit=PAGE_SIZE), 500
+    yield "get_candidates", "skip to middle", lambda: crud.get_candidates(skip=size // 2, limit=PAGE_SIZE), scan_repeat
+    yield "get_candidates", "cursor at middle", lambda: crud.get_candidates(after_id=middle_id, limit=PAGE_SIZE), 500
+    yield "get_candidates", "skill=python page", lambda: crud.get_candidates(skill="python", limit=PAGE_SIZE), 200
+    yield "get_candidates", "experience range page", lambda: crud.get_candidates(
+        experience=3, experience_max=6, limit=PAGE_SIZE), 200
+
+    yield "response", "page body (cached json)", lambda: crud.render_candidate_page(size, first_page, None), 500
+    yield "response", "page body (cold json)", render_cold, 200
+    yield "response", "pydantic list response", lambda: schemas.CandidateListResponse(
+        total=size, candidates=[schemas.CandidateResponse.model_validate(c) for c in first_page]
+    ).model_dump_json(), 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Store sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the synthetic candidates")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Time budget per benchmark")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    state = AppState()
+    results = []
+    for size in args.sizes:
+        seconds = populate(state, size, args.seed)
+        print(f"[{size}] populated in {seconds:.2f}s", file=sys.stderr)
+        results.append({"size": size, "group": "populate", "name": "add_candidates", "seconds": round(seconds, 4)})
+        for group, name, fn, repeat in cases(state, size):
+            stats = measure(fn, repeat, max_seconds=args.max_seconds)
+            print(f"[{size}] {group} / {name}: p50 {stats['p50_ms']:.3f}ms p99 {stats['p99_ms']:.3f}ms", file=sys.stderr)
+            results.append({"size": size, "group": group, "name": name, **stats})
+    state.clear_all()
+
+    write_results("micro", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
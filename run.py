@@ -1,5 +1,36 @@
 # run.py
+import argparse
+import multiprocessing
+import os
+import secrets
 import uvicorn
 
+from app import shared_store
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Resume Management API")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes; more than one shares a store process")
+    parser.add_argument("--store-address", default="127.0.0.1:8765",
+                        help="host:port the shared store listens on when --workers > 1")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # One process owns the candidates; every worker connects to it
+        os.environ["RESUME_STORE_AUTHKEY"] = secrets.token_hex(16)
+        store = multiprocessing.Process(
+            target=shared_store.serve,
+            args=(args.store_address, os.getenv("RESUME_DATA_DIR")),
+            name="resume-store",
+            daemon=True
+        )
+        store.start()
+        # Set only after the store starts, so the store itself keeps a local AppState
+        os.environ["RESUME_STORE_ADDRESS"] = args.store_address
+        try:
+            uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=False, workers=args.workers)
+        finally:
+            store.terminate()
+            store.join()
+    else:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=False)
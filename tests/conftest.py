@@ -0,0 +1,22 @@
+# tests/conftest.py
+import pytest
+
+from app.state import AppState
+
+
+@pytest.fixture
+def fresh_state():
+    """Factory for independent AppState instances; restores the app's singleton afterwards"""
+    previous = AppState._instance
+    created = []
+
+    def make() -> AppState:
+        AppState._instance = None
+        state = AppState()
+        created.append(state)
+        return state
+
+    yield make
+    for state in created:
+        state.close()
+    AppState._instance = previous
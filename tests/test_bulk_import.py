@@ -0,0 +1,52 @@
+# tests/test_bulk_import.py
+import io
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils import file_handler
+from app.utils.bulk_import import ResumeArchive
+
+
+def tar_archive(members: dict) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def test_tar_members_are_stored_concurrently(monkeypatch):
+    # Both saves must be in flight at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    stored = {}
+
+    def save_resume_stream(stream, filename):
+        barrier.wait()
+        stored[filename] = stream.read()
+        return filename
+
+    monkeypatch.setattr(file_handler, "save_resume_stream", save_resume_stream)
+    members = {"a.pdf": b"first resume", "b.pdf": b"second resume"}
+    with ResumeArchive(tar_archive(members), "resumes.tar") as archive:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            assert sorted(pool.map(archive.save_member, members)) == ["a.pdf", "b.pdf"]
+    assert stored == members
+
+
+def test_tar_member_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / file_handler.UPLOAD_DIR).mkdir()
+    monkeypatch.setattr(file_handler, "MAX_FILE_SIZE", 10)
+    with ResumeArchive(tar_archive({"big.pdf": b"x" * 11}), "resumes.tar") as archive:
+        with pytest.raises(ValueError, match="not found"):
+            archive.save_member("missing.pdf")
+        with pytest.raises(HTTPException) as raised:
+            archive.save_member("big.pdf")
+        assert raised.value.status_code == 413
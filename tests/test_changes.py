@@ -0,0 +1,116 @@
+# tests/test_changes.py
+import asyncio
+import json
+from datetime import date
+
+import httpx
+import pytest
+
+from app import crud
+from app.changes import ChangeLog
+from app.main import app
+from app.routers.candidates import stream_candidate_changes
+
+
+def candidate_data(name: str) -> dict:
+    return dict(
+        full_name=name, dob=date(1990, 1, 1), contact_number="+1000000000", contact_address="1 Main St",
+        education_qualification="BSc", graduation_year=2012, years_of_experience=5, skill_set=("python",),
+    )
+
+
+def test_since_returns_the_entries_after_a_position():
+    log = ChangeLog(maxlen=8)
+    start = log.latest()
+    seqs = [log.append("create", i) for i in range(5)]
+    assert seqs == list(range(start + 1, start + 6))
+
+    changes, latest, truncated = log.since(start)
+    assert [(c["seq"], c["op"], c["id"]) for c in changes] == [(s, "create", i) for i, s in enumerate(seqs)]
+    assert latest == seqs[-1] and not truncated
+    assert [c["id"] for c in log.since(seqs[1], limit=2)[0]] == [2, 3]
+    # Caught up: nothing to send, but no resync either
+    assert log.since(latest) == ([], latest, False)
+
+
+def test_positions_outside_the_buffer_are_truncated():
+    log = ChangeLog(maxlen=8)
+    start = log.latest()
+    for i in range(11):
+        log.append("update", i)
+    # Past maxlen by more than a quarter, so the three oldest entries are dropped
+    latest = log.latest()
+    assert log.since(start) == ([], latest, True)
+    assert log.since(start + 2) == ([], latest, True)
+    changes, _, truncated = log.since(start + 3)
+    assert not truncated and [c["id"] for c in changes] == list(range(3, 11))
+    # A position from the future, e.g. one handed out before a restart with a slower clock
+    assert log.since(latest + 1) == ([], latest, True)
+
+
+@pytest.fixture
+def state(fresh_state, monkeypatch):
+    state = fresh_state()
+    state.changelog = ChangeLog(maxlen=8)
+    monkeypatch.setattr(crud, "app_state", state)
+    return state
+
+
+def test_long_poll_reports_truncation(state):
+    start = state.change_sequence()
+    for i in range(11):
+        state.add_candidate(candidate_data(f"Candidate {i}"), f"uploads/{i}.pdf")
+
+    async def get(since: int) -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await http.get("/api/candidates/changes", params={"since": since, "timeout": 0})
+        assert response.status_code == 200
+        return response.json()
+
+    body = asyncio.run(get(start))
+    assert body == {"changes": [], "next_since": state.change_sequence(), "truncated": True}
+    body = asyncio.run(get(start + 9))
+    assert [c["seq"] for c in body["changes"]] == [start + 10, start + 11]
+    assert body["next_since"] == start + 11 and not body["truncated"]
+
+
+class ConnectedRequest:
+    """Stands in for a client that stays connected"""
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def read_events(response, count: int) -> list:
+    async def collect():
+        chunks = response.body_iterator
+        try:
+            return [await chunks.__anext__() for _ in range(count)]
+        finally:
+            await chunks.aclose()
+
+    return asyncio.run(collect())
+
+
+def test_stream_resumes_from_last_event_id(state):
+    ids = [state.add_candidate(candidate_data(f"Candidate {i}"), f"uploads/{i}.pdf").id for i in range(3)]
+    first = state.change_sequence() - 2
+
+    response = asyncio.run(stream_candidate_changes(ConnectedRequest(), since=None, last_event_id=first))
+    retry, batch = read_events(response, 2)
+    assert retry == "retry: 3000\n\n"
+    events = [event for event in batch.split("\n\n") if event]
+    assert [event.splitlines()[0] for event in events] == [f"id: {first + 1}", f"id: {first + 2}"]
+    assert [json.loads(event.splitlines()[2][len("data: "):])["id"] for event in events] == ids[1:]
+
+
+def test_stream_from_a_truncated_position_asks_for_a_resync(state):
+    start = state.change_sequence()
+    for i in range(11):
+        state.add_candidate(candidate_data(f"Candidate {i}"), f"uploads/{i}.pdf")
+
+    # Last-Event-ID wins over ?since
+    response = asyncio.run(stream_candidate_changes(ConnectedRequest(), since=state.change_sequence(), last_event_id=start))
+    _, event = read_events(response, 2)
+    assert event == f"event: truncated\ndata: {json.dumps({'next_since': state.change_sequence()})}\n\n"
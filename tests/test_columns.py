@@ -0,0 +1,101 @@
+# tests/test_columns.py
+from datetime import date, datetime
+
+import numpy as np
+
+from app.columns import CandidateColumns
+from app.models import CandidateRecord
+
+
+def make_candidate(candidate_id: int, skills) -> CandidateRecord:
+    return CandidateRecord(
+        id=candidate_id,
+        full_name=f"Candidate {candidate_id}",
+        dob=date(1990, 1, 1),
+        contact_number="+1000000000",
+        contact_address="1 Main St",
+        education_qualification="BSc",
+        graduation_year=2012,
+        years_of_experience=candidate_id % 10,
+        skill_set=tuple(skills),
+        resume_path=f"uploads/{candidate_id}.pdf",
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+def test_skill_counts_grow_past_initial_capacity():
+    columns = CandidateColumns()
+    initial = len(columns.skill_counts)
+    candidates = [make_candidate(i, [f"skill-{i}", "python"]) for i in range(1, initial + 10)]
+    for candidate in candidates:
+        columns.set(candidate)
+
+    stats = columns.aggregate(top_skills=initial + 20)
+    counts = dict(stats["skills"])
+    assert stats["total"] == len(candidates)
+    assert counts["python"] == len(candidates)
+    assert all(counts[f"skill-{i}"] == 1 for i in range(1, initial + 10))
+
+    # Removing a record whose skill was added after the array grew
+    columns.remove(candidates[-1])
+    counts = dict(columns.aggregate(top_skills=initial + 20)["skills"])
+    assert counts["python"] == len(candidates) - 1
+    assert f"skill-{initial + 9}" not in counts
+
+
+def test_single_record_with_many_new_skills():
+    columns = CandidateColumns()
+    skills = [f"skill-{i}" for i in range(3 * len(columns.skill_counts))]
+    columns.set(make_candidate(1, skills))
+    counts = dict(columns.aggregate(top_skills=len(skills))["skills"])
+    assert len(counts) == len(skills)
+    assert set(counts.values()) == {1}
+
+
+def test_match_breaks_ties_like_a_full_sort():
+    rng = np.random.default_rng(3)
+    columns = CandidateColumns()
+    for i in range(1, 3000):
+        candidate = make_candidate(i, ["python"] if i % 3 else ["go"])
+        candidate.years_of_experience = int(rng.integers(0, 4))
+        columns.set(candidate)
+    n = columns.size
+    python = columns.mask({"python": {i for i in range(1, 3000) if i % 3}})
+    for required, optional, limit in [
+        ([], [], 10),  # every candidate ties on score 0
+        ([], [(python, 1.5)], 25),
+        ([(python, 1.0)], [], 7),
+        ([], [(python, 1.0)], 5000),
+    ]:
+        eligible, top = columns.match(required, optional, limit=limit)
+        ids = np.arange(n)[columns.alive[:n] & (required[0][0] if required else True)]
+        scores = sum((weight * mask for mask, weight in required + optional), np.zeros(n))[ids]
+        order = np.lexsort((ids, -columns.experience[ids], -scores))[:limit]
+        assert eligible == len(ids)
+        assert top == [(int(i), float(s)) for i, s in zip(ids[order], scores[order])]
+
+
+def test_skill_bitmaps_follow_later_writes():
+    columns = CandidateColumns()
+    holders = set()
+    for i in range(1, 1000):
+        if i % 3:
+            holders.add(i)
+        columns.set(make_candidate(i, ["python"] if i % 3 else ["go"]))
+    columns.add_skill_bitmap("python", holders)
+    assert not columns.wants_skill_bitmap("python", len(holders))
+
+    # Removals, re-adds and growth past the initial capacity after the bitmap exists
+    for i in range(1, 1000, 5):
+        columns.remove(make_candidate(i, ["python"] if i % 3 else ["go"]))
+        holders.discard(i)
+    for i in range(1000, 5000, 2):
+        columns.set(make_candidate(i, ["python", "sql"]))
+        holders.add(i)
+
+    expected = np.zeros(columns.size, dtype=bool)
+    expected[list(holders)] = True
+    assert np.array_equal(columns.mask({"python": holders}), expected)
+    # A bitmap and a scattered set combine into one mask
+    mask = columns.mask({"python": holders, "go": {3, 6}})
+    assert mask[3] and mask[6] and mask.sum() == len(holders | {3, 6})
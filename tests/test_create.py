@@ -0,0 +1,114 @@
+# tests/test_create.py
+import asyncio
+
+import httpx
+import pytest
+
+from app import crud, processing, schemas
+from app.main import app
+from app.routers import candidates
+from app.utils import file_cleanup
+
+RESUME = b"%PDF-1.4\n1 0 obj << >> endobj\ntrailer << >>\n%%EOF\n"
+FORM = dict(
+    full_name="Candidate", dob="1990-01-01", contact_number="+1000000000", contact_address="1 Main St",
+    education_qualification="BSc", graduation_year="2012", years_of_experience="5", skill_set='["python"]',
+)
+
+
+@pytest.fixture
+def api(fresh_state, tmp_path, monkeypatch):
+    """POSTs to the create route against a fresh store; records queued jobs and deletions"""
+    state = fresh_state()
+    monkeypatch.setattr(crud, "app_state", state)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    submitted, deleted = [], []
+    monkeypatch.setattr(processing, "submit", lambda candidate_id, path: submitted.append(candidate_id))
+    monkeypatch.setattr(file_cleanup, "schedule_deletion", deleted.append)
+
+    def post(key: str = None, resume: bytes = RESUME, **overrides) -> httpx.Response:
+        async def send():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.post(
+                    "/api/candidates/", data={**FORM, **overrides}, files={"resume": ("cv.pdf", resume, "application/pdf")},
+                    headers={} if key is None else {"Idempotency-Key": key},
+                )
+
+        return asyncio.run(send())
+
+    post.state, post.submitted, post.deleted, post.uploads = state, submitted, deleted, tmp_path / "uploads"
+    return post
+
+
+@pytest.fixture
+def dedupe(api, monkeypatch):
+    """Turns identity dedupe on for the store behind ``api``"""
+    def enable(mode: str):
+        monkeypatch.setattr(crud, "IDENTITY_DEDUPE", mode)
+        monkeypatch.setattr(candidates, "IDENTITY_DEDUPE", mode)
+        api.state.identity_index = {}
+
+    return enable
+
+
+def test_retry_with_the_same_key_is_replayed(api):
+    first = api(key="k1")
+    assert first.status_code == 201 and "idempotent-replayed" not in first.headers
+    retry = api(key="k1")
+    assert retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert api.state.count() == 1 and len(api.submitted) == 1
+
+
+def test_key_still_in_flight_is_a_conflict(api):
+    candidate = schemas.CandidateCreate(**{**FORM, "skill_set": ["python"]})
+    fingerprint = crud.request_fingerprint(candidate, "cv.pdf", len(RESUME))
+    assert api.state.claim_idempotency_key("k1", fingerprint)[0] == "claimed"
+
+    response = api(key="k1")
+    assert response.status_code == 409
+    assert api.state.count() == 0
+
+
+def test_key_reused_for_another_request_is_rejected(api):
+    assert api(key="k1").status_code == 201
+    response = api(key="k1", years_of_experience="6")
+    assert response.status_code == 422
+    assert api.state.count() == 1
+    # A failed attempt does not free a completed key
+    assert api(key="k1").headers["idempotent-replayed"] == "true"
+
+
+@pytest.mark.parametrize("mode, skills", [("return", ["python"]), ("merge", ["python", "go"])])
+def test_same_person_gets_the_stored_record(api, dedupe, mode, skills):
+    dedupe(mode)
+    first = api()
+    assert first.status_code == 201
+    again = api(resume=RESUME + b"% another upload\n", skill_set='["go"]')
+    assert again.status_code == 200
+    body = again.json()
+    assert body["id"] == first.json()["id"]
+    assert body["skill_set"] == skills
+    assert body["resume_path"] == first.json()["resume_path"]
+    assert api.state.count() == 1 and len(api.submitted) == 1
+    # The person was found before saving, so the second upload was never written
+    assert api.deleted == []
+    assert len([p for p in api.uploads.rglob("*") if p.is_file()]) == 1
+
+
+@pytest.mark.parametrize("resume, unused", [(RESUME, False), (RESUME + b"% another upload\n", True)])
+def test_person_stored_concurrently_keeps_its_resume(api, dedupe, monkeypatch, resume, unused):
+    dedupe("return")
+    stored = api().json()
+    # Another request stores the person between the duplicate check and the insert
+    monkeypatch.setattr(crud, "find_duplicates", lambda rows: [None] * len(rows))
+
+    response = api(resume=resume)
+    assert response.status_code == 200
+    assert response.json()["id"] == stored["id"]
+    # Identical content shares the stored blob, which must survive; a different upload is dropped
+    assert stored["resume_path"] not in api.deleted
+    assert len(api.deleted) == int(unused)
@@ -0,0 +1,285 @@
+# tests/test_persistence.py
+import os
+import pickle
+import zlib
+from datetime import date, datetime
+
+import pytest
+
+from app.models import CandidateRecord
+from app.persistence import Journal, record_to_row
+
+
+def make_candidate(candidate_id: int, **overrides) -> CandidateRecord:
+    fields = dict(
+        id=candidate_id,
+        full_name=f"Candidate {candidate_id}",
+        dob=date(1990, 1, 1),
+        contact_number="+1000000000",
+        contact_address="1 Main St",
+        education_qualification="BSc",
+        graduation_year=2012,
+        years_of_experience=candidate_id % 10,
+        skill_set=("python",),
+        resume_path=f"uploads/{candidate_id}.pdf",
+        created_at=datetime(2024, 1, 1),
+    )
+    fields.update(overrides)
+    return CandidateRecord(**fields)
+
+
+def open_journal(directory) -> Journal:
+    journal = Journal(str(directory))
+    journal.load()
+    return journal
+
+
+def wal_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("wal-"))
+
+
+def test_replay_applies_add_update_delete(tmp_path):
+    journal = open_journal(tmp_path)
+    for i in (1, 2, 3):
+        journal.append("add", record_to_row(make_candidate(i)))
+    journal.append("update", (2, {"years_of_experience": 7, "skill_set": ("go",)}))
+    journal.append("delete", 3)
+    journal.close()
+
+    loaded = Journal(str(tmp_path)).load()
+    assert loaded.id_counter == 3
+    assert sorted(loaded.records) == [1, 2]
+    assert loaded.records[1] == make_candidate(1)
+    assert loaded.records[2].years_of_experience == 7
+    assert loaded.records[2].skill_set == ("go",)
+
+
+def test_clear_resets_records_and_id_counter(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("add", record_to_row(make_candidate(1)))
+    journal.append("clear", None)
+    journal.append("add", record_to_row(make_candidate(1, full_name="After clear")))
+    journal.close()
+
+    loaded = Journal(str(tmp_path)).load()
+    assert loaded.id_counter == 1
+    assert loaded.records[1].full_name == "After clear"
+
+
+def test_torn_tail_is_dropped_and_truncated(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("add", record_to_row(make_candidate(1)))
+    journal.append("add", record_to_row(make_candidate(2)))
+    journal.close()
+    path = os.path.join(tmp_path, wal_files(tmp_path)[-1])
+    intact = os.path.getsize(path)
+
+    # Crash halfway through writing a third entry
+    journal = open_journal(tmp_path)
+    journal.append("add", record_to_row(make_candidate(3)))
+    journal.close()
+    torn = intact + (os.path.getsize(path) - intact) // 2
+    os.truncate(path, torn)
+
+    journal = Journal(str(tmp_path))
+    loaded = journal.load()
+    assert sorted(loaded.records) == [1, 2]
+    assert loaded.id_counter == 2
+    assert os.path.getsize(path) == intact
+
+    # Appends after recovery land on a clean boundary and replay
+    journal.append("add", record_to_row(make_candidate(4)))
+    journal.close()
+    records = Journal(str(tmp_path)).load().records
+    assert sorted(records) == [1, 2, 4]
+
+
+def test_torn_length_prefix_is_dropped(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("add", record_to_row(make_candidate(1)))
+    journal.close()
+    path = os.path.join(tmp_path, wal_files(tmp_path)[-1])
+    intact = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x07\x00")
+
+    records = Journal(str(tmp_path)).load().records
+    assert sorted(records) == [1]
+    assert os.path.getsize(path) == intact
+
+
+def test_snapshot_rotates_segments_and_keeps_later_entries(tmp_path):
+    journal = open_journal(tmp_path)
+    for i in (1, 2):
+        journal.append("add", record_to_row(make_candidate(i)))
+    rows = [record_to_row(make_candidate(i)) for i in (1, 2)]
+    journal.snapshot(lambda: {"id_counter": 2, "rows": rows, "processed": {}, "indexes": {"marker": 1}})
+    journal.append("add", record_to_row(make_candidate(3)))
+    journal.append("delete", 1)
+    journal.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["snapshot-00000001.bin", "wal-00000001.log"]
+
+    loaded = Journal(str(tmp_path)).load()
+    assert loaded.id_counter == 3
+    assert sorted(loaded.records) == [2, 3]
+    assert loaded.indexes == {"marker": 1}
+    # The snapshot versions of what the tail changed
+    assert loaded.before == {3: None, 1: make_candidate(1)}
+
+
+def test_tuple_snapshots_still_load(tmp_path):
+    with open(os.path.join(tmp_path, "snapshot-00000001.bin"), "wb") as f:
+        pickle.dump((2, [record_to_row(make_candidate(i)) for i in (1, 2)]), f)
+
+    loaded = Journal(str(tmp_path)).load()
+    assert loaded.id_counter == 2
+    assert sorted(loaded.records) == [1, 2]
+    assert loaded.indexes is None
+
+
+def test_leftover_temp_snapshot_is_ignored(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("add", record_to_row(make_candidate(1)))
+    journal.close()
+    # A snapshot interrupted before its rename
+    with open(os.path.join(tmp_path, "snapshot-00000001.bin.tmp"), "wb") as f:
+        f.write(b"partial")
+
+    records = Journal(str(tmp_path)).load().records
+    assert sorted(records) == [1]
+
+
+def test_processing_results_replay_for_current_resume_only(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("add", record_to_row(make_candidate(1)))
+    journal.append("add", record_to_row(make_candidate(2)))
+    journal.append("processing", (1, "uploads/1.pdf", {"status": "done"}, zlib.compress(b"resume one")))
+    # A result for a resume the candidate no longer has is ignored
+    journal.append("processing", (2, "uploads/old.pdf", {"status": "done"}, zlib.compress(b"stale")))
+    journal.close()
+
+    loaded = Journal(str(tmp_path)).load()
+    assert loaded.records[1].processing == {"status": "done"}
+    assert loaded.records[2].processing is None
+    assert loaded.texts == {1: zlib.compress(b"resume one")}
+
+
+def candidate_data(name: str) -> dict:
+    return dict(
+        full_name=name, dob=date(1990, 1, 1), contact_number="+1000000000", contact_address="1 Main St",
+        education_qualification="BSc", graduation_year=2012, years_of_experience=3, skill_set=["python"],
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_state_reload_keeps_processing_and_search_text(tmp_path, fresh_state, compact):
+    state = fresh_state()
+    state.enable_persistence(str(tmp_path))
+    done = state.add_candidate(candidate_data("Done"), "uploads/a.pdf")
+    waiting = state.add_candidate({**candidate_data("Waiting"), "processing": {"status": "pending"}}, "uploads/b.pdf")
+    state.set_processing(done.id, done.resume_path, {"status": "done", "page_count": 2}, "kubernetes operator")
+    if compact:
+        state.snapshot()
+    state.close()
+
+    state = fresh_state()
+    state.enable_persistence(str(tmp_path))
+    assert state.get_candidate(done.id).processing == {"status": "done", "page_count": 2}
+    assert state.get_candidate(waiting.id).processing is None
+    total, hits = state.search_resumes("kubernetes")
+    assert total == 1 and hits[0][0] == done.id
+    assert state.unprocessed_resumes(0, 1000) == ([(waiting.id, "uploads/b.pdf")], None)
+
+
+def fill(state, count: int, start: int = 0):
+    skills = ["python", "go", "rust", "sql", "react"]
+    state.add_candidates([
+        ({**candidate_data(f"Candidate {i}"), "years_of_experience": i % 12, "graduation_year": 2000 + i % 20,
+          "skill_set": [skills[i % 5], skills[(i * 3) % 5]]}, f"uploads/{i}.pdf")
+        for i in range(start, start + count)
+    ])
+
+
+def answers(state) -> tuple:
+    columns = state.columns
+    live = columns.alive[:columns.size]
+    stats = state.candidate_stats(top_skills=50)
+    return (
+        [state.query_candidates(skill=skill, experience=3, graduation_year_to=2015)[0] for skill in ("py", "go", "s")],
+        [(c.id, score) for c, score in state.match_candidates([("rust", 1.0)], [("sql", 2.0)], limit=50)[1]],
+        [state.search_resumes(query, 30) for query in ("kubernetes", "python operator", "rust")],
+        # Skills with equal counts come in code order, which a rebuild assigns afresh
+        sorted(stats["skills"], key=lambda item: (-item[1], item[0])),
+        {**stats, "skills": None},
+        sorted(state.resume_refs.items()),
+        live.tolist(),
+        # Deleted slots may keep stale values
+        [getattr(columns, name)[:len(live)][live].tolist() for name in ("experience", "graduation_year", "created_at")],
+    )
+
+
+def test_reload_from_snapshot_indexes_matches_a_full_rebuild(tmp_path, fresh_state, monkeypatch):
+    state = fresh_state()
+    state.enable_persistence(str(tmp_path))
+    fill(state, 300)
+    for candidate_id in range(1, 300, 7):
+        state.set_processing(candidate_id, f"uploads/{candidate_id - 1}.pdf", {"status": "done"},
+                             f"kubernetes operator number {candidate_id}")
+    state.snapshot()
+    state.journal._snapshotter.join()
+    # A log tail touching snapshot records, new records and processing results
+    for candidate_id in range(2, 300, 9):
+        state.update_candidate(candidate_id, {"years_of_experience": 4, "skill_set": ["rust", "kotlin"]})
+    for candidate_id in range(3, 300, 11):
+        state.delete_candidate(candidate_id)
+    fill(state, 40, start=300)
+    for candidate_id in (8, 15, 320):
+        state.set_processing(candidate_id, f"uploads/{candidate_id - 1}.pdf", {"status": "done"}, "python operator")
+    expected = answers(state)
+    state.close()
+
+    restored = fresh_state()
+    restored.enable_persistence(str(tmp_path))
+    assert answers(restored) == expected
+    restored.close()
+
+    # The same store rebuilt without the snapshot's index data
+    loader = Journal.load
+    monkeypatch.setattr(Journal, "load", lambda journal: loader(journal)._replace(indexes=None))
+    rebuilt = fresh_state()
+    rebuilt.enable_persistence(str(tmp_path))
+    assert answers(rebuilt) == expected
+
+
+def test_snapshot_is_the_store_as_of_its_start(tmp_path, fresh_state, monkeypatch):
+    state = fresh_state()
+    state.enable_persistence(str(tmp_path))
+    fill(state, 20)
+    state.set_processing(1, "uploads/0.pdf", {"status": "done"}, "kubernetes operator")
+    rows = [record_to_row(state.get_candidate(i)) for i in state.ordered_ids]
+    builds = []
+    monkeypatch.setattr(state.journal, "snapshot", builds.append)
+    state.snapshot()
+
+    # Writes racing the snapshot thread
+    state.update_candidate(2, {"skill_set": ["cobol"]})
+    state.delete_candidate(3)
+    state.set_processing(1, "uploads/0.pdf", {"status": "done", "page_count": 3}, "fortran wizard")
+    fill(state, 5, start=20)
+    for _ in range(200):
+        state.set_processing(4, "uploads/3.pdf", {"status": "done"}, "kubernetes " * 50)
+    payload = builds[0]()
+
+    assert payload["id_counter"] == 20
+    assert payload["rows"] == rows
+    assert payload["processed"] == {1: ({"status": "done"}, zlib.compress(b"kubernetes operator"))}
+    assert "cobol" not in payload["indexes"]["skills"]
+    assert payload["indexes"]["columns"]["size"] == 21
+    text = payload["indexes"]["text"]
+    assert "fortran" not in text["terms"]
+    kubernetes = text["terms"].index("kubernetes")
+    start, end = text["offsets"][kubernetes:kubernetes + 2]
+    assert text["postings"][start:end].tolist() == [[1, 1]]
+    assert state._capture is None
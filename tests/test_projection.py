@@ -0,0 +1,31 @@
+# tests/test_projection.py
+import json
+from datetime import date, datetime
+
+import pytest
+
+from app import crud
+from app.models import CandidateRecord
+
+
+def make_candidate(processing) -> CandidateRecord:
+    return CandidateRecord(
+        id=1, full_name="Ada", dob=date(1990, 1, 2), contact_number="+1000000000", contact_address="1 Main St",
+        education_qualification="BSc", graduation_year=2012, years_of_experience=5, skill_set=("python",),
+        resume_path="uploads/a.pdf", created_at=datetime(2024, 1, 1, 9, 30), updated_at=datetime(2024, 1, 2),
+        processing=processing,
+    )
+
+
+@pytest.mark.parametrize("processing", [
+    None,
+    {"status": "pending"},
+    {"status": "done", "stages": {"virus_scan": {"status": "ok", "attempts": 1, "duration_ms": 2.5}},
+     "page_count": 2, "finished_at": datetime(2024, 1, 2, 3, 4, 5, 678), "custom_field": "kept"},
+])
+def test_projected_fields_match_the_full_response(processing):
+    candidate = make_candidate(processing)
+    full = json.loads(crud.candidate_json(candidate))
+    fields = crud.parse_fields(",".join(crud.CANDIDATE_FIELDS))
+    projected = json.loads(crud.projected_json(candidate, fields))
+    assert projected == full
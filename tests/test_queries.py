@@ -0,0 +1,96 @@
+# tests/test_queries.py
+import random
+from datetime import date
+
+import pytest
+
+SKILLS = ["python", "java", "javascript", "go", "rust", "sql", "kubernetes", "react"]
+
+
+def candidate_data(rng: random.Random) -> dict:
+    return dict(
+        full_name="Candidate", dob=date(1990, 1, 1), contact_number="+1000000000", contact_address="1 Main St",
+        education_qualification="BSc", graduation_year=rng.randint(2000, 2024),
+        years_of_experience=rng.randint(0, 20), skill_set=rng.sample(SKILLS, rng.randint(1, 3)),
+    )
+
+
+def matches(candidate, skill, experience, graduation_year, experience_max, graduation_year_from, graduation_year_to):
+    return (
+        (not skill or any(skill.lower() in s.lower() for s in candidate.skill_set))
+        and (experience is None or candidate.years_of_experience >= experience)
+        and (experience_max is None or candidate.years_of_experience <= experience_max)
+        and (graduation_year is None or candidate.graduation_year == graduation_year)
+        and (graduation_year_from is None or candidate.graduation_year >= graduation_year_from)
+        and (graduation_year_to is None or candidate.graduation_year <= graduation_year_to)
+    )
+
+
+@pytest.fixture
+def populated(fresh_state):
+    rng = random.Random(7)
+    state = fresh_state()
+    state.add_candidates([(candidate_data(rng), f"uploads/{i}.pdf") for i in range(2000)])
+    # Leave gaps and changed records behind
+    for candidate_id in range(1, 2000, 7):
+        state.delete_candidate(candidate_id)
+    for candidate_id in range(2, 2000, 11):
+        state.update_candidate(candidate_id, {"years_of_experience": 0, "skill_set": ("rust",)})
+    return state
+
+
+def test_planned_queries_match_a_full_scan(populated):
+    rng = random.Random(11)
+    stored = [populated.get_candidate(i) for i in populated.ordered_ids]
+    stored = [c for c in stored if c is not None]
+    for _ in range(300):
+        filters = dict(
+            skill=rng.choice([None, None, "py", "java", "script", "rust", "s", "nosuchskill"]),
+            experience=rng.choice([None, 0, 5, 15]),
+            graduation_year=rng.choice([None, None, None, 2010]),
+            experience_max=rng.choice([None, 3, 12]),
+            graduation_year_from=rng.choice([None, 2005, 2020]),
+            graduation_year_to=rng.choice([None, 2012, 2024]),
+        )
+        total, found = populated.query_candidates(**filters)
+        expected = [c.id for c in stored if matches(c, **filters)]
+        assert [c.id for c in found] == expected, filters
+        assert total == len(expected)
+
+
+def test_after_id_seeks_within_planned_results(populated):
+    total, found = populated.query_candidates(skill="rust", experience=0)
+    ids = [c.id for c in found]
+    _, after = populated.query_candidates(skill="rust", experience=0, after_id=ids[len(ids) // 2])
+    assert [c.id for c in after] == ids[len(ids) // 2 + 1:]
+
+
+def test_matches_agree_before_and_after_skill_bitmaps(populated, monkeypatch):
+    monkeypatch.setattr("app.columns.SKILL_BITMAP_MIN", 10)
+    required, optional = [("script", 1.0)], [("rust", 2.0), ("sql", 0.5)]
+
+    def expected():
+        stored = [c for c in (populated.get_candidate(i) for i in populated.ordered_ids) if c is not None]
+        has = lambda c, skill: any(skill in s.lower() for s in c.skill_set)
+        eligible = [c for c in stored if has(c, "script") and c.years_of_experience >= 2]
+        return len(eligible), {c.id: 1.0 + sum(w for s, w in optional if has(c, s)) for c in eligible}
+
+    def check():
+        total, top = populated.match_candidates(required, optional, experience_min=2, limit=1000)
+        count, scores = expected()
+        assert total == count
+        assert len(top) == min(count, 1000)
+        assert all(score == pytest.approx(scores[c.id]) for c, score in top)
+
+    assert not populated.columns.skill_bitmaps
+    check()
+    # The first match gave the common skills a bitmap
+    assert populated.columns.skill_bitmaps
+    check()
+    for candidate_id in range(3, 2000, 13):
+        populated.update_candidate(candidate_id, {"years_of_experience": 9, "skill_set": ("javascript", "sql")})
+    for candidate_id in range(4, 2000, 17):
+        populated.delete_candidate(candidate_id)
+    populated.add_candidates([({**candidate_data(random.Random(i)), "skill_set": ("rust", "javascript")}, "uploads/x.pdf")
+                              for i in range(50)])
+    check()
@@ -0,0 +1,107 @@
+# tests/test_ranges.py
+import asyncio
+import gzip
+import os
+from datetime import date
+
+import httpx
+import pytest
+
+from app import crud
+from app.main import app
+from app.utils.file_handler import CHUNK_SIZE, iter_blob, parse_range
+
+CONTENT = os.urandom(3 * CHUNK_SIZE + 123)
+
+
+@pytest.mark.parametrize("header, span", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=500-", (500, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=999-999", (999, 999)),
+    ("Bytes = 0-0", (0, 0)),
+    # Ignored, so the whole file is sent
+    ("bytes=10-5", None),
+    ("bytes=0-1,5-9", None),
+    ("items=0-9", None),
+    ("bytes=abc", None),
+    ("bytes=", None),
+])
+def test_parse_range(header, span):
+    assert parse_range(header, 1000) == span
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000), ("bytes=1000-2000", 1000), ("bytes=-0", 1000), ("bytes=0-", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+@pytest.fixture(params=["raw", "gzip"])
+def blob(request, tmp_path) -> str:
+    if request.param == "raw":
+        path = tmp_path / "resume.pdf"
+        path.write_bytes(CONTENT)
+    else:
+        path = tmp_path / "resume.pdf.gz"
+        path.write_bytes(gzip.compress(CONTENT))
+    return str(path)
+
+
+def read(path: str, start: int, end: int) -> bytes:
+    async def collect():
+        return [chunk async for chunk in iter_blob(path, start, end)]
+
+    chunks = asyncio.run(collect())
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+    return b"".join(chunks)
+
+
+@pytest.mark.parametrize("start, end", [
+    (0, len(CONTENT) - 1),
+    (CHUNK_SIZE - 10, CHUNK_SIZE + 10),
+    (CHUNK_SIZE, 3 * CHUNK_SIZE),
+    (len(CONTENT) - 5, len(CONTENT) - 1),
+])
+def test_iter_blob_yields_exactly_the_span(blob, start, end):
+    assert read(blob, start, end) == CONTENT[start:end + 1]
+
+
+@pytest.fixture
+def client(fresh_state, tmp_path, monkeypatch):
+    state = fresh_state()
+    monkeypatch.setattr(crud, "app_state", state)
+    path = tmp_path / "resume.pdf.gz"
+    path.write_bytes(gzip.compress(CONTENT))
+    candidate = state.add_candidate(dict(
+        full_name="Candidate", dob=date(1990, 1, 1), contact_number="+1000000000", contact_address="1 Main St",
+        education_qualification="BSc", graduation_year=2012, years_of_experience=5, skill_set=("python",),
+    ), str(path))
+
+    async def get(headers: dict) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.get(f"/api/candidates/{candidate.id}/resume", headers=headers)
+
+    return lambda headers: asyncio.run(get(headers))
+
+
+def test_compressed_resume_range_routes(client):
+    size = len(CONTENT)
+    response = client({"Range": "bytes=-10", "Accept-Encoding": "identity"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {size - 10}-{size - 1}/{size}"
+    assert response.content == CONTENT[-10:]
+
+    response = client({"Range": f"bytes={size}-", "Accept-Encoding": "identity"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
+
+    # A range the server ignores gets the whole file
+    response = client({"Range": "bytes=0-1,5-9", "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.content == CONTENT
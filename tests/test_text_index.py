@@ -0,0 +1,93 @@
+# tests/test_text_index.py
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from app.indexes import TextIndex, tokenize
+
+WORDS = [f"w{i}" for i in range(200)]
+
+
+def bm25(docs: dict, query: str, k1: float = 1.2, b: float = 0.75) -> dict:
+    """Reference Okapi BM25 over ``{doc_id: text}``, scored document by document"""
+    counts = {doc_id: Counter(tokenize(text)) for doc_id, text in docs.items()}
+    average_length = sum(sum(c.values()) for c in counts.values()) / len(counts)
+    scores = {}
+    for term in set(tokenize(query)):
+        holders = [doc_id for doc_id, c in counts.items() if term in c]
+        idf = math.log(1 + (len(counts) - len(holders) + 0.5) / (len(holders) + 0.5))
+        for doc_id in holders:
+            tf = counts[doc_id][term]
+            norm = k1 * (1 - b + b * sum(counts[doc_id].values()) / average_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+@pytest.fixture
+def churned():
+    rng = random.Random(5)
+    index, docs = TextIndex(), {}
+    # Enough rewrites of the same ids to push common terms through several compactions
+    for _ in range(6000):
+        doc_id = rng.randrange(1500)
+        if rng.random() < 0.2:
+            index.remove(doc_id)
+            docs.pop(doc_id, None)
+        else:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(0, 25)))
+            index.add(doc_id, text)
+            docs[doc_id] = text
+    return index, docs
+
+
+def test_search_matches_reference_scores(churned):
+    index, docs = churned
+    rng = random.Random(9)
+    assert len(index) == len(docs)
+    for query in ["w1", "w0 w1 w2", "W3 nosuchword", "nosuchword", *(" ".join(rng.sample(WORDS, 3)) for _ in range(30))]:
+        expected = bm25(docs, query)
+        total, top = index.search(query, limit=15)
+        assert total == len(expected), query
+        ranked = sorted(expected.values(), reverse=True)[:15]
+        assert [score for _, score in top] == pytest.approx(ranked), query
+        # Near-equal scores may come back in either order, so check each hit's own score
+        assert all(score == pytest.approx(expected[doc_id]) for doc_id, score in top), query
+
+
+def test_rewrites_are_compacted():
+    index = TextIndex()
+    for version in range(1000):
+        index.add(1, f"python v{version}")
+    # Each rewrite retires the last entry; compaction drops them once the array doubles
+    assert len(index._postings["python"]) // 3 <= TextIndex.COMPACT_MIN
+    total, top = index.search("python")
+    assert total == 1 and [doc_id for doc_id, _ in top] == [1]
+    assert index.search("v0") == (0, [])
+
+
+def test_removed_documents_drop_out():
+    index = TextIndex()
+    index.add(1, "python developer")
+    index.add(2, "python python")
+    index.add(1, "java developer")
+    total, top = index.search("python")
+    assert total == 1 and [doc_id for doc_id, _ in top] == [2]
+    index.remove(2)
+    assert index.search("python") == (0, [])
+    assert len(index) == 1
+    index.clear()
+    assert len(index) == 0
+    assert index.search("java") == (0, [])
+
+
+def test_ties_at_the_cutoff_go_to_the_lowest_ids():
+    index = TextIndex()
+    # Same text everywhere, stored out of id order
+    for doc_id in [9, 4, 7, 1, 8, 3, 6, 2, 5]:
+        index.add(doc_id, "python developer")
+    index.add(10, "python python")
+    total, top = index.search("python", limit=4)
+    assert total == 10
+    assert [doc_id for doc_id, _ in top] == [10, 1, 2, 3]
@@ -0,0 +1,97 @@
+# tests/test_upload_limit.py
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.utils import file_handler
+from app.utils.file_handler import UploadLimitMiddleware
+
+LIMIT = 100
+
+
+class BodyReader:
+    """ASGI app that reads the whole body, like the form parser, then answers with its size"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise OSError("client disconnected")
+            size += len(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(size).encode()})
+
+
+def run(chunks, content_length=None, method="POST", path="/api/candidates/"):
+    """Send ``chunks`` through the middleware; returns (status, body, chunks read, app calls)"""
+    app = BodyReader()
+    middleware = UploadLimitMiddleware(app, max_body=LIMIT)
+    pending = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return pending.pop(0) if pending else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    scope = {"type": "http", "method": method, "path": path, "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return sent[0]["status"], body, len(chunks) - len(pending), app.calls
+
+
+def test_declared_length_over_the_limit_is_refused_unread():
+    status, body, read, calls = run([b"x" * 10], content_length=LIMIT + 1)
+    assert status == 413
+    assert b"too large" in body
+    assert read == 0 and calls == 0
+
+
+def test_body_at_the_limit_passes():
+    status, body, _, _ = run([b"x" * 60, b"x" * 40], content_length=LIMIT)
+    assert (status, body) == (200, b"100")
+
+
+def test_chunked_body_is_cut_off_once_past_the_limit():
+    status, body, read, calls = run([b"x" * 60, b"x" * 60, b"x" * 60, b"x" * 60])
+    assert status == 413
+    assert b"too large" in body
+    # The third chunk is never read
+    assert read == 2 and calls == 1
+
+
+def test_understated_length_is_still_counted():
+    status, _, read, _ = run([b"x" * 60, b"x" * 60, b"x" * 60], content_length=10)
+    assert status == 413
+    assert read == 2
+
+
+@pytest.mark.parametrize("method, path", [("GET", "/api/candidates/"), ("POST", "/api/candidates/bulk")])
+def test_other_routes_are_not_limited(method, path):
+    status, body, _, _ = run([b"x" * 150, b"x" * 150], method=method, path=path)
+    assert (status, body) == (200, b"300")
+
+
+def test_oversized_file_inside_the_form_allowance_gets_413(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / file_handler.UPLOAD_DIR).mkdir()
+    monkeypatch.setattr(file_handler, "MAX_FILE_SIZE", 1000)
+    upload = UploadFile(io.BytesIO(b"x" * 1001), filename="cv.pdf")
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(file_handler.save_resume_file(upload))
+    assert raised.value.status_code == 413
+    # The partial temp file is removed
+    assert list((tmp_path / file_handler.UPLOAD_DIR).iterdir()) == []
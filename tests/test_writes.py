@@ -0,0 +1,69 @@
+# tests/test_writes.py
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from app import schemas
+from app.persistence import Journal
+
+
+def candidate_data(**overrides) -> dict:
+    data = dict(
+        full_name="Candidate", dob=date(1990, 1, 1), contact_number="+1000000000", contact_address="1 Main St",
+        education_qualification="BSc", graduation_year=2012, years_of_experience=5, skill_set=("python",),
+    )
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def journaled(fresh_state, tmp_path):
+    state = fresh_state()
+    state.enable_persistence(str(tmp_path))
+    return state
+
+
+def test_insert_the_columns_reject_stores_nothing(journaled, tmp_path):
+    kept = journaled.add_candidate(candidate_data(), "uploads/a.pdf")
+    sequence = journaled.change_sequence()
+    with pytest.raises(OverflowError):
+        journaled.add_candidate(candidate_data(years_of_experience=10 ** 10), "uploads/b.pdf")
+
+    assert journaled.ordered_ids == [kept.id]
+    assert list(journaled.candidates_db) == [kept.id]
+    assert "uploads/b.pdf" not in journaled.resume_refs
+    assert journaled.change_sequence() == sequence
+    assert journaled.query_candidates(skill="python")[0] == 1
+    assert journaled.candidate_stats()["total"] == 1
+    journaled.close()
+    records = Journal(str(tmp_path)).load().records
+    assert list(records) == [kept.id]
+
+
+def test_update_the_columns_reject_changes_nothing(journaled, tmp_path):
+    stored = journaled.add_candidate(candidate_data(), "uploads/a.pdf")
+    sequence = journaled.change_sequence()
+    with pytest.raises(OverflowError):
+        journaled.update_candidate(stored.id, {"graduation_year": 10 ** 11, "skill_set": ("go",)})
+
+    assert journaled.get_candidate(stored.id) is stored
+    assert journaled.change_sequence() == sequence
+    # Every index still holds the stored version
+    assert [c.id for c in journaled.query_candidates(skill="python", graduation_year=2012)[1]] == [stored.id]
+    assert journaled.query_candidates(skill="go")[0] == 0
+    assert journaled.candidate_stats()["graduates_per_year"] == {2012: 1}
+    journaled.close()
+    records = Journal(str(tmp_path)).load().records
+    assert records[stored.id].graduation_year == 2012
+
+
+@pytest.mark.parametrize("field, value", [
+    ("graduation_year", 10 ** 11), ("graduation_year", 1800),
+    ("years_of_experience", 10 ** 10), ("years_of_experience", -1),
+])
+def test_schemas_bound_numeric_fields(field, value):
+    with pytest.raises(ValidationError):
+        schemas.CandidateCreate(**candidate_data(**{field: value}))
+    with pytest.raises(ValidationError):
+        schemas.CandidateUpdate(**{field: value})